@@ -0,0 +1,75 @@
+# calc_core.py のバッチ計算について、1件ずつ計算する場合と時間を比べ、結果が同じことを確かめるベンチマーク
+#
+#   calculate loop:     calculate(a, b, op) を1件ずつ
+#   calculate_many:     (op, a, b) のリストをまとめて（numpy があれば演算ごとに配列で計算）
+#   calculate_arrays:   演算・a・b を別々の配列で渡す
+#   evaluate loop / evaluate_many: 式の文字列を1件ずつ / プロセスプールで分けて
+#
+# 実行方法: python benchmarks/bench_batch.py
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import calc_core
+from bench_expression import random_expression
+
+N = 200_000
+# 電卓のボタンの演算（x! と X^y は1件ずつ計算される）
+OPS = ("+", "-", "*", "/", "sin", "cos", "tan", "In", "√", "x!", "X^y")
+
+
+def random_operation(rng):
+    op = rng.choice(OPS)
+    if op == "x!":
+        return op, 0.0, float(rng.randint(0, 20))
+    if op == "X^y":
+        return op, rng.uniform(-10, 10), float(rng.randint(-3, 3))
+    # 0 での割り算や負の数の ln など、"Error" になるものも混ぜる
+    return op, rng.uniform(-1000, 1000), rng.choice([0.0, 90.0, rng.uniform(-1000, 1000)])
+
+
+def same(x, y):
+    if isinstance(x, float) and isinstance(y, float) and math.isnan(x) and math.isnan(y):
+        return True
+    return x == y and type(x) is type(y)
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - t0
+
+
+def report(name, elapsed, note=""):
+    print(f"{name:20s} {elapsed * 1000:8.1f} ms {elapsed / N * 1e6:6.2f} us/item  {note}")
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    items = [random_operation(rng) for _ in range(N)]
+    print(f"{N} operations{'' if calc_core.np is not None else ' (numpy not installed)'}")
+
+    expected, elapsed = timed(lambda: [calc_core.calculate(a, b, op) for op, a, b in items])
+    report("calculate loop", elapsed)
+    results, elapsed = timed(calc_core.calculate_many, items)
+    assert all(same(x, y) for x, y in zip(results, expected))
+    report("calculate_many", elapsed)
+    if calc_core.np is not None:
+        ops, a, b = zip(*items)
+        a, b = calc_core.np.array(a), calc_core.np.array(b)
+        results, elapsed = timed(calc_core.calculate_arrays, ops, a, b)
+        assert all(same(x, y) for x, y in zip(results, expected))
+        report("calculate_arrays", elapsed)
+
+    texts = [random_expression(rng) for _ in range(N)]
+    expected, elapsed = timed(lambda: [calc_core.evaluate(text) for text in texts])
+    report("evaluate loop", elapsed)
+    for workers in sorted({1, os.cpu_count() or 1}):
+        results, elapsed = timed(lambda: list(calc_core.evaluate_many(texts, workers=workers)))
+        assert all(same(x, y) for x, y in zip(results, expected))
+        report("evaluate_many", elapsed, f"({workers} worker{'s' if workers > 1 else ''})")
@@ -0,0 +1,139 @@
+# 電卓の式の計算（expression.py）について、ランダムな式 10 万個を計算する時間を段階ごとに比べるベンチマーク
+#
+#   tokenize / parse / compile: 字句解析・構文解析・コンパイル（型ごとに1回）それぞれにかかる時間
+#   if/elif walk:       構文解析した木を、変更前の calculate と同じ if/elif の連なりでたどって計算
+#   compiled:           コンパイル済みの関数で計算
+#   evaluate():         expression.evaluate（文字列から。同じ型の式はコンパイル済みの関数を使い回す）
+#   "=" with new values: 同じ型の式に数だけを替えて計算し直す（「=」を押し直したとき）
+#
+# 実行方法: python benchmarks/bench_expression.py
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import expression
+import numeric
+from factorial import factorial
+
+N = 100_000
+MAX_OPERANDS = 5
+
+
+# ランダムな式の文字列を作る関数（0 での割り算などで計算できない式も混ざる）
+def random_expression(rng, operands=None):
+    operands = operands or rng.randint(1, MAX_OPERANDS)
+    parts = []
+    for i in range(operands):
+        if i:
+            parts.append(rng.choice("+-*/"))
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f"{rng.choice(['sin', 'cos', '√', 'ln'])} {rng.uniform(0.5, 360):.2f}")
+        elif roll < 0.2 and operands > 1:
+            parts.append(f"({random_expression(rng, 2)})")
+        elif roll < 0.25:
+            parts.append(f"{rng.randint(1, 9)}^{rng.randint(0, 3)}")
+        else:
+            parts.append(f"{rng.randint(0, 999)}")
+    return " ".join(parts)
+
+
+# --- 変更前の calculate と同じ、演算子の文字列を順に比べて計算する版 ---
+
+def legacy_walk(node, values):
+    op = node[0]
+    if op == "#":
+        return values[node[1]]
+    if op == "+":
+        return legacy_walk(node[1], values) + legacy_walk(node[2], values)
+    elif op == "-":
+        return legacy_walk(node[1], values) - legacy_walk(node[2], values)
+    elif op == "*":
+        return legacy_walk(node[1], values) * legacy_walk(node[2], values)
+    elif op == "/":
+        return legacy_walk(node[1], values) / legacy_walk(node[2], values)
+    elif op == "^":
+        return expression._power(legacy_walk(node[1], values), legacy_walk(node[2], values))
+    elif op == "neg":
+        return -legacy_walk(node[1], values)
+    elif op == "√":
+        return numeric.sqrt(legacy_walk(node[1], values))
+    elif op == "sin":
+        return numeric.sin_deg(legacy_walk(node[1], values))
+    elif op == "cos":
+        return numeric.cos_deg(legacy_walk(node[1], values))
+    elif op == "tan":
+        return numeric.tan_deg(legacy_walk(node[1], values))
+    elif op == "ln":
+        return numeric.ln(legacy_walk(node[1], values))
+    elif op == "fact":
+        return factorial(legacy_walk(node[1], values))
+
+
+def run_all(func, items):
+    results = []
+    t0 = time.perf_counter()
+    for item in items:
+        try:
+            results.append(func(item))
+        except expression.MATH_ERRORS:
+            results.append("Error")
+    return results, time.perf_counter() - t0
+
+
+def timed(func, items):
+    t0 = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - t0
+
+
+def report(name, elapsed, note=""):
+    print(f"{name:20s} {elapsed * 1000:8.1f} ms {elapsed / N * 1e6:6.2f} us/expr  {note}")
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    texts = [random_expression(rng) for _ in range(N)]
+    print(f"{N} random expressions")
+    # 10 万個の式を持ったままだと、クロージャを作るたびに起きる GC の時間が支配的になるので止めて計る
+    gc.disable()
+
+    report("tokenize", timed(expression.tokenize.__wrapped__, texts))
+    tokens = [expression.tokenize.__wrapped__(text) for text in texts]
+    report("parse", timed(lambda item: expression.parse(item[0]), tokens))
+    trees = {template: expression.parse(template) for template, _ in tokens}
+    _, binary, functions = expression.MODES["float"]
+    report("compile", timed(lambda tree: expression._compile(tree, binary, functions), trees.values()),
+           f"({len(trees)} distinct templates)")
+    compiled = {template: expression._compile(tree, binary, functions) for template, tree in trees.items()}
+
+    expected, elapsed = run_all(lambda item: legacy_walk(trees[item[0]], item[1]), tokens)
+    report("if/elif walk", elapsed)
+    results, elapsed = run_all(lambda item: compiled[item[0]](item[1]), tokens)
+    assert results == expected
+    report("compiled", elapsed)
+
+    expression.tokenize.cache_clear()
+    expression.compile_template.cache_clear()
+    results, elapsed = run_all(expression.evaluate, texts)
+    assert results == expected
+    info = expression.compile_template.cache_info()
+    report("evaluate()", elapsed, f"(compile cache hits {info.hits / (info.hits + info.misses):.1%}, size {expression.CACHE_SIZE})")
+
+    # 型の数がキャッシュに収まる場合: よく使う型それぞれについて、数だけを替えて計算し直す
+    shapes = list(dict.fromkeys(template for template, _ in tokens))[:expression.CACHE_SIZE]
+    reruns = [(template, tuple(rng.uniform(0, 999) for _ in range(template.count("#"))))
+              for template in shapes for _ in range(N // len(shapes))]
+    expression.compile_template.cache_clear()
+    _, elapsed = run_all(lambda item: expression.compile_template(item[0])(item[1]), reruns)
+    report('"=" with new values', elapsed, f"({len(shapes)} templates x {N // len(shapes)} operand sets)")
+
+    # 比べる相手として、同じ式を Python の eval で計算する時間（^ を ** に替え、関数を含まない式だけ）
+    plain = [text.replace("^", "**") for text in texts if not any(c.isalpha() or c == "√" for c in text)]
+    _, elapsed = run_all(eval, plain)
+    report("python eval", elapsed * N / len(plain), "(expressions without functions, scaled to N)")
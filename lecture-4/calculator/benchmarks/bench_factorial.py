@@ -0,0 +1,64 @@
+# 電卓の x! について、変更前の順に掛ける計算と factorial.py（prime swing + 二分割の積 + メモ）の速さと、
+# 大きな結果を表示用の文字列にする時間（str() と display.py の指数表記）を比べるベンチマーク
+#
+# 実行方法: python benchmarks/bench_factorial.py
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import display
+import factorial
+
+SIZES = (1000, 5000, 20000, 100000)
+# 順に掛ける計算はこれより大きい n では時間がかかりすぎるので計らない
+LEGACY_MAX = 20000
+
+
+# --- 変更前の calc.py と同じ計算 ---
+
+def legacy_factorial(n):
+    result = 1
+    for i in range(1, n + 1):
+        result *= i
+    return result
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    value = func(*args)
+    return value, (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    # 全桁の str() と比べるので、Python 3.11 からの桁数の上限を外す
+    if hasattr(sys, "set_int_max_str_digits"):
+        sys.set_int_max_str_digits(0)
+
+    print(f"{'n':>7s} {'legacy':>9s} {'swing':>9s} {'cached':>9s} {'math':>9s} {'str()':>9s} {'display':>9s}  (ms)")
+    for n in SIZES:
+        factorial.CACHE.clear()
+        expected, math_time = timed(math.factorial, n)
+        legacy_time = "-"
+        if n <= LEGACY_MAX:
+            value, elapsed = timed(legacy_factorial, n)
+            assert value == expected
+            legacy_time = f"{elapsed:.1f}"
+        value, swing_time = timed(factorial.factorial, n)
+        assert value == expected
+        # 2回目はメモから返る
+        _, cached_time = timed(factorial.factorial, n)
+        text, str_time = timed(str, value)
+        shown, display_time = timed(display.format_int, value)
+        # 指数表記は全桁の文字列を10桁に丸めたものと同じになる
+        assert float(shown.split("e")[0]) == round(float(f"{text[0]}.{text[1:12]}"), 9)
+        assert shown.endswith(f"e+{len(text) - 1}")
+        print(f"{n:7d} {legacy_time:>9s} {swing_time:9.1f} {cached_time:9.3f} {math_time:9.1f} {str_time:9.1f} {display_time:9.3f}")
+
+    # n + 1 は n // 2 までのメモを使い回す
+    factorial.CACHE.clear()
+    factorial.factorial(SIZES[-1])
+    _, next_time = timed(factorial.factorial, SIZES[-1] + 1)
+    print(f"\n{SIZES[-1] + 1}! after {SIZES[-1]}!: {next_time:.1f} ms")
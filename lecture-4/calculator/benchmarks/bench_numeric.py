@@ -0,0 +1,123 @@
+# 電卓の sin / cos / ln / √ について、変更前のテイラー展開・ニュートン法と numeric.py（範囲縮小 + 最良近似多項式）の
+# 精度（math との差）と速さを比べるベンチマーク
+#
+# 実行方法: python benchmarks/bench_numeric.py
+#   numpy が入っていれば numeric_np.py（配列でまとめて計算する版）も計る
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numeric
+
+try:
+    import numpy as np
+    import numeric_np
+except ImportError:
+    np = None
+
+N = 20000
+PI = 3.141592653589793
+
+
+# --- 変更前の calc.py と同じ計算 ---
+
+def legacy_sqrt(a):
+    x = a
+    for _ in range(10):
+        x = (x + a / x) / 2
+    return x
+
+
+def legacy_sin(x):
+    x = x * PI / 180
+    result = 0
+    term = x
+    sign = 1
+    for n in range(1, 20, 2):
+        result += sign * term
+        term = term * x * x / ((n + 1) * (n + 2))
+        sign *= -1
+    return result
+
+
+def legacy_cos(x):
+    x = x * PI / 180
+    result = 1
+    term = 1
+    sign = -1
+    for n in range(2, 20, 2):
+        term = term * x * x / (n * (n - 1))
+        result += sign * term
+        sign *= -1
+    return result
+
+
+def legacy_ln(x):
+    y = (x - 1) / (x + 1)
+    result = 0
+    term = y
+    for n in range(1, 20, 2):
+        result += term / n
+        term *= y * y
+    return 2 * result
+
+
+# 比べる関数: 名前 -> (変更前, numeric.py, numeric_np.py, 正解, 引数の範囲)
+def reference_sin(x):
+    return math.sin(math.radians(math.fmod(x, 360.0)))
+
+
+def reference_cos(x):
+    return math.cos(math.radians(math.fmod(x, 360.0)))
+
+
+CASES = [
+    ("sin  [-90, 90]", legacy_sin, numeric.sin_deg, "sin_deg", reference_sin, lambda r: r.uniform(-90, 90)),
+    ("sin  [0, 3600]", legacy_sin, numeric.sin_deg, "sin_deg", reference_sin, lambda r: r.uniform(0, 3600)),
+    ("cos  [0, 3600]", legacy_cos, numeric.cos_deg, "cos_deg", reference_cos, lambda r: r.uniform(0, 3600)),
+    ("ln   [0.5, 2]", legacy_ln, numeric.ln, "ln", math.log, lambda r: r.uniform(0.5, 2)),
+    ("ln   [1, 1e6]", legacy_ln, numeric.ln, "ln", math.log, lambda r: math.exp(r.uniform(0, 13.8))),
+    ("sqrt [1, 1e6]", legacy_sqrt, numeric.sqrt, "sqrt", math.sqrt, lambda r: math.exp(r.uniform(0, 13.8))),
+    ("sqrt [1, 1e12]", legacy_sqrt, numeric.sqrt, "sqrt", math.sqrt, lambda r: math.exp(r.uniform(0, 27.6))),
+]
+
+
+# math との差の最大値（相対誤差。正解が 0 に近いときは絶対誤差）
+def max_error(func, reference, xs):
+    worst = 0.0
+    for x in xs:
+        expected = reference(x)
+        worst = max(worst, abs(func(x) - expected) / max(abs(expected), 1.0))
+    return worst
+
+
+def per_call(func, xs):
+    t0 = time.perf_counter()
+    for x in xs:
+        func(x)
+    return (time.perf_counter() - t0) / len(xs) * 1e9
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'':16s} {'max error (legacy / new)':>28s} {'ns/call (legacy / new / numpy)':>36s}")
+    for name, legacy, new, np_name, reference, sample in CASES:
+        xs = [sample(rng) for _ in range(N)]
+        old_error = max_error(legacy, reference, xs)
+        new_error = max_error(new, reference, xs)
+        old_time = per_call(legacy, xs)
+        new_time = per_call(new, xs)
+        vector = "-"
+        if np is not None:
+            array = np.array(xs)
+            func = getattr(numeric_np, np_name)
+            t0 = time.perf_counter()
+            result = func(array)
+            vector = f"{(time.perf_counter() - t0) / N * 1e9:.1f}"
+            # 配列版も1要素ずつの計算と同じ値になる
+            assert np.array_equal(result, np.array([new(x) for x in xs]))
+        print(f"{name:16s} {old_error:13.1e} / {new_error:9.1e} {old_time:14.0f} / {new_time:5.0f} / {vector:>6s}")
@@ -0,0 +1,79 @@
+# 精度モード（precise.py）の sin / cos / tan / ln / √ と円周率について、桁数ごとの時間と1桁あたりの時間を計り、
+# 最後の桁まで正しいこと（桁数 + 20 桁で計算して丸めた値と同じこと）を確かめるベンチマーク
+#
+#   float:  numeric.py（倍精度）での時間。比べるための目安
+#   pi:     円周率を初めて求める時間（2回目からは覚えておいた値を使う）
+#
+# 実行方法: python benchmarks/bench_precise.py
+import os
+import random
+import sys
+import time
+from decimal import Decimal, localcontext
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import numeric
+import precise
+
+N = 200
+DIGITS = (10, 20, 50, 100, 200, 500, 1000)
+
+FUNCTIONS = {
+    "sin": (precise.sin_deg, numeric.sin_deg),
+    "cos": (precise.cos_deg, numeric.cos_deg),
+    "tan": (precise.tan_deg, numeric.tan_deg),
+    "ln": (precise.ln, numeric.ln),
+    "√": (precise.sqrt, numeric.sqrt),
+}
+
+
+def random_argument(rng, name):
+    if name in ("ln", "√"):
+        return rng.uniform(1e-3, 1e6)
+    # 90 度 + 180 度 × n 以外の角度（tan が計算できるように）
+    return rng.uniform(-720, 720)
+
+
+def timed(func, args):
+    t0 = time.perf_counter()
+    results = [func(x) for x in args]
+    return results, (time.perf_counter() - t0) / len(args)
+
+
+def calculate(func, args, digits):
+    with localcontext() as ctx:
+        ctx.prec = digits
+        return timed(func, args)
+
+
+# 桁数を 20 桁増やして計算し、digits 桁に丸めた値と同じか
+def check(func, args, results, digits):
+    reference, _ = calculate(func, args, digits + 20)
+    with localcontext() as ctx:
+        ctx.prec = digits
+        return sum(result != +expected for result, expected in zip(results, reference))
+
+
+def report(name, digits, elapsed, note=""):
+    print(f"{name:5s} {digits:6d} {elapsed * 1e6:10.1f} us {elapsed * 1e6 / digits:8.3f} us/digit  {note}")
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'':5s} {'digits':>6s} {'time':>13s} {'per digit':>17s}")
+    for name, (func, float_func) in FUNCTIONS.items():
+        floats = [random_argument(rng, name) for _ in range(N)]
+        args = [Decimal(repr(x)) for x in floats]
+        _, elapsed = timed(float_func, floats)
+        print(f"{name:5s} {'float':>6s} {elapsed * 1e6:10.1f} us")
+        for digits in DIGITS:
+            results, elapsed = calculate(func, args, digits)
+            wrong = check(func, args, results, digits)
+            report(name, digits, elapsed, f"{wrong} wrong" if wrong else "")
+        print()
+
+    for digits in DIGITS:
+        precise._pi_scaled.cache_clear()
+        _, elapsed = calculate(lambda _: precise.pi(), [None], digits)
+        report("pi", digits, elapsed)
@@ -1,7 +1,13 @@
+from decimal import Decimal, InvalidOperation, localcontext
+
 import flet as ft
 
-# 定数PI(円周率)を定義
-PI = 3.141592653589793
+import calc_core
+import expression
+from factorial import BACKGROUND_N, FactorialJob, FactorialWorker
+
+# 大きな x! を計算する別スレッド
+FACTORIALS = FactorialWorker()
 
 # 新しくCalcButtonクラスを定義
 class CalcButton(ft.ElevatedButton):
@@ -31,13 +37,33 @@ class ExtraActionButton(CalcButton):
         self.color = ft.Colors.BLACK
 
 class CalculatorApp(ft.Container):
-    # sin, cos, tan, In, √, x!, X^y をUNARY_OPSとして定義
-    UNARY_OPS = ("sin", "cos", "tan", "In", "√", "x!", "X^y")
+    # ボタンと、式（expression.py）の中での字句（計算の決まりは calc_core.py にまとめてある）
+    FUNCTION_KEYS = calc_core.FUNCTION_KEYS
+    BINARY_KEYS = calc_core.BINARY_KEYS
 
     def __init__(self):
         super().__init__()
         self.reset()
-
+        # 精度モードの桁数（None なら倍精度の float で計算する）
+        self.digits = None
+        # 最後に計算した式の (型, 数の値)。「=」を押し直したときに、最後の演算を繰り返すのに使う
+        self.last = None
+        # 別スレッドで計算中の x!（なければ None）
+        self.job = None
+
+        # 計算の精度。桁数を選ぶと、0.1 + 0.2 のような計算も10進数で正確に計算する
+        self.precision = ft.Dropdown(
+            value="float",
+            options=[ft.dropdown.Option(key="float", text="倍精度")]
+            + [ft.dropdown.Option(key=str(digits), text=f"{digits}桁") for digits in calc_core.PRECISIONS],
+            on_change=self.precision_changed,
+            width=120,
+            text_size=12,
+            dense=True,
+            color=ft.Colors.WHITE,
+        )
+        # 入力中の式
+        self.expression = ft.Text(value="", color=ft.Colors.WHITE54, size=14)
         self.result = ft.Text(value="0", color=ft.Colors.WHITE, size=20)
         self.width = 350
         self.bgcolor = ft.Colors.BLACK
@@ -45,6 +71,8 @@ class CalculatorApp(ft.Container):
         self.padding = 20
         self.content = ft.Column(
             controls=[
+                ft.Row(controls=[self.precision], alignment="start"),
+                ft.Row(controls=[self.expression], alignment="end"),
                 ft.Row(controls=[self.result], alignment="end"),
                 ft.Row(
                     controls=[
@@ -94,183 +122,246 @@ class CalculatorApp(ft.Container):
             ]
         )
 
-    def button_clicked(self, e, UNARY_OPS=UNARY_OPS):
+    # ボタンを押すたびに式（型と数の値）を組み立て、「=」で優先順位どおりに計算する
+    def button_clicked(self, e):
         data = e.control.data
         print(f"Button clicked with data = {data}")
+        # x! の計算中にボタンが押されたら、計算を取り消して 0 からやり直す
+        if self.job is not None:
+            self.cancel_factorial()
+
         if self.result.value == "Error" or data == "AC":
             self.result.value = "0"
+            self.expression.value = ""
             self.reset()
 
         elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
+            if self.operand_done():
+                # 関数を掛け終えた数のあとに数を入力したら、新しい式を始める
+                self.expression.value = ""
+                self.reset()
             if self.result.value == "0" or self.new_operand == True:
                 self.result.value = data
                 self.new_operand = False
             else:
                 self.result.value = self.result.value + data
 
-        elif data in ("+", "-", "*", "/"):
-            self.result.value = self.calculate(self.operand1, float(self.result.value), self.operator)
-            self.operator = data
-            if self.result.value == "Error":
-                self.operand1 = "0"
-            else:
-                self.operand1 = float(self.result.value)
+        elif data in self.BINARY_KEYS:
+            token = self.BINARY_KEYS[data]
+            if self.new_operand and self.template and self.template[-1] in expression.BINARY:
+                # 演算子を続けて押したら、後から押したほうにする
+                self.template[-1] = token
+            elif not self.new_operand or not self.template:
+                # 入力した数（式の始めなら表示中の結果）に続けて演算子を置く
+                self.push_operand()
+                self.template.append(token)
+            elif self.operand_done():
+                # 関数を掛け終えた数に続けて演算子を置く
+                self.template.append(token)
             self.new_operand = True
-
-        elif data in UNARY_OPS:
-            # 表示を先に変える
-            self.result.value = f"{data}"
-            self.operator = data
+            self.show_expression()
+
+        elif data in self.FUNCTION_KEYS:
+            token = self.FUNCTION_KEYS[data]
+            if self.operand_done():
+                # 関数を掛け終えた数に、さらに関数を掛ける（√ 5! のように外側に足す）
+                self.template.insert(self.operand_start(), token)
+            elif not self.new_operand:
+                # 入力した数に関数を掛ける（「5」「x!」で 5!）
+                self.template.append(token)
+                self.push_operand()
+            else:
+                # 数はこのあとに入力する。表示を先に変える
+                self.result.value = f"{data}"
+                self.template.append(token)
             self.new_operand = True
+            self.show_expression()
 
         elif data in ("="):
-            self.result.value = self.calculate(
-                self.operand1,
-                float(self.result.value),
-                self.operator
-            )
+            if not self.template and self.last is not None:
+                # 「=」を押し直したら、表示中の数に前の式の最後の演算を繰り返す（2 + 3 = = で 8）
+                repeat = self.repeat_last()
+                if repeat is not None:
+                    self.run(*repeat)
+            else:
+                if not self.operand_done():
+                    self.push_operand()
+                template, values = tuple(self.template), tuple(self.values)
+                self.run(template, values)
             self.reset()
 
-
         elif data in ("%"):
-            self.result.value = float(self.result.value) / 100
-            self.reset()
+            if self.digits is None:
+                self.result.value = float(self.result.value) / 100
+            else:
+                with self.decimal_context():
+                    self.result.value = calc_core.format_decimal(Decimal(str(self.result.value)) / 100)
+            self.new_operand = False
 
         elif data in ("+/-"):
             if float(self.result.value) > 0:
                 self.result.value = "-" + str(self.result.value)
 
             elif float(self.result.value) < 0:
-                self.result.value = str(self.format_number(abs(float(self.result.value))))
+                if self.digits is None:
+                    self.result.value = str(self.format_number(abs(float(self.result.value))))
+                else:
+                    # float にすると精度モードの桁が落ちるので、文字列の「-」を取る
+                    self.result.value = str(self.result.value)[1:]
 
 
         self.update()
 
-    def format_number(self, num):
-        # エラー文字列の場合はそのまま返す
-        if isinstance(num, str):
-            return num
-        # 小数点以下10桁で丸める
-        num = round(num, 10)
-        # 整数なら整数型で返す
-        if num % 1 == 0:
-            return int(num)
-        else:
-            return num
-        
-    # 平方根をニュートン法で計算
-    def sqrt(self, a):
-        if a < 0:
-            return "Error"
-
-        x = a
-        for _ in range(10):
-            x = (x + a / x) / 2
-        return x
-
-    # 三角関数と自然対数をテイラー展開で計算
-    # sinのテイラー展開
-    def sin(self, x):
-        x = x * PI / 180
-        result = 0
-        term = x
-        sign = 1
-
-        for n in range(1, 20, 2):
-            result += sign * term
-            term = term * x * x / ((n+1)*(n+2))
-            sign *= -1
-
-        return result
-    # cosのテイラー展開
-    def cos(self, x):
-        x = x * PI / 180
-        result = 1
-        term = 1
-        sign = -1
-
-        for n in range(2, 20, 2):
-            term = term * x * x / (n*(n-1))
-            result += sign * term
-            sign *= -1
-
-        return result
-    # tanはsin/cosで計算
-    def tan(self, x):
-        c = self.cos(x)
-        if c == 0:
-            return "Error"
-        return self.sin(x) / c
-    # lnのテイラー展開
-    def ln(self, x):
-        if x <= 0:
-            return "Error"
-
-        y = (x - 1) / (x + 1)
-        result = 0
-        term = y
-
-        for n in range(1, 20, 2):
-            result += term / n
-            term *= y * y
+    # 精度を選び直したら、計算中の x! を取り消す（入力中の式はそのまま、次の「=」から新しい精度で計算する）
+    def precision_changed(self, e):
+        if self.job is not None:
+            self.cancel_factorial()
+        self.digits = None if self.precision.value == "float" else int(self.precision.value)
+        if self.template:
+            self.show_expression()
+        self.update()
 
-        return 2 * result
-    
-    def factorial(self, n):
-        if n < 0:
+    def decimal_context(self):
+        return localcontext(calc_core.decimal_context(self.digits))
+
+    # 表示中の数を式に加える（関数のボタンを押したあとで数がまだないときは 0）
+    # 数は入力した10進数のまま持っておき、計算するときに精度に合わせて float か Decimal にする
+    def push_operand(self):
+        try:
+            value = Decimal(str(self.result.value))
+        except InvalidOperation:
+            value = Decimal(0)
+        self.template.append("#")
+        self.values.append(value)
+
+    # 式の最後が、関数を掛け終えた数（「5」「x!」のあとなど）になっているか
+    def operand_done(self):
+        return self.new_operand and self.template[-1:] == ["#"]
+
+    # 式の最後の数と、それに掛かっている関数が始まる位置
+    def operand_start(self):
+        start = len(self.template) - 1
+        while start > 0 and self.template[start - 1] in expression.FUNCTIONS:
+            start -= 1
+        return start
+
+    # 前の式の最後の二項演算子から後ろを、表示中の数に続けた (型, 数の値) を返す（二項演算子がなければ None）
+    def repeat_last(self):
+        template, values = self.last
+        depth = 0
+        for i in range(len(template) - 1, -1, -1):
+            token = template[i]
+            if token == ")":
+                depth += 1
+            elif token == "(":
+                depth -= 1
+            elif depth == 0 and token in expression.BINARY and i > 0 and template[i - 1] in ("#", ")", "!"):
+                tail = template[i:]
+                count = tail.count("#")
+                try:
+                    value = Decimal(str(self.result.value))
+                except InvalidOperation:
+                    return None
+                return ("#",) + tail, (value,) + (values[len(values) - count:] if count else ())
+        return None
+
+    def show_expression(self):
+        self.expression.value = expression.to_text(self.template, self.values, self.format_value)
+
+    # 式を計算して表示する。同じ型の式はコンパイル済みの関数を使い回す
+    def run(self, template, values):
+        try:
+            compiled = expression.compile_template(template, "float" if self.digits is None else "decimal")
+        except expression.ExpressionError:
+            self.result.value = "Error"
+            return
+        self.last = (template, values)
+        self.expression.value = expression.to_text(template, values, self.format_value) + " ="
+        if self.digits is None:
+            values = tuple(float(value) for value in values)
+        n = self.large_factorial(template, values)
+        if n is not None:
+            self.start_factorial(n, compiled, values)
+        else:
+            self.result.value = self.evaluate(compiled, values)
+
+    def evaluate(self, compiled, values):
+        if self.digits is not None:
+            with self.decimal_context():
+                try:
+                    return calc_core.format_decimal(compiled(values))
+                except expression.MATH_ERRORS:
+                    return "Error"
+        try:
+            return self.format_number(compiled(values))
+        except expression.MATH_ERRORS:
             return "Error"
 
-        if int(n) != n:
-            return "Error"   # 小数の階乗は扱わない
-
-        result = 1
-        n = int(n)
+    def format_number(self, num):
+        return calc_core.format_number(num)
+
+    # 式の中の数を表示用にする（倍精度なら計算と同じく float にしてから整える）
+    def format_value(self, value):
+        if self.digits is None:
+            return self.format_number(float(value))
+        with self.decimal_context():
+            return calc_core.format_decimal(value)
+
+    # 式の中で数を直接渡している x! のうち、別スレッドで計算する大きさの n（なければ None）
+    def large_factorial(self, template, values):
+        largest = None
+        slot = 0
+        for i, token in enumerate(template):
+            if token == "#":
+                slot += 1
+            elif token == "fact" and template[i + 1:i + 2] == ("#",) and values[slot] > BACKGROUND_N:
+                largest = max(largest or 0, values[slot])
+        return largest
+
+    # 大きな x! は別スレッドで先に計算して「計算中…」を表示し、終わったら（x! はメモにあるので）式をすぐ計算する
+    def start_factorial(self, n, compiled, values):
+        self.result.value = "計算中…"
+        self.job = FactorialJob(n)
+        FACTORIALS.submit(
+            self.job,
+            on_done=lambda job, value: self.show_factorial(job, compiled, values),
+            on_error=self.show_factorial_error,
+        )
 
-        for i in range(1, n + 1):
-            result *= i
+    # 計算したスレッドから呼ばれる。取り消したあとや、別の計算に替わったあとの結果は捨てる
+    def show_factorial(self, job, compiled, values):
+        if self.job is not job:
+            return
+        result = self.evaluate(compiled, values)
+        if self.job is not job:
+            return
+        self.job = None
+        self.result.value = result
+        self.update()
 
-        return result
+    def show_factorial_error(self, job, error):
+        if self.job is not job:
+            return
+        self.job = None
+        self.result.value = "Error"
+        self.update()
 
+    def cancel_factorial(self):
+        self.job.cancel()
+        self.job = None
+        self.result.value = "0"
+        self.expression.value = ""
+        self.reset()
 
+    # 1つの演算を計算する関数（operator はボタンの文字）。計算できないときは "Error"
     def calculate(self, operand1, operand2, operator):
-
-        if operator == "+":
-            return self.format_number(operand1 + operand2)
-
-        elif operator == "-":
-            return self.format_number(operand1 - operand2)
-
-        elif operator == "*":
-            return self.format_number(operand1 * operand2)
-
-        elif operator == "/":
-            if operand2 == 0:
-                return "Error"
-            else:
-                return self.format_number(operand1 / operand2)
-            
-        elif operator == "√":
-            return self.format_number(self.sqrt(operand2))
-
-        elif operator == "sin":
-            return self.format_number(self.sin(operand2))
-
-        elif operator == "cos":
-            return self.format_number(self.cos(operand2))
-
-        elif operator == "tan":
-            return self.format_number(self.tan(operand2))
-
-        elif operator == "In":
-            return self.format_number(self.ln(operand2))
-        
-        elif operator == "x!":
-            return self.format_number(self.factorial(operand2))
+        return calc_core.calculate(operand1, operand2, operator, self.digits)
 
 
     def reset(self):
-        self.operator = "+"
-        self.operand1 = 0
+        # 入力中の式の型と数の値
+        self.template = []
+        self.values = []
         self.new_operand = True
 
 
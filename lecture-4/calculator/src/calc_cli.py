@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+from decimal import Decimal, InvalidOperation
+
+from calc_core import CHUNK_SIZE, OPERATORS, calculate, calculate_many, chunked, evaluate_many
+
+# 画面を出さずに、標準入力の式を1行ずつ計算して標準出力に書き出すコマンド
+#
+# 使い方:
+#   echo "2 + 3 * 4" | python calc_cli.py           式を計算する（1行に1つ。結果も1行に1つ）
+#   python calc_cli.py --workers 4 < exprs.txt      4 プロセスで分けて計算する（0 なら CPU の数）
+#   python calc_cli.py --ops < ops.txt              1行に「演算 a b」または「演算 b」（例: "+ 2 3", "sin 30"）
+#                                                   numpy があれば、まとめて配列で計算する
+#   python calc_cli.py --digits 50 < exprs.txt      10進数で 50 桁まで正確に計算する（float の誤差が出ない）
+#
+# 結果は電卓と同じ（計算できない行・読めない行は "Error"）。入力と同じ順に出力する。
+
+
+# 「演算 a b」「演算 b」の行を (演算, a, b) にする関数（読めなければ None）
+# 10進数で計算するときは number_type を Decimal にする（0.1 が float の誤差を含まないように）
+def parse_operation(line, number_type=float):
+    parts = line.split()
+    if len(parts) == 2:
+        parts = [parts[0], "0", parts[1]]
+    if len(parts) != 3 or parts[0] not in OPERATORS:
+        return None
+    try:
+        return parts[0], number_type(parts[1]), number_type(parts[2])
+    except (ValueError, InvalidOperation):
+        return None
+
+
+def calculate_lines(lines, digits=None):
+    if digits is not None:
+        operations = [parse_operation(line, Decimal) for line in lines]
+        return ["Error" if op is None else calculate(op[1], op[2], op[0], digits) for op in operations]
+    operations = [parse_operation(line) for line in lines]
+    results = iter(calculate_many([op for op in operations if op is not None]))
+    return ["Error" if op is None else next(results) for op in operations]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="標準入力の式を1行ずつ計算して標準出力に書き出す")
+    parser.add_argument("--ops", action="store_true", help="1行に「演算 a b」の形式で読む（例: \"+ 2 3\", \"sin 30\"）")
+    parser.add_argument("--workers", type=int, default=1, help="式を計算するプロセスの数（0 なら CPU の数）")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="まとめて計算する行数")
+    parser.add_argument("--digits", type=int, help="10進数で計算するときの桁数（指定しなければ float で計算する）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.workers < 0:
+        build_parser().error("--workers must be 0 or more")
+    if args.chunk_size < 1:
+        build_parser().error("--chunk-size must be 1 or more")
+    if args.digits is not None and args.digits < 1:
+        build_parser().error("--digits must be 1 or more")
+
+    lines = (line.rstrip("\n") for line in sys.stdin)
+    out = sys.stdout
+    if args.ops:
+        for chunk in chunked(lines, args.chunk_size):
+            out.writelines(f"{result}\n" for result in calculate_lines(chunk, args.digits))
+    else:
+        workers = args.workers or os.cpu_count() or 1
+        out.writelines(f"{result}\n" for result in evaluate_many(lines, workers, args.chunk_size, args.digits))
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import MAX_EMAX, MIN_EMIN, Decimal, getcontext, localcontext
+from itertools import islice
+
+import display
+import expression
+
+try:
+    import numpy as np
+    import numeric_np
+except ImportError:
+    np = None
+
+# 電卓の計算部分（flet を使わない）
+#
+# CalculatorApp と同じ決まり（計算できないときは "Error"、結果は format_number で整える）で、
+# 画面を作らずに計算できる。バッチ処理や calc_cli.py から使う。
+#
+#   calculate(2, 3, "+")                    5
+#   calculate(0, -1, "√")                   "Error"（1つの数を受け取る演算は operand2 を使う）
+#   evaluate("2 + 3 * 4")                   14
+#   calculate_many([("+", 2, 3), ("sin", 0, 30)])    [5, 0.5]
+#   evaluate_many(["1 / 0", "2^10"])        ["Error", 1024]
+#
+# calculate_many は numpy があれば同じ演算ごとにまとめて配列で計算し（numeric_np.py）、
+# evaluate_many は件数が多ければプロセスプールで分けて計算する。どちらも1件ずつ計算したときと同じ結果を返す。
+#
+# digits を指定すると、float の代わりに10進数（decimal）で digits 桁まで正確に計算する（precise.py）。
+# 結果は digits 桁に丸めた文字列になる。
+#
+#   evaluate("0.1 + 0.2", digits=30)        "0.3"（float では 0.30000000000000004 になり、丸めて 0.3 にしている）
+#   evaluate("√2", digits=30)               "1.41421356237309504880168872421"
+#   calculate(1, 3, "/", digits=20)         "0.33333333333333333333"
+
+# 関数のボタン（押してから数を入力する）と、式（expression.py）の中での名前
+FUNCTION_KEYS = {"sin": "sin", "cos": "cos", "tan": "tan", "In": "ln", "√": "√", "x!": "fact"}
+# 二項演算子のボタンと、式の中での字句
+BINARY_KEYS = {"+": "+", "-": "-", "*": "*", "/": "/", "X^y": "^"}
+
+# 演算の名前 -> 式の中での字句（ボタンの文字のほか、式の中での名前もそのまま使える）
+OPERATORS = {**{op: op for op in expression.BINARY}, **{op: op for op in expression.FUNCTIONS},
+             **BINARY_KEYS, **FUNCTION_KEYS}
+
+# 精度モードで選べる桁数
+PRECISIONS = (20, 50, 100)
+
+# これより少ない件数はプロセスプールを使わずに計算する
+PARALLEL_MIN = 20_000
+# プロセスプールに1回で渡す件数
+CHUNK_SIZE = 5_000
+
+
+def format_number(num):
+    # エラー文字列の場合はそのまま返す
+    if isinstance(num, str):
+        return num
+    # 整数（x! の結果など）は丸めずに返す。表示しきれない桁数なら指数表記の文字列にする
+    if isinstance(num, int):
+        return display.format_int(num)
+    # 小数点以下10桁で丸める
+    num = round(num, 10)
+    # 整数なら整数型で返す
+    if num % 1 == 0:
+        return display.format_int(int(num))
+    else:
+        return num
+
+
+# 精度モードで計算するときの decimal のコンテキスト（x! のような大きな数も扱えるように、指数の範囲は最大にする）
+def decimal_context(digits):
+    context = getcontext().copy()
+    context.prec = digits
+    context.Emax = MAX_EMAX
+    context.Emin = MIN_EMIN
+    return context
+
+
+# 精度モードの結果を表示用の文字列にする関数（その時点の精度に丸めて、末尾の 0 を取る）
+def format_decimal(value):
+    if isinstance(value, str):
+        return value
+    value = +Decimal(value)
+    if value == 0:
+        return "0"
+    value = value.normalize()
+    # 精度の桁数に収まる大きさならふつうに、それ以外は指数表記で書く
+    if -getcontext().prec <= value.adjusted() < getcontext().prec:
+        return format(value, "f")
+    return format(value, "e")
+
+
+# 1つの演算を計算する関数（operator はボタンの文字か式の中での名前）。演算は expression.py の表から引く
+# 計算できないときは "Error"、知らない演算は KeyError。digits を指定すると10進数で計算する
+def calculate(operand1, operand2, operator, digits=None):
+    op = OPERATORS[operator]
+    if digits is not None:
+        return _calculate_decimal(operand1, operand2, op, digits)
+    try:
+        if op in expression.BINARY:
+            return format_number(expression.BINARY[op][2](operand1, operand2))
+        return format_number(expression.FUNCTIONS[op](operand2))
+    except expression.MATH_ERRORS:
+        return "Error"
+
+
+def _calculate_decimal(operand1, operand2, op, digits):
+    # float は 0.1 が 0.1000000000000000055... になるので、文字列を通して10進数にする
+    # int のまま渡すと 1 / 3 が float の割り算になるので、int と Decimal もそのまま Decimal にする
+    a, b = (Decimal(x) if isinstance(x, (Decimal, int)) else Decimal(str(x)) for x in (operand1, operand2))
+    with localcontext(decimal_context(digits)):
+        try:
+            if op in expression.DECIMAL_BINARY:
+                return format_decimal(expression.DECIMAL_BINARY[op](a, b))
+            return format_decimal(expression.DECIMAL_FUNCTIONS[op](b))
+        except expression.MATH_ERRORS:
+            return "Error"
+
+
+# 式の文字列を計算する関数。書き方の誤りも計算できない値も "Error"。digits を指定すると10進数で計算する
+def evaluate(text, digits=None):
+    if digits is not None:
+        with localcontext(decimal_context(digits)):
+            try:
+                return format_decimal(expression.evaluate(text, "decimal"))
+            except expression.MATH_ERRORS:
+                return "Error"
+    try:
+        return format_number(expression.evaluate(text))
+    except expression.MATH_ERRORS:
+        return "Error"
+
+
+# --- 配列でまとめて計算する版（numpy が必要） ---
+
+def _vector_binary(op, a, b):
+    if op == "+":
+        return a + b, None
+    if op == "-":
+        return a - b, None
+    if op == "*":
+        return a * b, None
+    error = b == 0
+    return a / np.where(error, 1.0, b), error
+
+
+def _vector_function(op, x):
+    if op == "neg":
+        return -x, None
+    # 角度が inf / NaN のとき、1件ずつなら範囲縮小（fmod / round）が ValueError になる
+    if op == "sin":
+        return numeric_np.sin_deg(x), ~np.isfinite(x)
+    if op == "cos":
+        return numeric_np.cos_deg(x), ~np.isfinite(x)
+    if op == "tan":
+        # 90 度 + 180 度 × n では NaN になる
+        result = numeric_np.tan_deg(x)
+        return result, ~np.isfinite(x) | np.isnan(result)
+    if op == "ln":
+        return numeric_np.ln(x), x <= 0
+    return numeric_np.sqrt(x), x < 0
+
+
+# 1件ずつ計算する演算
+# x! は結果が大きな整数になるので配列にできない。^ は np.power と math の pow とで最後の桁が違うことがある
+SCALAR_OPS = ("fact", "^")
+
+# rint(x * 1e10) / 1e10 で丸めてよい |x * 1e10| の上限（これ以上は整数が倍精度で正確に表せない）
+ROUND_LIMIT = 2.0 ** 52
+# |x| がこれ以上なら、隣の倍精度の数との間隔が 1e-10 より広いので、round(x, 10) は x のまま
+NO_ROUND = 2.0 ** 19
+# これより小さい整数は int64 を通して int にできる
+INT64_LIMIT = 2.0 ** 63
+# 倍精度で正確に表せる整数の上限。これを超える整数（と Decimal）は倍精度にすると値が変わるので、1件ずつ元の値で計算する
+# 整数どうしの演算は calculate では int のまま計算されるので、結果がこれを超えるときも1件ずつ計算する
+EXACT_INT = 2 ** 53
+
+
+# format_number を配列の全要素に行った結果のリストを返す関数（結果は format_number と同じ）
+#
+# round(x, 10) は「x の正確な値を小数点以下10桁に丸めた数に最も近い倍精度の数」を返す。
+# rint(x * 1e10) / 1e10 も、x * 1e10 の丸め誤差で rint の向きが変わらなければ同じ数になる
+# （割り算は正確に丸められるので）。誤差で向きが変わりうる、0.5 に近い端数の要素と、
+# 2**52 / 1e10 から NO_ROUND までの要素、int64 に収まらない整数だけ format_number で計算する。
+def format_numbers(values):
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        # 整数の値と大きな値は丸めても変わらない
+        whole = values == np.floor(values)
+        unchanged = whole | (np.abs(values) >= NO_ROUND)
+        scaled = values * 1e10
+        rounded = np.where(unchanged, values, np.rint(scaled) / 1e10)
+        tie = np.abs(scaled - np.floor(scaled) - 0.5) <= np.spacing(np.abs(scaled))
+    finite = np.isfinite(values)
+    slow = finite & ((~unchanged & ((np.abs(scaled) >= ROUND_LIMIT) | tie)) | (np.abs(values) >= INT64_LIMIT))
+    integral = finite & ~slow & (rounded == np.floor(rounded)) & (np.abs(rounded) < INT64_LIMIT)
+
+    results = np.where(finite, rounded, values).astype(object)
+    results[integral] = rounded[integral].astype(np.int64).astype(object)
+    results = results.tolist()
+    for i in np.flatnonzero(slow).tolist():
+        results[i] = format_number(float(values[i]))
+    return results
+
+
+# (演算, operand1, operand2) の列をまとめて計算して、結果のリストを返す関数（結果は calculate と同じ）
+# numpy があれば演算ごとに配列で計算し、なければ1件ずつ計算する
+def calculate_many(items):
+    items = items if isinstance(items, list) else list(items)
+    if np is None or not items:
+        return [calculate(a, b, op) for op, a, b in items]
+    ops, a, b = zip(*items)
+    return calculate_arrays(ops, a, b)
+
+
+# 数の列を倍精度の配列にする関数
+# (配列, 整数の要素か, 倍精度にすると値が変わる要素か) を返す（値が変わる要素は配列では 0 にしておく）
+def _as_float64(values):
+    # float だけの列（よくある場合）は、要素ごとに確かめずにそのまま配列にする
+    if (isinstance(values, np.ndarray) and values.dtype.kind == "f") or all(
+            issubclass(kind, (float, np.floating)) for kind in set(map(type, values))):
+        none = np.zeros(len(values), dtype=bool)
+        return np.asarray(values, dtype=np.float64), none, none
+    ints = np.array([isinstance(x, (int, np.integer)) for x in values], dtype=bool)
+    inexact = np.array([
+        not (-EXACT_INT <= x <= EXACT_INT) if is_int else not isinstance(x, (float, np.floating))
+        for x, is_int in zip(values, ints.tolist())
+    ], dtype=bool)
+    floats = np.array([0.0 if bad else x for x, bad in zip(values, inexact.tolist())], dtype=np.float64)
+    return floats, ints, inexact
+
+
+# 1件ずつ計算するときに渡す元の値（numpy の数は Python の数にする）
+def _item(values, i):
+    x = values[i]
+    return x.item() if isinstance(x, np.generic) else x
+
+
+# 演算・operand1・operand2 を別々の配列（またはリスト）で受け取る版
+def calculate_arrays(ops, a, b):
+    if np is None:
+        return [calculate(x, y, op) for op, x, y in zip(ops, a, b)]
+    codes = np.array([OPERATORS[op] for op in ops], dtype=object)
+    originals = [x if isinstance(x, (list, tuple, np.ndarray)) else list(x) for x in (a, b)]
+    (a, a_int, a_inexact), (b, b_int, b_inexact) = (_as_float64(x) for x in originals)
+    values = np.empty(len(codes))
+    errors = np.zeros(len(codes), dtype=bool)
+    scalar = a_inexact | b_inexact
+
+    for op in set(codes.tolist()):
+        mask = codes == op
+        if op in SCALAR_OPS:
+            scalar |= mask
+            continue
+        with np.errstate(all="ignore"):
+            if op in expression.BINARY:
+                result, error = _vector_binary(op, a[mask], b[mask])
+            else:
+                result, error = _vector_function(op, b[mask])
+        values[mask] = result
+        if error is not None:
+            errors[mask] = error
+
+    with np.errstate(invalid="ignore"):
+        scalar |= a_int & b_int & (np.abs(values) >= EXACT_INT)
+
+    results = format_numbers(values)
+    for i in np.flatnonzero(errors).tolist():
+        results[i] = "Error"
+    for i in np.flatnonzero(scalar).tolist():
+        results[i] = calculate(_item(originals[0], i), _item(originals[1], i), codes[i])
+    return results
+
+
+# --- 式の文字列をまとめて計算する版 ---
+
+def _evaluate_chunk(texts, digits=None):
+    return [evaluate(text, digits) for text in texts]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# 式の文字列の列をまとめて計算して、結果を順に返すジェネレータ
+# workers を指定する（または件数が PARALLEL_MIN 以上の）ときは、CHUNK_SIZE 件ずつプロセスプールで計算する
+# 同じ型の式のコンパイル結果はプロセスごとに覚えておくので、似た式が続くほど速い
+def evaluate_many(texts, workers=None, chunk_size=CHUNK_SIZE, digits=None):
+    if workers is None:
+        if not isinstance(texts, (list, tuple)) or len(texts) < PARALLEL_MIN:
+            workers = 1
+        else:
+            workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in chunked(texts, chunk_size):
+            yield from _evaluate_chunk(chunk, digits)
+        return
+    # 入力を全部読んでから渡すのではなく、計算中のかたまりを workers の2倍までにして順に出す（標準入力から流せるように）
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunked(texts, chunk_size):
+            pending.append(pool.submit(_evaluate_chunk, chunk, digits))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,41 @@
+from decimal import MAX_EMAX, Decimal, localcontext
+
+# 電卓の表示用に数を整える関数
+#
+# x! のような大きな整数は、str() で全桁を文字列にすると桁数の2乗に比例して時間がかかる
+# （Python 3.11 からは 4300 桁を超えると ValueError にもなる）。
+# 表示しきれない大きさの整数は、上位のビットだけから指数表記の文字列を作る。
+
+# これ以上の桁数の整数は指数表記にする
+MAX_DIGITS = 20
+# 指数表記の有効桁数
+SIGNIFICANT_DIGITS = 10
+# 指数表記を作るときに使う上位のビット数の最小値（有効桁数より十分に多くする）
+TOP_BITS = 128
+
+
+# 大きな整数を、上位のビットだけから digits 桁の Decimal にする関数（全桁を10進数に変換しない）
+def approximate(n, digits):
+    sign = -1 if n < 0 else 1
+    n = abs(n)
+    # 1桁は 3.33 ビットなので、digits 桁より十分に多いビットを残す
+    shift = max(n.bit_length() - max(TOP_BITS, digits * 4 + 32), 0)
+    with localcontext() as ctx:
+        ctx.prec = digits + 10
+        # 既定の指数の上限（999999）より大きい数もある（1000000! は 5565709 桁）
+        ctx.Emax = MAX_EMAX
+        return sign * (Decimal(n >> shift) * Decimal(2) ** shift)
+
+
+# 整数を「4.023872601e+2567」のような指数表記にする関数（全桁の文字列は作らない）
+def scientific(n, digits=SIGNIFICANT_DIGITS):
+    with localcontext() as ctx:
+        ctx.Emax = MAX_EMAX
+        return format(approximate(n, digits), f".{digits - 1}e")
+
+
+# 整数を表示用にする関数（収まる桁数ならそのまま、大きければ指数表記の文字列）
+def format_int(n):
+    if -10 ** MAX_DIGITS < n < 10 ** MAX_DIGITS:
+        return n
+    return scientific(n)
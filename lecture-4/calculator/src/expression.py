@@ -0,0 +1,307 @@
+import operator
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+import numeric
+import precise
+from factorial import factorial
+
+# 電卓の式（「2 + 3 * sin 30」「(1 + 2)^3」「5!」など）を計算する仕組み
+#
+#   1. tokenize: 文字列を字句に分ける。数はすべて "#" に置き換えた「型」（タプル）と、数の値のタプルに分ける
+#   2. parse: 型を Pratt 法で構文解析して、タプルの木（AST）にする（演算子の優先順位・右結合・括弧を扱う）
+#   3. compile_template: AST の各節を、演算子の表（BINARY / FUNCTIONS）から引いた関数を呼ぶクロージャにする
+#      （計算のたびに演算子の文字列を比べない。数を受け取る節は v[i] を直接読む）
+#
+# 型ごとにコンパイルした結果を覚えておくので、数だけが違う式（「=」を押し直して値を変えたときなど）は
+# 構文解析をせずに、コンパイル済みの関数に新しい値を渡すだけで計算できる。
+#
+#   template, values = tokenize("2 + 3 * 4")   # ("#", "+", "#", "*", "#"), (2.0, 3.0, 4.0)
+#   compile_template(template)(values)          # 14.0
+#   evaluate("2 + 3 * 4")                       # 上の2行と同じ
+#
+# 計算できない値（0 での割り算・ln(0)・負の数の平方根など）は ValueError / ArithmeticError
+# （ZeroDivisionError / OverflowError / decimal の例外）を送出する。
+# 式の書き方の誤りは ExpressionError（ValueError の一種）を送出する。
+#
+# mode="decimal" では、数を Decimal で読み、演算を precise.py の表から引く（精度はその時点の decimal のコンテキスト）。
+#
+#   template, values = tokenize("0.1 + 0.2", Decimal)
+#   compile_template(template, "decimal")(values)     # Decimal('0.3')
+
+# 覚えておく式の数
+CACHE_SIZE = 1024
+
+# 計算できないときに送出される例外（電卓はこれを "Error" と表示する）
+MATH_ERRORS = (ValueError, ArithmeticError)
+
+
+# 式の書き方の誤り
+class ExpressionError(ValueError):
+    pass
+
+
+def _power(a, b):
+    result = a ** b
+    # 負の数の小数乗は複素数になるので扱わない
+    if isinstance(result, complex):
+        raise ValueError("negative base with a fractional exponent")
+    return result
+
+
+# 二項演算子: 字句 -> (左の結合力, 右の結合力, 関数)
+# 右の結合力を左より小さくすると右結合になる（2^3^2 = 2^(3^2)）
+BINARY = {
+    "+": (10, 10, operator.add),
+    "-": (10, 10, operator.sub),
+    "*": (20, 20, operator.mul),
+    "/": (20, 20, operator.truediv),
+    "^": (40, 39, _power),
+}
+
+# 前置の関数: 名前 -> 関数（sin / cos / tan は度で受け取る）
+FUNCTIONS = {
+    "neg": operator.neg,
+    "sin": numeric.sin_deg,
+    "cos": numeric.cos_deg,
+    "tan": numeric.tan_deg,
+    "ln": numeric.ln,
+    "√": numeric.sqrt,
+    "sqrt": numeric.sqrt,
+    "fact": factorial,
+}
+
+# 10進数で計算するときの表（二項演算子: 字句 -> 関数 / 前置の関数: 名前 -> 関数）
+DECIMAL_BINARY = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": precise.power,
+}
+
+DECIMAL_FUNCTIONS = {
+    "neg": operator.neg,
+    "sin": precise.sin_deg,
+    "cos": precise.cos_deg,
+    "tan": precise.tan_deg,
+    "ln": precise.ln,
+    "√": precise.sqrt,
+    "sqrt": precise.sqrt,
+    "fact": precise.factorial,
+}
+
+# 計算の種類 -> (数の型, 二項演算子の表, 関数の表)
+MODES = {
+    "float": (float, {op: info[2] for op, info in BINARY.items()}, FUNCTIONS),
+    "decimal": (Decimal, DECIMAL_BINARY, DECIMAL_FUNCTIONS),
+}
+
+# 前置の「-」と関数の結合力（* / より強く、^ より弱い。-2^2 = -(2^2)、sin 2^3 = sin(2^3)）
+PREFIX_POWER = 30
+# 後置の「!」の結合力（どの演算子よりも強い）
+POSTFIX_POWER = 50
+
+# 書き方の別名
+ALIASES = {"×": "*", "÷": "/", "**": "^", "In": "ln"}
+
+TOKEN_RE = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z]+)|(\*\*|\S))")
+
+
+# 文字列を (型, 数の値) に分ける関数（数は number_type で読む）
+@lru_cache(maxsize=CACHE_SIZE)
+def tokenize(text, number_type=float):
+    template, values = [], []
+    # 空白以外の文字はどれかの字句になるので、findall で全体を読める
+    for number, name, symbol in TOKEN_RE.findall(text):
+        if number:
+            template.append("#")
+            values.append(number_type(number))
+        else:
+            token = name or symbol
+            template.append(ALIASES.get(token, token))
+    return tuple(template), tuple(values)
+
+
+class _Parser:
+    def __init__(self, template):
+        self.template = template
+        self.position = 0
+        self.slot = 0
+
+    def peek(self):
+        if self.position < len(self.template):
+            return self.template[self.position]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("unexpected end of expression")
+        self.position += 1
+        return token
+
+    # 結合力が power より強い演算子だけをまとめて、1つの節にする
+    def expression(self, power=0):
+        left = self.prefix(self.next())
+        while True:
+            token = self.peek()
+            if token == "!":
+                if POSTFIX_POWER <= power:
+                    break
+                self.position += 1
+                left = ("fact", left)
+                continue
+            info = BINARY.get(token)
+            if info is None or info[0] <= power:
+                break
+            self.position += 1
+            left = (token, left, self.expression(info[1]))
+        return left
+
+    def prefix(self, token):
+        if token == "#":
+            self.slot += 1
+            return ("#", self.slot - 1)
+        if token == "(":
+            node = self.expression()
+            if self.next() != ")":
+                raise ExpressionError("missing )")
+            return node
+        if token == "-":
+            return ("neg", self.expression(PREFIX_POWER))
+        if token == "+":
+            return self.expression(PREFIX_POWER)
+        if token in FUNCTIONS and token != "neg":
+            return (token, self.expression(PREFIX_POWER))
+        raise ExpressionError(f"unexpected {token!r}")
+
+
+# 型を AST にする関数
+# 節は ("#", 値の番号) / (二項演算子, 左, 右) / (関数名, 引数) のタプル
+def parse(template):
+    parser = _Parser(template)
+    try:
+        node = parser.expression()
+    except RecursionError:
+        raise ExpressionError("expression is too deeply nested") from None
+    if parser.peek() is not None:
+        raise ExpressionError(f"unexpected {parser.peek()!r}")
+    return node
+
+
+def _compile(node, binary, functions):
+    op = node[0]
+    if op == "#":
+        i = node[1]
+        return lambda v: v[i]
+    if len(node) == 2:
+        func, arg = functions[op], node[1]
+        if arg[0] == "#":
+            i = arg[1]
+            return lambda v: func(v[i])
+        inner = _compile(arg, binary, functions)
+        return lambda v: func(inner(v))
+    func, left, right = binary[op], node[1], node[2]
+    if left[0] == "#" and right[0] == "#":
+        i, j = left[1], right[1]
+        return lambda v: func(v[i], v[j])
+    if left[0] == "#":
+        i, right = left[1], _compile(right, binary, functions)
+        return lambda v: func(v[i], right(v))
+    left = _compile(left, binary, functions)
+    if right[0] == "#":
+        j = right[1]
+        return lambda v: func(left(v), v[j])
+    right = _compile(right, binary, functions)
+    return lambda v: func(left(v), right(v))
+
+
+# 型をコンパイルして、数の値のタプルを受け取って計算する関数を返す（型と計算の種類ごとに覚えておく）
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_template(template, mode="float"):
+    node = parse(template)
+    _, binary, functions = MODES[mode]
+    try:
+        return _compile(node, binary, functions)
+    except RecursionError:
+        raise ExpressionError("expression is too deeply nested") from None
+
+
+def evaluate(text, mode="float"):
+    template, values = tokenize(text, MODES[mode][0])
+    return compile_template(template, mode)(values)
+
+
+# 式を表示するときの字句（電卓のボタンの文字に戻す）
+LABELS = {"ln": "In", "sqrt": "√", "neg": "-", "fact": "x!"}
+
+
+# template[i] から始まる数1つ（前置の関数・括弧・後ろの「!」と「^」を含む。構文解析の prefix と同じ範囲）を表示する文字列にする
+# fact は後置の「!」にする（数が1つでなければ括弧で囲む）。入力の途中で数が終わっていなければ None を返す
+# (文字列, 次の位置, 次の数の番号, 括弧なしで「!」を付けられるか) を返す
+def _operand_text(template, i, slot, values, format_value):
+    if i >= len(template):
+        return None
+    token = template[i]
+    if token in FUNCTIONS or token in ("-", "+"):
+        inner = _operand_text(template, i + 1, slot, values, format_value)
+        if inner is None:
+            return None
+        text, i, slot, simple = inner
+        if token == "fact":
+            return (f"{text}!" if simple else f"({text})!"), i, slot, True
+        label = LABELS.get(token, token)
+        return (f"{label}{text}" if label in ("-", "+") else f"{label} {text}"), i, slot, False
+
+    if token == "#":
+        text, i, slot = str(format_value(values[slot])), i + 1, slot + 1
+    elif token == "(":
+        text, i, slot = _sequence_text(template, i + 1, slot, values, format_value, ")")
+        if i >= len(template):
+            return None
+        text, i = f"({text})", i + 1
+    else:
+        return None
+    simple = True
+    while i < len(template) and template[i] == "!":
+        text, i = text + "!", i + 1
+    if i < len(template) and template[i] == "^":
+        right = _operand_text(template, i + 1, slot, values, format_value)
+        if right is None:
+            return None
+        text, i, slot, simple = f"{text} ^ {right[0]}", right[1], right[2], False
+    return text, i, slot, simple
+
+
+# template[i] から stop（なければ最後）までを表示する文字列にする。(文字列, 次の位置, 次の数の番号) を返す
+def _sequence_text(template, i, slot, values, format_value, stop=None):
+    words = []
+    operand = True
+    while i < len(template) and template[i] != stop:
+        if not operand:
+            words.append(template[i])
+            i += 1
+            operand = True
+            continue
+        result = _operand_text(template, i, slot, values, format_value)
+        if result is None:
+            # 入力の途中で終わっている数は、字句をそのまま（ボタンの文字にして）並べる
+            for token in template[i:]:
+                if token == "#":
+                    words.append(str(format_value(values[slot])))
+                    slot += 1
+                else:
+                    words.append(LABELS.get(token, token))
+            return " ".join(words), len(template), slot
+        text, i, slot, _ = result
+        words.append(text)
+        operand = False
+    return " ".join(words), i, slot
+
+
+# 型と数の値を、電卓に表示する式の文字列にする関数（「fact #」は「5!」、「ln」は「In」のようにボタンの文字で表示する）
+def to_text(template, values, format_value=str):
+    text, _, _ = _sequence_text(template, 0, 0, values, format_value)
+    return text.replace("( ", "(").replace(" )", ")")
@@ -0,0 +1,194 @@
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# x! の計算
+#
+# n! = (n // 2)!**2 × swing(n) （Luschny の prime swing）
+#   swing(n) = n! / ((n // 2)!)**2 は、n 以下の素数 p のべき乗の積になる（指数は n を p 進で見たときの桁から求まる）
+#   多数の因数の積は二分割（binary splitting）でまとめて、大きな数どうしの掛け算の回数を減らす
+# 1 から n まで順に掛けるより掛け算の回数も大きさも小さく、途中で cancel を確かめられる。
+#
+# 計算した結果は FactorialCache（大きさに上限のあるLRU）に覚えておき、同じ n や n // 2 のときに使い回す。
+# 大きな n は FactorialWorker で別スレッドに回し、画面の処理を止めないようにする。
+
+# これより小さい n は順に掛ける
+SMALL_N = 20
+# メモに残す結果の合計の大きさ（ビット）
+CACHE_BITS = 64 * 1024 * 1024
+# これより大きい n は別スレッドで計算する（電卓から使うとき）
+BACKGROUND_N = 2000
+# 計算する n の上限（これより大きいと結果が数百 MB になり、メモリと時間が足りない）
+MAX_N = 1_000_000
+
+
+# 計算が途中で取り消されたときに送出する例外
+class Cancelled(Exception):
+    pass
+
+
+def _check(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+
+# n 以下の素数のリスト（エラトステネスのふるい）
+def primes_up_to(n):
+    if n < 2:
+        return []
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(n) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, n + 1, p)))
+    return [p for p in range(n + 1) if sieve[p]]
+
+
+# values[lo:hi] の積を二分割で求める関数
+def _product(values, lo, hi, cancel):
+    if hi - lo <= 8:
+        result = 1
+        for i in range(lo, hi):
+            result *= values[i]
+        return result
+    _check(cancel)
+    mid = (lo + hi) // 2
+    return _product(values, lo, mid, cancel) * _product(values, mid, hi, cancel)
+
+
+# swing(n) = n! / ((n // 2)!)**2 を素因数から求める関数
+def _swing(n, primes, cancel):
+    factors = []
+    root = math.isqrt(n)
+    for p in primes:
+        if p > n:
+            break
+        if p <= root:
+            # 指数は n // p**k（k = 1, 2, ...）のうち奇数のものの数
+            q, power = n, 1
+            while q:
+                q //= p
+                if q & 1:
+                    power *= p
+            if power > 1:
+                factors.append(power)
+        elif (n // p) & 1:
+            factors.append(p)
+    return _product(factors, 0, len(factors), cancel)
+
+
+# 結果を覚えておくLRU（合計の大きさに上限がある）
+class FactorialCache:
+    def __init__(self, max_bits=CACHE_BITS):
+        self.max_bits = max_bits
+        self.entries = OrderedDict()
+        self.bits = 0
+        self.lock = threading.Lock()
+
+    def get(self, n):
+        with self.lock:
+            value = self.entries.get(n)
+            if value is not None:
+                self.entries.move_to_end(n)
+            return value
+
+    def put(self, n, value):
+        size = value.bit_length()
+        if size > self.max_bits:
+            return
+        with self.lock:
+            if n in self.entries:
+                return
+            self.entries[n] = value
+            self.bits += size
+            while self.bits > self.max_bits:
+                _, old = self.entries.popitem(last=False)
+                self.bits -= old.bit_length()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bits = 0
+
+
+CACHE = FactorialCache()
+
+
+def _factorial(n, primes, cache, cancel):
+    if n < SMALL_N:
+        return math.prod(range(2, n + 1))
+    cached = cache.get(n) if cache is not None else None
+    if cached is not None:
+        return cached
+    half = _factorial(n // 2, primes, cache, cancel)
+    _check(cancel)
+    result = half * half * _swing(n, primes, cancel)
+    if cache is not None:
+        cache.put(n, result)
+    return result
+
+
+# n! を返す関数
+# n が負の数や整数でないときは ValueError、MAX_N より大きいときは OverflowError、
+# cancel（threading.Event）が立てられたら Cancelled を送出する
+def factorial(n, cancel=None, cache=CACHE):
+    if n > MAX_N:
+        raise OverflowError(f"factorial is limited to n <= {MAX_N}")
+    if n != int(n) or n < 0:
+        raise ValueError("factorial is defined for non-negative integers")
+    n = int(n)
+    if n < SMALL_N:
+        return math.prod(range(2, n + 1))
+    cached = cache.get(n) if cache is not None else None
+    if cached is not None:
+        return cached
+    return _factorial(n, primes_up_to(n), cache, cancel)
+
+
+# 取り消しのできる、別スレッドでの計算1件
+class FactorialJob:
+    def __init__(self, n):
+        self.n = n
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+# 大きな n! を別スレッドで計算する仕組み（同時に計算するのは1件だけ）
+class FactorialWorker:
+    def __init__(self, cache=CACHE):
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="factorial")
+
+    # FactorialJob(n) の計算を始める（計算が先に終わることもあるので、job は呼ぶ側で先に作って覚えておく）
+    # 終わったら計算したスレッドで on_done(job, 結果) が呼ばれる（取り消されたときは呼ばれない）
+    # 計算中の例外（ValueError など）は on_error(job, 例外) に渡す
+    def submit(self, job, on_done, on_error=None):
+        def run():
+            try:
+                result = factorial(job.n, job.cancel_event, self.cache)
+            except Cancelled:
+                return
+            except Exception as e:
+                if on_error is not None:
+                    on_error(job, e)
+                return
+            if not job.cancelled():
+                on_done(job, result)
+
+        job.future = self.executor.submit(run)
+        return job
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
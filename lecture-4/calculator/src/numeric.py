@@ -0,0 +1,152 @@
+import math
+
+# 電卓で使う関数（sin / cos / tan は度で受け取る）の計算
+#
+# どの関数も、まず引数を小さな範囲に縮めて（範囲縮小）から多項式で近似する。
+#   sin / cos / tan: 360 で割った余りにして、さらに 90 度ごとの象限に折りたたみ、[-45, 45] 度にする
+#   ln / sqrt: x = m * 2**e に分けて、仮数 m だけを計算する
+# 縮めたあとの範囲では、少ない項数の最良近似多項式（minimax、係数は fdlibm と同じ）で倍精度いっぱいの精度が出る。
+# 項数は引数の大きさによらず一定なので、sin(3600) も sin(1) と同じ時間で計算できる。
+
+PI = 3.141592653589793
+DEG_TO_RAD = PI / 180
+
+# sin の多項式（[-π/4, π/4] で sin(x) ≈ x + x**3 * S(x**2)）
+S1 = -1.66666666666666324348e-01
+S2 = 8.33333333332248946124e-03
+S3 = -1.98412698298579493134e-04
+S4 = 2.75573137070700676789e-06
+S5 = -2.50507602534068634195e-08
+S6 = 1.58969099521155010221e-10
+
+# cos の多項式（[-π/4, π/4] で cos(x) ≈ 1 - x**2 / 2 + x**4 * C(x**2)）
+C1 = 4.16666666666666019037e-02
+C2 = -1.38888888888741095749e-03
+C3 = 2.48015872894767294178e-05
+C4 = -2.75573143513906633035e-07
+C5 = 2.08757232129817482790e-09
+C6 = -1.13596475577881948265e-11
+
+# ln の多項式（log(1 + f) = f - f**2 / 2 + s * (f**2 / 2 + R(s**2))、s = f / (2 + f)）
+LG1 = 6.666666666666735130e-01
+LG2 = 3.999999999940941908e-01
+LG3 = 2.857142874366239149e-01
+LG4 = 2.222219843214978396e-01
+LG5 = 1.818357216161805012e-01
+LG6 = 1.531383769920937332e-01
+LG7 = 1.479819860511658591e-01
+# ln(2) を上位と下位に分けたもの（e * LN2_HI は丸め誤差なしで計算できる）
+LN2_HI = 6.93147180369123816490e-01
+LN2_LO = 1.90821492927058770002e-10
+SQRT_HALF = 0.7071067811865476
+
+# これより小さい角度（ラジアン）では sin(x) = x、cos(x) = 1 が倍精度で正確になるので、多項式を計算しない
+TINY = 2.0 ** -27
+
+
+# [-π/4, π/4] の x について sin(x) を求める関数
+def _sin_kernel(x):
+    if -TINY < x < TINY:
+        return x
+    z = x * x
+    return x + x * z * (S1 + z * (S2 + z * (S3 + z * (S4 + z * (S5 + z * S6)))))
+
+
+# [-π/4, π/4] の x について cos(x) を求める関数
+def _cos_kernel(x):
+    if -TINY < x < TINY:
+        return 1.0
+    z = x * x
+    return 1.0 - 0.5 * z + z * z * (C1 + z * (C2 + z * (C3 + z * (C4 + z * (C5 + z * C6)))))
+
+
+# 角度（度）を (象限, [-45, 45] 度をラジアンにした値) に分ける関数
+# fmod は余りを誤差なしで求めるので、3600 度や 1e10 度でも精度が落ちない
+def reduce_degrees(x):
+    r = math.fmod(x, 360.0)
+    q = round(r / 90.0)
+    return q % 4, (r - 90.0 * q) * DEG_TO_RAD
+
+
+def sin_deg(x):
+    q, t = reduce_degrees(x)
+    if q == 0:
+        return _sin_kernel(t)
+    if q == 1:
+        return _cos_kernel(t)
+    if q == 2:
+        return -_sin_kernel(t)
+    return -_cos_kernel(t)
+
+
+def cos_deg(x):
+    q, t = reduce_degrees(x)
+    if q == 0:
+        return _cos_kernel(t)
+    if q == 1:
+        return -_sin_kernel(t)
+    if q == 2:
+        return -_cos_kernel(t)
+    return _sin_kernel(t)
+
+
+# tan（度）。90 度 + 180 度 × n では cos がちょうど 0 になるので ZeroDivisionError を送出する
+def tan_deg(x):
+    q, t = reduce_degrees(x)
+    s, c = _sin_kernel(t), _cos_kernel(t)
+    if q % 2:
+        s, c = c, -s
+    if c == 0:
+        raise ZeroDivisionError("tan is undefined at 90 + 180n degrees")
+    return s / c
+
+
+# 自然対数。x <= 0 では ValueError を送出する
+def ln(x):
+    if x <= 0:
+        raise ValueError("ln is defined for x > 0")
+    if math.isinf(x):
+        return x
+    m, e = math.frexp(x)
+    # 仮数を [√2/2, √2) に寄せて、f = m - 1 を 0 の近くにする
+    if m < SQRT_HALF:
+        m *= 2.0
+        e -= 1
+    f = m - 1.0
+    if f == 0.0:
+        return e * LN2_HI + e * LN2_LO
+    s = f / (2.0 + f)
+    z = s * s
+    w = z * z
+    # 偶数次と奇数次に分けて計算する（fdlibm と同じ）
+    t1 = w * (LG2 + w * (LG4 + w * LG6))
+    t2 = z * (LG1 + w * (LG3 + w * (LG5 + w * LG7)))
+    r = t2 + t1
+    hfsq = 0.5 * f * f
+    return e * LN2_HI - ((hfsq - (s * (hfsq + r) + e * LN2_LO)) - f)
+
+
+# 平方根の初期値に使う、[0.5, 2) での √m の1次近似（誤差は 3% 以内）
+SQRT_A = 0.4853
+SQRT_B = 0.48525
+
+
+# 平方根。仮数の √ をニュートン法で求め、指数は半分にする
+# 初期値の誤差が 3% 以内なので、4 回で倍精度いっぱいまで収束する（回数は引数によらない）
+# x < 0 では ValueError を送出する
+def sqrt(x):
+    if x < 0:
+        raise ValueError("sqrt is defined for x >= 0")
+    if x == 0 or math.isinf(x):
+        return x
+    m, e = math.frexp(x)
+    # 指数を偶数にする（m は [0.5, 2) に入る）
+    if e & 1:
+        m *= 2.0
+        e -= 1
+    y = SQRT_A * m + SQRT_B
+    y = 0.5 * (y + m / y)
+    y = 0.5 * (y + m / y)
+    y = 0.5 * (y + m / y)
+    y = 0.5 * (y + m / y)
+    return math.ldexp(y, e >> 1)
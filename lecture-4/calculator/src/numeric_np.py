@@ -0,0 +1,80 @@
+import numpy as np
+
+from numeric import (
+    C1, C2, C3, C4, C5, C6, DEG_TO_RAD, LG1, LG2, LG3, LG4, LG5, LG6, LG7, LN2_HI, LN2_LO,
+    S1, S2, S3, S4, S5, S6, SQRT_A, SQRT_B, SQRT_HALF,
+)
+
+# numeric.py と同じ計算を NumPy の配列にまとめて行う版（numpy が必要）
+# 範囲縮小と多項式は numeric.py と同じ。分岐の代わりに np.where / np.choose で象限を選ぶ。
+# 定義されない値（ln(0)・sqrt(-1)・tan(90) など）は例外の代わりに NaN を返す。
+
+
+def _sin_kernel(x):
+    z = x * x
+    return x + x * z * (S1 + z * (S2 + z * (S3 + z * (S4 + z * (S5 + z * S6)))))
+
+
+def _cos_kernel(x):
+    z = x * x
+    return 1.0 - 0.5 * z + z * z * (C1 + z * (C2 + z * (C3 + z * (C4 + z * (C5 + z * C6)))))
+
+
+def reduce_degrees(x):
+    r = np.fmod(np.asarray(x, dtype=np.float64), 360.0)
+    q = np.rint(r / 90.0)
+    return q.astype(np.int64) % 4, (r - 90.0 * q) * DEG_TO_RAD
+
+
+def sin_deg(x):
+    q, t = reduce_degrees(x)
+    s, c = _sin_kernel(t), _cos_kernel(t)
+    return np.choose(q, (s, c, -s, -c))
+
+
+def cos_deg(x):
+    q, t = reduce_degrees(x)
+    s, c = _sin_kernel(t), _cos_kernel(t)
+    return np.choose(q, (c, -s, -c, s))
+
+
+def tan_deg(x):
+    q, t = reduce_degrees(x)
+    s, c = _sin_kernel(t), _cos_kernel(t)
+    odd = q % 2 == 1
+    num = np.where(odd, c, s)
+    den = np.where(odd, -s, c)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den == 0, np.nan, num / den)
+
+
+def ln(x):
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m, e = np.frexp(x)
+        small = m < SQRT_HALF
+        m = np.where(small, m * 2.0, m)
+        e = (e - small).astype(np.float64)
+        f = m - 1.0
+        s = f / (2.0 + f)
+        z = s * s
+        w = z * z
+        r = z * (LG1 + w * (LG3 + w * (LG5 + w * LG7))) + w * (LG2 + w * (LG4 + w * LG6))
+        hfsq = 0.5 * f * f
+        result = e * LN2_HI - ((hfsq - (s * (hfsq + r) + e * LN2_LO)) - f)
+    return np.where(x > 0, np.where(np.isinf(x), x, result), np.nan)
+
+
+def sqrt(x):
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m, e = np.frexp(x)
+        odd = e % 2 == 1
+        m = np.where(odd, m * 2.0, m)
+        e = e - odd
+        y = SQRT_A * m + SQRT_B
+        # 初期値の誤差は 3% 以内なので、4 回で倍精度いっぱいまで収束する
+        for _ in range(4):
+            y = 0.5 * (y + m / y)
+        result = np.ldexp(y, e // 2)
+    return np.where(x > 0, np.where(np.isinf(x), x, result), np.where(x == 0, x, np.nan))
@@ -0,0 +1,179 @@
+from decimal import Decimal, getcontext, localcontext
+from functools import lru_cache
+
+from display import approximate
+from factorial import factorial as int_factorial
+
+# 10進数（decimal）で、指定した桁数まで正確に計算する関数（電卓の精度モードで使う）
+#
+# どの関数も、その時点の decimal のコンテキストの精度（getcontext().prec 桁）で結果を返す。
+# 内部では GUARD_DIGITS 桁多く計算してから丸めるので、最後の桁まで正しい（sqrt / ln は正しく丸めた値）。
+#
+#   with localcontext() as ctx:
+#       ctx.prec = 50
+#       sin_deg(Decimal(30))       Decimal('0.5')
+#       sqrt(Decimal(2))           Decimal('1.4142135623730950488016887242096980785696718753769')
+#
+#   sin / cos: 角度（度）は 10進数のまま 360 の余りと 90 度ごとの象限に分けて（誤差なし）[0, 45] 度にし、
+#              テイラー級数の項が精度より小さくなったところで足すのをやめる（項の数は桁数に比例する）
+#   sqrt / ln: Decimal.sqrt / Decimal.ln（どちらも精度に合わせて計算し、正しく丸める）
+#   円周率:    Machin の公式を整数の固定小数点で計算し、桁数ごとに覚えておく
+#   x!:        factorial.py の整数の結果を、精度の桁数だけ Decimal にする
+#
+# 計算できない値は numeric.py と同じく ValueError / ZeroDivisionError を送出する。
+
+# 内部で余分に持つ桁数
+GUARD_DIGITS = 5
+
+
+# atan(1 / n) * scale（scale は 10 のべき乗の整数）
+def _arctan_inv(n, scale):
+    term = scale // n
+    total = term
+    n2 = n * n
+    k = 3
+    sign = -1
+    while term:
+        term //= n2
+        total += sign * (term // k)
+        sign = -sign
+        k += 2
+    return total
+
+
+# 円周率 * 10**(digits + 10) の整数（末尾の 10 桁は切り捨ての誤差を吸収するため）
+@lru_cache(maxsize=16)
+def _pi_scaled(digits):
+    scale = 10 ** (digits + 10)
+    return 4 * (4 * _arctan_inv(5, scale) - _arctan_inv(239, scale))
+
+
+def pi():
+    digits = getcontext().prec
+    return +Decimal(_pi_scaled(digits)).scaleb(-(digits + 10))
+
+
+# 項が和の最後の桁より小さくなるまで足す（x は [-π/4, π/4]）
+def _sin_series(x):
+    prec = getcontext().prec
+    x2 = -x * x
+    term = total = x
+    n = 1
+    while term and term.adjusted() >= total.adjusted() - prec:
+        term = term * x2 / ((n + 1) * (n + 2))
+        total += term
+        n += 2
+    return total
+
+
+def _cos_series(x):
+    prec = getcontext().prec
+    x2 = -x * x
+    term = total = Decimal(1)
+    n = 0
+    while term and term.adjusted() >= total.adjusted() - prec:
+        term = term * x2 / ((n + 1) * (n + 2))
+        total += term
+        n += 2
+    return total
+
+
+def _radians(degrees):
+    return degrees * pi() / 180
+
+
+# [0, 90) 度の t について sin / cos を求める（45 度より大きければ 90 - t の cos / sin にする）
+def _sin_reduced(t):
+    if t <= 45:
+        return _sin_series(_radians(t))
+    return _cos_series(_radians(90 - t))
+
+
+def _cos_reduced(t):
+    if t <= 45:
+        return _cos_series(_radians(t))
+    return _sin_series(_radians(90 - t))
+
+
+# 角度（度）を (象限, [0, 90) 度) に分ける関数（10進数のまま計算するので誤差がない）
+# inf / NaN は ValueError
+def reduce_degrees(x):
+    x = Decimal(x)
+    if not x.is_finite():
+        raise ValueError("angle must be finite")
+    # 余りは正確に求める（商の整数部分がすべて入る精度にする）
+    with localcontext() as ctx:
+        ctx.prec = max(ctx.prec, x.adjusted() + 5)
+        r = x % 360
+        if r < 0:
+            r += 360
+        q = int(r // 90)
+        return q, r - 90 * q
+
+
+def sin_deg(x):
+    with localcontext() as ctx:
+        ctx.prec += GUARD_DIGITS
+        q, t = reduce_degrees(x)
+        value = _sin_reduced(t) if q % 2 == 0 else _cos_reduced(t)
+        if q >= 2:
+            value = -value
+    return +value
+
+
+def cos_deg(x):
+    with localcontext() as ctx:
+        ctx.prec += GUARD_DIGITS
+        q, t = reduce_degrees(x)
+        value = _cos_reduced(t) if q % 2 == 0 else _sin_reduced(t)
+        if q in (1, 2):
+            value = -value
+    return +value
+
+
+# tan（度）。90 度 + 180 度 × n では ZeroDivisionError を送出する
+def tan_deg(x):
+    with localcontext() as ctx:
+        ctx.prec += GUARD_DIGITS
+        q, t = reduce_degrees(x)
+        if q % 2 == 0:
+            value = _sin_reduced(t) / _cos_reduced(t) if t else Decimal(0)
+        elif t == 0:
+            raise ZeroDivisionError("tan is undefined at 90 + 180n degrees")
+        else:
+            value = -_cos_reduced(t) / _sin_reduced(t)
+    return +value
+
+
+# 自然対数。x <= 0 では ValueError を送出する
+def ln(x):
+    x = Decimal(x)
+    if x <= 0:
+        raise ValueError("ln is defined for x > 0")
+    return x.ln()
+
+
+# 平方根。x < 0 では ValueError を送出する
+def sqrt(x):
+    x = Decimal(x)
+    if x < 0:
+        raise ValueError("sqrt is defined for x >= 0")
+    return x.sqrt()
+
+
+# べき乗。負の数の小数乗は ValueError
+def power(a, b):
+    a, b = Decimal(a), Decimal(b)
+    if a < 0 and b != b.to_integral_value():
+        raise ValueError("negative base with a fractional exponent")
+    return a ** b
+
+
+# n!（精度の桁数に収まらない大きさなら、上位の桁だけを Decimal にする。全桁を10進数に変換すると遅い）
+def factorial(n):
+    value = int_factorial(n)
+    prec = getcontext().prec
+    # 2**(3 * prec) < 10**prec なので、これ以下のビット数なら全桁が精度に収まる
+    if value.bit_length() <= 3 * prec:
+        return Decimal(value)
+    return +approximate(value, prec + GUARD_DIGITS)
@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+import pytest
+
+import calc_core
+
+ITEMS = [
+    ("+", 2, 3),
+    ("/", 1, 0),
+    ("sin", 0, 30),
+    ("√", 0, -1),
+    ("x!", 0, 25),
+    # 整数の結果が 2**53 を超えても、1件ずつ計算したときと同じ int になる
+    ("X^y", 3, 37),
+    ("+", 2 ** 53 - 1, 2 ** 53 - 1),
+    ("-", 10 ** 30, 1),
+    ("+", Decimal("0.1"), Decimal("0.2")),
+    ("+", 0.1, 0.2),
+    ("X^y", 2.0, 0.5),
+]
+
+
+def calculate_all(items):
+    return [calc_core.calculate(a, b, op) for op, a, b in items]
+
+
+def test_calculate():
+    assert calculate_all(ITEMS)[:4] == [5, "Error", 0.5, "Error"]
+    assert calc_core.calculate(3, 37, "X^y") == 3 ** 37
+
+
+@pytest.mark.skipif(calc_core.np is None, reason="numpy is not installed")
+def test_calculate_many_matches_calculate():
+    assert calc_core.calculate_many(ITEMS) == calculate_all(ITEMS)
+    ops, a, b = zip(*ITEMS)
+    assert calc_core.calculate_arrays(ops, a, b) == calculate_all(ITEMS)
@@ -0,0 +1,75 @@
+import pytest
+
+import calc_core
+import expression
+
+
+@pytest.mark.parametrize("text, value", [
+    ("2 + 3 * 4", 14),
+    ("(2 + 3) * 4", 20),
+    ("10 - 4 - 3", 3),
+    ("8 / 4 / 2", 1),
+    # ^ は右結合で、前置の「-」や関数より強い
+    ("2^3^2", 512),
+    ("-2^2", -4),
+    ("2 * -3", -6),
+    ("sin 2^3", expression.FUNCTIONS["sin"](8.0)),
+    ("√16 + 1", 5),
+    # 後置の「!」はどの演算子よりも強い
+    ("3!", 6),
+    ("3!^2", 36),
+    ("2 + 3!", 8),
+    # ボタンの文字や別名も使える
+    ("5 ÷ 2 × 4", 10),
+    ("2 ** 3", 8),
+    ("In 1", 0),
+])
+def test_precedence(text, value):
+    assert expression.evaluate(text) == value
+
+
+def test_template_is_compiled_once_for_different_values():
+    template, values = expression.tokenize("2 + 3 * 4")
+    assert template == ("#", "+", "#", "*", "#")
+    compiled = expression.compile_template(template)
+    assert compiled(values) == 14
+    assert compiled((1.0, 1.0, 1.0)) == 2
+    assert expression.compile_template(template) is compiled
+
+
+@pytest.mark.parametrize("text", ["2 +", "(1 + 2", "1 + 2)", "1 +* 2", "foo 3", "", "2 3"])
+def test_syntax_errors(text):
+    with pytest.raises(expression.ExpressionError):
+        expression.evaluate(text)
+    assert calc_core.evaluate(text) == "Error"
+
+
+@pytest.mark.parametrize("text", ["1 / 0", "In 0", "√ -1", "(-8)^(1/3)", "tan 90", "(-1)!"])
+def test_math_errors(text):
+    with pytest.raises(expression.MATH_ERRORS):
+        expression.evaluate(text)
+    assert calc_core.evaluate(text) == "Error"
+
+
+
+# 電卓の型（x! は前置の "fact"）を、ボタンの文字で表示する
+@pytest.mark.parametrize("template, values, text", [
+    (("fact", "#"), (5,), "5!"),
+    (("#", "+", "fact", "#"), (2, 5), "2 + 5!"),
+    (("ln", "#"), (1,), "In 1"),
+    (("√", "fact", "#"), (3,), "√ 3!"),
+    # fact は ^ より弱いので、数が1つでなければ括弧で囲む
+    (("fact", "#", "^", "#"), (3, 2), "(3 ^ 2)!"),
+    (("fact", "sin", "#"), (90,), "(sin 90)!"),
+    (("#", "^", "fact", "#"), (2, 3), "2 ^ 3!"),
+])
+def test_to_text_uses_key_labels(template, values, text):
+    assert expression.to_text(template, values) == text
+    # 表示した式を計算し直しても同じ値になる
+    assert expression.evaluate(text) == expression.compile_template(template)(tuple(map(float, values)))
+
+
+def test_to_text_while_typing():
+    assert expression.to_text(("#", "+", "fact"), (2,)) == "2 + x!"
+    assert expression.to_text(("fact", "#", "^"), (5,)) == "x! 5 ^"
+    assert expression.to_text(*expression.tokenize("sin (1 + 2")) == "sin (1.0 + 2.0"
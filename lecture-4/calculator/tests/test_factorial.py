@@ -0,0 +1,106 @@
+import math
+import threading
+
+import pytest
+
+from factorial import Cancelled, FactorialCache, FactorialJob, FactorialWorker, factorial, primes_up_to
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 19, 20, 21, 63, 64, 100, 997, 1000, 4099, 20000])
+def test_factorial_matches_math(n):
+    assert factorial(n, cache=None) == math.factorial(n)
+
+
+def test_factorial_with_cache_reuses_results():
+    cache = FactorialCache()
+    assert factorial(5000, cache=cache) == math.factorial(5000)
+    # 5000 // 2 などの途中の結果も覚えている
+    assert cache.get(2500) == math.factorial(2500)
+    assert factorial(2500, cache=cache) is cache.get(2500)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = FactorialCache(max_bits=math.factorial(100).bit_length() * 2)
+    for n in (100, 101, 102):
+        cache.put(n, math.factorial(n))
+    assert cache.get(100) is None
+    assert cache.get(102) == math.factorial(102)
+    assert cache.bits <= cache.max_bits
+
+
+def test_factorial_errors():
+    assert factorial(5.0) == 120
+    with pytest.raises(ValueError):
+        factorial(-1)
+    with pytest.raises(ValueError):
+        factorial(2.5)
+    with pytest.raises(OverflowError):
+        factorial(10 ** 7)
+
+
+def test_primes_up_to():
+    assert primes_up_to(1) == []
+    assert primes_up_to(30) == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+
+
+def test_cancelled_before_start():
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(Cancelled):
+        factorial(50000, cancel, cache=None)
+
+
+# 途中の結果を1つ覚えたところで取り消す（計算の途中で取り消されたときの確認）
+class CancellingCache(FactorialCache):
+    def __init__(self, cancel):
+        super().__init__()
+        self.cancel = cancel
+
+    def put(self, n, value):
+        super().put(n, value)
+        self.cancel.set()
+
+
+def test_cancelled_while_computing():
+    cancel = threading.Event()
+    cache = CancellingCache(cancel)
+    with pytest.raises(Cancelled):
+        factorial(50000, cancel, cache)
+    # 取り消されるまでに計算した途中の結果は正しい
+    assert all(value == math.factorial(n) for n, value in cache.entries.items())
+    assert 50000 not in cache.entries
+
+
+def test_worker_returns_result():
+    worker = FactorialWorker(FactorialCache())
+    results = []
+    job = worker.submit(FactorialJob(3000), lambda job, value: results.append(value))
+    job.future.result(timeout=30)
+    worker.shutdown()
+    assert results == [math.factorial(3000)]
+
+
+def test_worker_does_not_report_cancelled_job():
+    worker = FactorialWorker(FactorialCache())
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    # 1件目で実行スレッドを止めておき、そのあいだに2件目を取り消す
+    worker.executor.submit(lambda: (started.set(), release.wait(10)))
+    started.wait(10)
+    job = worker.submit(FactorialJob(200000), lambda job, value: calls.append(value), lambda job, e: calls.append(e))
+    job.cancel()
+    release.set()
+    worker.executor.shutdown(wait=True)
+
+    assert job.cancelled()
+    assert calls == []
+
+
+def test_worker_reports_errors():
+    worker = FactorialWorker(FactorialCache())
+    errors = []
+    job = worker.submit(FactorialJob(-3), lambda job, value: None, lambda job, e: errors.append(e))
+    job.future.result(timeout=10)
+    worker.shutdown()
+    assert isinstance(errors[0], ValueError)
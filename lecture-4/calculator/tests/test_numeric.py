@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+import numeric
+
+# numeric_np.py は numpy があるときだけ比べる（numpy は任意の依存）
+try:
+    import numpy as np
+    import numeric_np
+except ImportError:
+    np = None
+
+ANGLES = [0, 1, 30, 45, 60, 89.9, 90, 135, 180, 270, 359, -30, -720.5, 3600 + 30, 1e10 + 30, 0.001]
+POSITIVE = [1e-300, 1e-5, 0.5, 0.7071, 1, 1.5, 2, math.e, 10, 12345.678, 1e300]
+
+
+# math.sin などとの比較（math には度を法 360 で縮めてから渡す。大きな角度でも比べられるように）
+def reference(func, x):
+    return func(math.radians(math.fmod(x, 360.0)))
+
+
+@pytest.mark.parametrize("x", ANGLES)
+def test_trig_matches_math(x):
+    assert numeric.sin_deg(x) == pytest.approx(reference(math.sin, x), rel=1e-14, abs=1e-15)
+    assert numeric.cos_deg(x) == pytest.approx(reference(math.cos, x), rel=1e-14, abs=1e-15)
+    if math.fmod(x, 180.0) != 90:
+        assert numeric.tan_deg(x) == pytest.approx(reference(math.tan, x), rel=1e-13, abs=1e-15)
+
+
+def test_trig_exact_at_quadrants():
+    assert [numeric.sin_deg(x) for x in (0, 90, 180, 270, 3600)] == [0, 1, 0, -1, 0]
+    assert numeric.cos_deg(60) == pytest.approx(0.5, abs=1e-16)
+    with pytest.raises(ZeroDivisionError):
+        numeric.tan_deg(90)
+    with pytest.raises(ZeroDivisionError):
+        numeric.tan_deg(-270)
+
+
+@pytest.mark.parametrize("x", POSITIVE)
+def test_ln_and_sqrt_match_math(x):
+    assert numeric.ln(x) == pytest.approx(math.log(x), rel=1e-15, abs=1e-16)
+    assert numeric.sqrt(x) == pytest.approx(math.sqrt(x), rel=1e-15)
+
+
+def test_ln_and_sqrt_domain():
+    assert numeric.sqrt(0) == 0
+    assert numeric.sqrt(144) == 12
+    assert numeric.ln(1) == 0
+    assert numeric.ln(math.inf) == math.inf
+    with pytest.raises(ValueError):
+        numeric.ln(0)
+    with pytest.raises(ValueError):
+        numeric.sqrt(-1)
+
+
+# 配列版は、定義される値では numeric.py と同じ値、定義されない値では NaN になる
+@pytest.mark.skipif(np is None, reason="numpy is not installed")
+@pytest.mark.parametrize("name, values", [
+    ("sin_deg", ANGLES), ("cos_deg", ANGLES), ("tan_deg", ANGLES),
+    ("ln", POSITIVE + [0, -1]), ("sqrt", POSITIVE + [0, -1]),
+])
+def test_numpy_version_matches_scalar(name, values):
+    expected = []
+    for x in values:
+        try:
+            expected.append(getattr(numeric, name)(x))
+        except (ValueError, ZeroDivisionError):
+            expected.append(math.nan)
+    np.testing.assert_allclose(getattr(numeric_np, name)(values), expected, rtol=1e-15, atol=1e-16)
@@ -0,0 +1,34 @@
+from decimal import Decimal, localcontext
+
+import pytest
+
+import calc_core
+import expression
+
+
+def test_decimal_expression():
+    template, values = expression.tokenize("0.1 + 0.2", Decimal)
+    with localcontext() as ctx:
+        ctx.prec = 30
+        assert expression.compile_template(template, "decimal")(values) == Decimal("0.3")
+    assert calc_core.evaluate("0.1 + 0.2", digits=30) == "0.3"
+    assert calc_core.evaluate("1 / 3", digits=20) == "0.33333333333333333333"
+
+
+# int・float・Decimal のどれを渡しても、10進数で計算する
+@pytest.mark.parametrize("a, b", [(1, 3), (Decimal(1), Decimal(3)), (1.0, 3.0), (1, Decimal(3))])
+def test_calculate_converts_every_operand(a, b):
+    assert calc_core.calculate(a, b, "/", digits=20) == "0.33333333333333333333"
+
+
+def test_calculate_with_int_operands():
+    assert calc_core.calculate(0.1, 0.2, "+", digits=30) == "0.3"
+    assert calc_core.calculate(2, 100, "X^y", digits=40) == str(2 ** 100)
+    assert calc_core.calculate(10 ** 30, 1, "+", digits=40) == str(10 ** 30 + 1)
+    assert calc_core.calculate(0, 25, "x!", digits=30) == "15511210043330985984000000"
+    assert calc_core.calculate(1, 0, "/", digits=20) == "Error"
+
+
+@pytest.mark.parametrize("text", ["1 / 0", "In 0", "√ -1", "(-8)^(1/3)", "tan 90", "(-1)!"])
+def test_math_errors(text):
+    assert calc_core.evaluate(text, digits=30) == "Error"
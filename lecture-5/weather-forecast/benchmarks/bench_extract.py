@@ -0,0 +1,77 @@
+# json.loads + forecast_fields（木をたどる）と、extract_fields（必要な配列だけを読む）の速度を比較するベンチマーク
+#
+# 実行方法: python benchmarks/bench_extract.py [予報の本文を保存したディレクトリ]
+#   ディレクトリを指定しなければ、アプリの HTTP キャッシュ（storage/http_cache）の *.body を使う
+#   予報が1つも見つからなければ、府県予報区ごとにダミーデータ（forecast_samples.py）を作って使う
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from forecast_extract import extract_fields, forecast_fields
+from forecast_samples import synthetic_payloads
+from http_cache import CACHE_DIR
+
+REPEAT = 200
+
+
+# 保存済みの本文を読み込む関数（予報以外のJSONは除く）
+def load_recorded(directory):
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.body")) + glob.glob(os.path.join(directory, "*.json"))):
+        with open(path, "rb") as f:
+            body = f.read()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            continue
+        if isinstance(data, list) and data and isinstance(data[0], dict) and "timeSeries" in data[0]:
+            payloads.append(body)
+    return payloads
+
+
+def legacy(body):
+    return forecast_fields(json.loads(body))
+
+
+def bench(name, func, payloads):
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        for body in payloads:
+            func(body)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    for body in payloads:
+        func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_payload = elapsed / (REPEAT * len(payloads)) * 1e6
+    print(f"{name:24s} {per_payload:8.1f} us/payload  peak {peak / 1024:7.1f} KB")
+    return elapsed
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else CACHE_DIR
+    payloads = load_recorded(source)
+    if not payloads and len(sys.argv) == 1:
+        payloads = synthetic_payloads()
+        source = "synthetic"
+    if not payloads:
+        sys.exit("no forecast payloads found")
+
+    # 同じ結果になることを先に確かめる
+    for body in payloads:
+        assert extract_fields(body) == legacy(body)
+
+    size = sum(len(body) for body in payloads) / len(payloads)
+    print(f"{len(payloads)} payloads ({source}), {size / 1024:.1f} KB on average")
+    old = bench("json.loads + find_*", legacy, payloads)
+    new = bench("extract_fields", extract_fields, payloads)
+    print(f"speedup: {old / new:.1f}x")
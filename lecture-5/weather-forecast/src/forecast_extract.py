@@ -0,0 +1,128 @@
+import json
+import re
+
+# 予報JSONから必要な値（日付・天気コード・気温）だけを取り出す処理
+#
+# json.loads は天気の文章・風・波・降水確率・地域名など、使わない部分まで
+# すべて dict / list / str に組み立ててしまう。
+# extract_fields は本文（bytes）全体は文字列にデコードせず、bytes のままキーの位置を探して、
+# その直後の値の配列（日付・天気コード・気温の短い文字列の並び）の部分だけをデコードして読む。
+# 形が想定と違うとき（キーが足りない・配列が読めない）は、本文全体を json.loads して木をたどる方法に切り替える。
+
+# キー（本文の中でそのまま探す）
+TIME_SERIES = b'"timeSeries"'
+TIME_DEFINES = b'"timeDefines"'
+WEATHER_CODES = b'"weatherCodes"'
+TEMPS = b'"temps"'
+TEMPS_MIN = b'"tempsMin"'
+TEMPS_MAX = b'"tempsMax"'
+# キーの直後に続く値の配列（中に [ ] を含まないもの）
+ARRAY_RE = re.compile(rb'\s*:\s*(\[[^\[\]]*\])')
+
+_DECODER = json.JSONDecoder()
+
+
+def _to_int(values):
+    return [int(t) if t not in ("", None) else None for t in values]
+
+
+# 今日の気温（最小・最大）を天気予報データから探す関数
+def find_today_temps(forecast):
+    for ts in forecast[0]["timeSeries"]:
+        for area in ts.get("areas", []):
+            if "temps" in area:
+                temps = [int(t) for t in area["temps"] if t not in ("", None)]
+                if temps:
+                    return min(temps), max(temps)
+    return None, None
+
+
+# 気温時系列データを探す関数
+def find_temp_timeseries(forecast):
+    for ts in forecast[1]["timeSeries"]:
+        for area in ts.get("areas", []):
+            if "tempsMin" in area and "tempsMax" in area:
+                return ts
+    return None
+
+
+# 読み込み済みの予報JSONから
+# (日付, 天気コード, 最低気温, 最高気温, 今日の最低気温, 今日の最高気温) を取り出す関数
+# 予報が提供されていない地域は None を返す
+def forecast_fields(forecast):
+    if not forecast or "timeSeries" not in forecast[0]:
+        return None
+
+    weather_ts = forecast[1]["timeSeries"][0]
+    temp_ts = find_temp_timeseries(forecast)
+
+    temps_min, temps_max = [], []
+    if temp_ts:
+        area = temp_ts["areas"][0]
+        temps_min = _to_int(area.get("tempsMin", []))
+        temps_max = _to_int(area.get("tempsMax", []))
+
+    today_min, today_max = find_today_temps(forecast)
+    return weather_ts["timeDefines"], weather_ts["areas"][0]["weatherCodes"], temps_min, temps_max, today_min, today_max
+
+
+# pos 以降（end より前）で最初に見つかったキーの配列を読み取る関数
+# キーが見つからなければ (None, pos) を返し、キーはあるのに配列として読めなければ ValueError を送出する
+def _array_after(payload, key, pos, end):
+    start = payload.find(key, pos, end)
+    if start < 0:
+        return None, pos
+    m = ARRAY_RE.match(payload, start + len(key))
+    if m is None:
+        raise ValueError(f"unexpected value at {start}")
+    # 文字列の中の ] で切れた配列は読めずにエラーになるので、読めた値は本当の配列と同じになる
+    value, _ = _DECODER.raw_decode(m.group(1).decode("utf-8"))
+    return value, m.end()
+
+
+# 予報の本文（bytes）から forecast_fields と同じ値を取り出す関数
+def extract_fields(payload):
+    try:
+        fields = _extract_fields(payload)
+    except ValueError:
+        fields = None
+    return fields if fields is not None else forecast_fields(json.loads(payload))
+
+
+# 本文から値を読み取る関数（読み取れなければ None）
+def _extract_fields(payload):
+    # "timeSeries" はちょうど2回（今日〜明後日の予報と、週間予報）出てくるはず
+    if payload.count(TIME_SERIES) != 2:
+        return None
+    first = payload.find(TIME_SERIES)
+    second = payload.find(TIME_SERIES, first + len(TIME_SERIES))
+    size = len(payload)
+
+    # --- 週間予報の1つ目の時系列：日付と天気コード ---
+    dates, pos = _array_after(payload, TIME_DEFINES, second, size)
+    next_ts = payload.find(TIME_DEFINES, pos)
+    codes, pos = _array_after(payload, WEATHER_CODES, pos, next_ts if next_ts >= 0 else size)
+    if dates is None or codes is None:
+        return None
+
+    # --- 週間予報の気温（最初に tempsMin と tempsMax を持つ地域） ---
+    temps_min, temps_max = [], []
+    raw_min, pos = _array_after(payload, TEMPS_MIN, pos, size)
+    if raw_min is not None:
+        raw_max, _ = _array_after(payload, TEMPS_MAX, pos, size)
+        if raw_max is not None:
+            temps_min, temps_max = _to_int(raw_min), _to_int(raw_max)
+
+    today_min, today_max = _find_today_temps(payload, first, second)
+    return dates, codes, temps_min, temps_max, today_min, today_max
+
+
+# 今日の気温（今日〜明後日の予報の中で最初に値がある "temps"）を本文から探す関数
+def _find_today_temps(payload, pos, end):
+    while True:
+        raw, pos = _array_after(payload, TEMPS, pos, end)
+        if raw is None:
+            return None, None
+        temps = [int(t) for t in raw if t not in ("", None)]
+        if temps:
+            return min(temps), max(temps)
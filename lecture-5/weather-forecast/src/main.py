@@ -1,13 +1,22 @@
 import flet as ft
-import requests
 from datetime import datetime
 
+from http_cache import HttpCache, get_json
+from prefetch import NO_FORECAST, ForecastPrefetcher
+
 # エンドポイントURL
 AREA_URL = "https://www.jma.go.jp/bosai/common/const/area.json"
 FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/{}.json"
 
+# HTTPキャッシュ（更新がなければダウンロードしない）
+# 保存先はアプリの storage/ の下で、ディレクトリは最初に保存するときに作る（import しただけでは何も作らない）
+HTTP_CACHE = HttpCache()
+
 # エンドポイントから地域データを取得
-AREA_JSON = requests.get(AREA_URL).json()
+AREA_JSON = get_json(AREA_URL, HTTP_CACHE)
+
+# 天気予報の先読み（地方を選んだ時点で、その地方の都道府県をまとめて取得しておく）
+PREFETCHER = ForecastPrefetcher(FORECAST_URL, HTTP_CACHE)
 
 # 天気説明文からアイコンを抽出する関数
 def weather_icons(text: str):
@@ -62,14 +71,6 @@ weatherDescription = {
     '100':'晴','101':'晴時々曇','102':'晴一時雨','103':'晴時々雨','104':'晴一時雪','105':'晴時々雪','106':'晴一時雨か雪','107':'晴時々雨か雪','108':'晴一時雨か雷雨','110':'晴後時々曇','111':'晴後曇','112':'晴後一時雨','113':'晴後時々雨','114':'晴後雨','115':'晴後一時雪','116':'晴後時々雪','117':'晴後雪','118':'晴後雨か雪','119':'晴後雨か雷雨','120':'晴朝夕一時雨','121':'晴朝の内一時雨','122':'晴夕方一時雨','123':'晴山沿い雷雨','124':'晴山沿い雪','125':'晴午後は雷雨','126':'晴昼頃から雨','127':'晴夕方から雨','128':'晴夜は雨','130':'朝の内霧後晴','131':'晴明け方霧','132':'晴朝夕曇','140':'晴時々雨で雷を伴う','160':'晴一時雪か雨','170':'晴時々雪か雨','181':'晴後雪か雨','200':'曇','201':'曇時々晴','202':'曇一時雨','203':'曇時々雨','204':'曇一時雪','205':'曇時々雪','206':'曇一時雨か雪','207':'曇時々雨か雪','208':'曇一時雨か雷雨','209':'霧','210':'曇後時々晴','211':'曇後晴','212':'曇後一時雨','213':'曇後時々雨','214':'曇後雨','215':'曇後一時雪','216':'曇後時々雪','217':'曇後雪','218':'曇後雨か雪','219':'曇後雨か雷雨','220':'曇朝夕一時雨','221':'曇朝の内一時雨','222':'曇夕方一時雨','223':'曇日中時々晴','224':'曇昼頃から雨','225':'曇夕方から雨','226':'曇夜は雨','228':'曇昼頃から雪','229':'曇夕方から雪','230':'曇夜は雪','231':'曇海上海岸は霧か霧雨','240':'曇時々雨で雷を伴う','250':'曇時々雪で雷を伴う','260':'曇一時雪か雨','270':'曇時々雪か雨','281':'曇後雪か雨','300':'雨','301':'雨時々晴','302':'雨時々止む','303':'雨時々雪','304':'雨か雪','306':'大雨','308':'雨で暴風を伴う','309':'雨一時雪','311':'雨後晴','313':'雨後曇','314':'雨後時々雪','315':'雨後雪','316':'雨か雪後晴','317':'雨か雪後曇','320':'朝の内雨後晴','321':'朝の内雨後曇','322':'雨朝晩一時雪','323':'雨昼頃から晴','324':'雨夕方から晴','325':'雨夜は晴','326':'雨夕方から雪','327':'雨夜は雪','328':'雨一時強く降る','329':'雨一時みぞれ','340':'雪か雨','350':'雨で雷を伴う','361':'雪か雨後晴','371':'雪か雨後曇','400':'雪','401':'雪時々晴','402':'雪時々止む','403':'雪時々雨','405':'大雪','406':'風雪強い','407':'暴風雪','409':'雪一時雨','411':'雪後晴','413':'雪後曇','414':'雪後雨','420':'朝の内雪後晴','421':'朝の内雪後曇','422':'雪昼頃から雨','423':'雪夕方から雨','425':'雪一時強く降る','426':'雪後みぞれ','427':'雪一時みぞれ','450':'雪で雷を伴う'
 }
 
-# 気温時系列データを探す関数
-def find_temp_timeseries(forecast):
-    for ts in forecast[1]["timeSeries"]:
-        for area in ts.get("areas", []):
-            if "tempsMin" in area and "tempsMax" in area:
-                return ts
-    return None
-
 # コントロールをボックス化する関数
 def boxed(control):
     return ft.Container(padding=5, border_radius=12, bgcolor=ft.Colors.WHITE, content=control)
@@ -150,21 +151,15 @@ def main(page: ft.Page):
         office_dd.disabled = False
         weather_column.controls.clear()
         page.update()
+        # 選ばれた地方の都道府県を裏でまとめて取得しておく
+        PREFETCHER.prefetch([option.key for option in office_dd.options])
 
-    # ② 都道府県 → 天気取得 のときの処理
-    def on_office_change(e):
-        office_code = e.control.value
+    # 予報から取り出した値（forecast_extract.extract_fields）で7日分のカードを作って表示する関数
+    # 予報が提供されていない地域（NO_FORECAST）や取得できなかったとき（None）はメッセージを出す
+    def render_forecast(office_code, fields):
         weather_column.controls.clear()
 
-        try:
-            forecast = requests.get(
-                FORECAST_URL.format(office_code)
-            ).json()
-
-            if not forecast or "timeSeries" not in forecast[0]:
-                raise ValueError("この地域の予報は提供されていません")
-
-        except Exception:
+        if fields is None or fields is NO_FORECAST:
             weather_column.controls.append(
                 ft.Text(
                     "この地域の天気予報は現在取得できません\n"
@@ -178,18 +173,12 @@ def main(page: ft.Page):
         office_name = AREA_JSON["offices"][office_code]["name"]
         weather_column.controls.append(ft.Text(f"{office_name} の７日間天気予報", size=22, weight="bold"))
 
-        weather_ts = forecast[1]["timeSeries"][0]
-        temp_ts = find_temp_timeseries(forecast)
-        dates = weather_ts["timeDefines"]
-        codes = weather_ts["areas"][0]["weatherCodes"]
+        dates, codes, temps_min, temps_max, _, _ = fields
         page.bgcolor = bgcolor_from_weather_code(codes[0])
 
         weathers = [weatherDescription.get(code, "不明") for code in codes]
-        temps_min, temps_max = [], []
-        if temp_ts:
-            area = temp_ts["areas"][0]
-            temps_min = [int(t) if t not in ("", None) else "-" for t in area.get("tempsMin", [])]
-            temps_max = [int(t) if t not in ("", None) else "-" for t in area.get("tempsMax", [])]
+        temps_min = ["-" if t is None else t for t in temps_min]
+        temps_max = ["-" if t is None else t for t in temps_max]
 
         # 7日分のデータをリスト化
         days = []
@@ -222,6 +211,35 @@ def main(page: ft.Page):
         weather_column.controls.append(weather_layout)
         page.update()
 
+    # ② 都道府県 → 天気取得 のときの処理
+    # 先読み済みならすぐに表示し、古ければ裏で取り直して、内容が変わっていたら描き直す
+    def on_office_change(e):
+        office_code = e.control.value
+        cached = PREFETCHER.peek(office_code)
+        if cached is not None:
+            render_forecast(office_code, cached)
+        else:
+            weather_column.controls.clear()
+            weather_column.controls.append(ft.Text("読み込み中…", color=ft.Colors.GREY_600))
+            page.update()
+
+        future = PREFETCHER.refresh(office_code)
+        if future is None:
+            return
+
+        def on_done(f):
+            # 取得中に別の都道府県が選ばれていたら何もしない
+            if office_dd.value != office_code:
+                return
+            if f.exception() is not None:
+                if cached is None:
+                    render_forecast(office_code, None)
+                return
+            if f.result() != cached:
+                render_forecast(office_code, f.result())
+
+        future.add_done_callback(on_done)
+
     center_dd.on_change = on_center_change
     office_dd.on_change = on_office_change
 
@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from forecast_extract import extract_fields
+from http_cache import get_body
+
+# 同時に実行するリクエスト数の上限
+MAX_WORKERS = 6
+# この秒数以内に取得したものは新しいとみなし、取り直さない
+TTL = 300
+
+# 予報が提供されていない地域を表す目印（None は「まだ取得していない」なので、別の値にして覚えておく）
+NO_FORECAST = object()
+
+
+# 天気予報をバックグラウンドで先読みし、メモリに保持するクラス
+# 古くなったデータもすぐに返し、その裏で取り直す（stale-while-revalidate）
+class ForecastPrefetcher:
+    def __init__(self, url_format, http_cache, ttl=TTL, max_workers=MAX_WORKERS):
+        self.url_format = url_format
+        self.http_cache = http_cache
+        self.ttl = ttl
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        # Keep-Aliveで使い回すセッション
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        # 地域コード -> (予報から取り出した値か NO_FORECAST, 取得した時刻)
+        self.entries = {}
+        # 地域コード -> 取得中の Future
+        self.inflight = {}
+
+    # メモリにある予報を返す（古くてもそのまま。まだ取得していなければ None、予報がない地域は NO_FORECAST）
+    def peek(self, code):
+        with self.lock:
+            entry = self.entries.get(code)
+        return entry[0] if entry else None
+
+    def is_fresh(self, code):
+        with self.lock:
+            entry = self.entries.get(code)
+        return entry is not None and time.monotonic() - entry[1] < self.ttl
+
+    # 新しいデータがなければ取得を始める関数
+    # 取得中または新しいデータがあるときは、取得中の Future か None を返す
+    def refresh(self, code):
+        with self.lock:
+            future = self.inflight.get(code)
+            if future is not None:
+                return future
+            entry = self.entries.get(code)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                return None
+            future = self.pool.submit(self._fetch, code)
+            self.inflight[code] = future
+        return future
+
+    # 地方を選んだときに、その地方の都道府県をまとめて先読みする関数
+    def prefetch(self, codes):
+        for code in codes:
+            self.refresh(code)
+
+    def _fetch(self, code):
+        try:
+            # 画面に必要な値だけを本文から取り出して持っておく
+            forecast = extract_fields(get_body(self.url_format.format(code), self.http_cache, self.session))
+            if forecast is None:
+                forecast = NO_FORECAST
+            with self.lock:
+                self.entries[code] = (forecast, time.monotonic())
+            return forecast
+        finally:
+            with self.lock:
+                self.inflight.pop(code, None)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
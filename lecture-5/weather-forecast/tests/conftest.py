@@ -0,0 +1,5 @@
+import os
+import sys
+
+# アプリのモジュールは src/ にある（flet run と同じく src/ を起点に import する）
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -0,0 +1,109 @@
+import copy
+import json
+
+import pytest
+
+from forecast_extract import extract_fields, forecast_fields
+
+# 気象庁の forecast/{code}.json と同じ形の予報（天気の文章・風・降水確率など、読み飛ばす項目も入れてある）
+FORECAST = [
+    {
+        "publishingOffice": "気象庁",
+        "reportDatetime": "2025-01-01T11:00:00+09:00",
+        "timeSeries": [
+            {
+                "timeDefines": ["2025-01-01T11:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [
+                    {
+                        "area": {"name": "東部", "code": "130010"},
+                        "weatherCodes": ["100", "200", "300"],
+                        "weathers": ["晴れ", "くもり　時々　晴れ", "雨"],
+                        "winds": ["北の風", "北の風　やや強く", "南西の風"],
+                    },
+                ],
+            },
+            {
+                "timeDefines": ["2025-01-01T12:00:00+09:00", "2025-01-01T18:00:00+09:00"],
+                "areas": [{"area": {"name": "東部", "code": "130010"}, "pops": ["0", "10"]}],
+            },
+            {
+                "timeDefines": ["2025-01-01T09:00:00+09:00", "2025-01-02T00:00:00+09:00"],
+                "areas": [
+                    {"area": {"name": "東京", "code": "44132"}, "temps": ["", ""]},
+                    {"area": {"name": "大島", "code": "44172"}, "temps": ["8", "4"]},
+                ],
+            },
+        ],
+    },
+    {
+        "publishingOffice": "気象庁",
+        "reportDatetime": "2025-01-01T11:00:00+09:00",
+        "timeSeries": [
+            {
+                "timeDefines": ["2025-01-01T00:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [
+                    {"area": {"name": "東京地方", "code": "130010"}, "weatherCodes": ["100", "201", "300"],
+                     "pops": ["", "20", "60"], "reliabilities": ["", "", "B"]},
+                ],
+            },
+            {
+                "timeDefines": ["2025-01-01T00:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [
+                    {"area": {"name": "東京", "code": "44132"}, "tempsMin": ["", "1", "2"], "tempsMax": ["", "10", ""],
+                     "tempsMinUpper": ["", "3", "4"], "tempsMinLower": ["", "-1", "0"]},
+                ],
+            },
+        ],
+        "tempAverage": {"areas": [{"area": {"name": "東京", "code": "44132"}, "min": "1.0", "max": "10.0"}]},
+    },
+]
+
+
+def encode(forecast, **options):
+    return json.dumps(forecast, **options).encode("utf-8")
+
+
+def expected(body):
+    return forecast_fields(json.loads(body))
+
+
+@pytest.mark.parametrize("options", [
+    {"ensure_ascii": False},
+    {"ensure_ascii": True},
+    {"separators": (",", ":"), "ensure_ascii": False},
+    {"indent": 2, "ensure_ascii": False},
+])
+def test_same_as_json_loads(options):
+    body = encode(FORECAST, **options)
+    assert extract_fields(body) == expected(body)
+    assert extract_fields(body) == (
+        ["2025-01-01T00:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+        ["100", "201", "300"], [None, 1, 2], [None, 10, None], 4, 8,
+    )
+
+
+def test_key_names_inside_strings():
+    forecast = copy.deepcopy(FORECAST)
+    # 文字列の中の "temps" や ] は値として読まない
+    forecast[0]["timeSeries"][0]["areas"][0]["weathers"][0] = '"temps": ["99"]'
+    forecast[1]["timeSeries"][0]["timeDefines"][0] = "2025-01-01]"
+    body = encode(forecast, ensure_ascii=False)
+    assert extract_fields(body) == expected(body)
+
+
+def test_without_weekly_temperatures():
+    forecast = copy.deepcopy(FORECAST)
+    del forecast[1]["timeSeries"][1]
+    del forecast[0]["timeSeries"][2]
+    body = encode(forecast)
+    assert extract_fields(body) == expected(body)
+    assert extract_fields(body)[2:] == ([], [], None, None)
+
+
+def test_no_forecast_for_the_area():
+    assert extract_fields(b'[{"publishingOffice": "\\u6c17\\u8c61\\u5e81"}]') is None
+
+
+def test_invalid_body():
+    with pytest.raises(ValueError):
+        extract_fields(b'[{"timeSeries": [')
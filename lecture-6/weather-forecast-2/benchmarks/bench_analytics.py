@@ -0,0 +1,99 @@
+# 地域ごとの気温の統計を、get_forecast_by_date を日付ごとに呼んで集める場合と
+# analytics.py（列ごとの配列に1回で読み込んで集計）の場合で比べるベンチマーク
+#
+# 実行方法: python benchmarks/bench_analytics.py [--offices 57] [--days 365] [--revisions 3]
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import analytics
+from db import connect, create_tables, from_day, forecast_rows, save_forecast_rows
+from queries import get_available_dates, get_forecast_by_date
+from query_cache import FORECAST_CACHE
+
+CODES = ["100", "101", "200", "201", "300", "313", "400"]
+
+
+# offices 地域 × days 日分の予報を、revisions 回の発表に分けて保存したDBを作る関数
+def build_db(db_name, offices, days, revisions, seed=1):
+    rng = random.Random(seed)
+    conn = connect(db_name)
+    create_tables(conn)
+    start = date.today() - timedelta(days=days)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    for r in range(revisions):
+        rows = []
+        for n in range(offices):
+            codes = [rng.choice(CODES) for _ in dates]
+            mins = [rng.randint(-5, 20) if rng.random() > 0.05 else None for _ in dates]
+            maxs = [t + rng.randint(3, 10) if t is not None else None for t in mins]
+            rows.extend(forecast_rows(f"{n + 1:02d}0000", dates, codes, mins, maxs, f"2025-01-01T{r:02d}:00:00"))
+        save_forecast_rows(conn, rows)
+    conn.close()
+
+
+# 1日ずつ読み出して集計する（変更前のやり方）
+def naive_stats(db_name):
+    FORECAST_CACHE.clear()
+    conn = connect(db_name)
+    codes = [row[0] for row in conn.execute("SELECT DISTINCT area_code FROM forecasts ORDER BY area_code")]
+    conn.close()
+    stats = {}
+    for code in codes:
+        mins, maxs = [], []
+        for d in get_available_dates(code, db_name):
+            data = get_forecast_by_date(code, d, db_name)
+            if data["min"] != "-":
+                mins.append(data["min"])
+            if data["max"] != "-":
+                maxs.append(data["max"])
+        stats[code] = (min(mins), max(maxs), sum(mins) / len(mins), sum(maxs) / len(maxs))
+    return stats
+
+
+def vectorized_stats(db_name):
+    temps = analytics.temperature_ranges(analytics.load_forecasts(db_name))
+    return {str(code): tuple(float(temps[k][i]) for k in ("min", "max", "mean_min", "mean_max")) for i, code in enumerate(temps["areas"])}
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offices", type=int, default=57)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--revisions", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "weather.db")
+        build_db(db_name, args.offices, args.days, args.revisions)
+        print(f"{args.offices} offices x {args.days} days, {args.revisions} revisions")
+
+        old, old_time = timed(naive_stats, db_name)
+        analytics.clear_cache()
+        new, load_time = timed(vectorized_stats, db_name)
+        _, cached_time = timed(vectorized_stats, db_name)
+        for code, values in old.items():
+            assert all(math.isclose(a, b) for a, b in zip(values, new[code])), code
+
+        changes, change_time = timed(lambda: analytics.code_change_rates(analytics.load_revisions(db_name)))
+        rolling, rolling_time = timed(analytics.rolling_means, analytics.load_forecasts(db_name), 7)
+        print(f"get_forecast_by_date loop  {old_time * 1000:9.1f} ms")
+        print(f"analytics (load + stats)   {load_time * 1000:9.1f} ms  x{old_time / load_time:.0f}")
+        print(f"analytics (cached arrays)  {cached_time * 1000:9.1f} ms")
+        print(f"code change rates          {change_time * 1000:9.1f} ms  (mean {np.nanmean(changes['rate']) * 100:.0f}% of revisions changed the code)")
+        print(f"7-day rolling means        {rolling_time * 1000:9.1f} ms  ({len(rolling)} rows, last day {from_day(int(analytics.load_forecasts(db_name).day[-1]))})")
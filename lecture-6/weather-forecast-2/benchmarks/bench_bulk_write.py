@@ -0,0 +1,94 @@
+# save_forecast_to_db（地域ごとに接続・コミット）と
+# save_forecast_rows（全地域を1トランザクション）の書き込み速度を比較するベンチマーク
+#
+# 実行方法: python benchmarks/bench_bulk_write.py
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import connect, create_tables, forecast_rows, save_forecast_rows
+
+# 変更前の forecasts テーブル
+LEGACY_SCHEMA = 'CREATE TABLE IF NOT EXISTS forecasts (id INTEGER PRIMARY KEY AUTOINCREMENT, area_code TEXT, forecast_date TEXT, weather TEXT, weather_code TEXT, temp_min INTEGER, temp_max INTEGER, fetched_at TEXT, UNIQUE(area_code, forecast_date));'
+
+OFFICES = 50
+DAYS = 7
+REPEAT = 5
+
+
+# 50地域 x 7日分のダミーデータを作る関数
+def synthetic_load():
+    start = date(2025, 1, 1)
+    load = []
+    for n in range(OFFICES):
+        dates = [(start + timedelta(days=i)).isoformat() + "T00:00:00+09:00" for i in range(DAYS)]
+        codes = [str(100 + (n + i) % 4 * 100) for i in range(DAYS)]
+        weathers = ["晴"] * DAYS
+        mins = [n % 10 + i for i in range(DAYS)]
+        maxs = [n % 10 + i + 8 for i in range(DAYS)]
+        load.append((f"{n:06d}", dates, codes, weathers, mins, maxs))
+    return load
+
+
+# 変更前の保存処理（1地域ごとに接続を開いてコミットする）
+def legacy_save(db_name, office_code, dates, codes, weathers, temps_min, temps_max):
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    fetched_at = datetime.now().isoformat()
+    for i in range(len(dates)):
+        date_obj = datetime.fromisoformat(dates[i])
+        tmin = temps_min[i] if i < len(temps_min) and isinstance(temps_min[i], int) else None
+        tmax = temps_max[i] if i < len(temps_max) and isinstance(temps_max[i], int) else None
+        cur.execute(
+            'INSERT OR REPLACE INTO forecasts (area_code, forecast_date, weather, weather_code, temp_min, temp_max, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (office_code, date_obj.date().isoformat(), weathers[i], codes[i], tmin, tmax, fetched_at)
+        )
+    conn.commit()
+    conn.close()
+
+
+def run_legacy(db_name, load):
+    for args in load:
+        legacy_save(db_name, *args)
+
+
+def run_bulk(db_name, load):
+    conn = connect(db_name)
+    try:
+        rows = []
+        for office_code, dates, codes, weathers, mins, maxs in load:
+            rows.extend(forecast_rows(office_code, dates, codes, mins, maxs))
+        save_forecast_rows(conn, rows)
+    finally:
+        conn.close()
+
+
+def bench(name, func, load, create):
+    best = None
+    for _ in range(REPEAT):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = os.path.join(tmp, "bench.db")
+            conn = sqlite3.connect(db_name)
+            create(conn)
+            conn.close()
+
+            t0 = time.perf_counter()
+            func(db_name, load)
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    rows = OFFICES * DAYS
+    print(f"{name:8s} {best * 1000:8.2f} ms  {rows / best:10.0f} rows/sec")
+    return best
+
+
+if __name__ == "__main__":
+    load = synthetic_load()
+    legacy = bench("legacy", run_legacy, load, lambda conn: conn.execute(LEGACY_SCHEMA))
+    bulk = bench("bulk", run_bulk, load, create_tables)
+    print(f"speedup  x{legacy / bulk:.1f}")
@@ -0,0 +1,66 @@
+# 条件付きGETキャッシュの効果を確かめるベンチマーク
+# ローカルのスタブサーバーに対して、初回取得・再検証（304）・1件だけ更新の3パターンを計測する
+#
+# 実行方法: python benchmarks/bench_http_cache.py
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from http_cache import NOT_MODIFIED, HttpCache
+from ingest import fetch_forecasts
+from stub_server import StubServer
+
+OFFICES = 50
+
+
+# それっぽい大きさのダミー予報データを作る関数
+def synthetic_forecast(code, version=0):
+    days = [f"2025-01-0{i + 1}T00:00:00+09:00" for i in range(7)]
+    return [
+        {"reportDatetime": f"2025-01-01T0{version}:00:00+09:00", "timeSeries": [{"timeDefines": days[:3], "areas": [{"area": {"code": code}, "weatherCodes": ["100"] * 3, "temps": ["1", "9"]}]}]},
+        {"timeSeries": [{"timeDefines": days, "areas": [{"area": {"code": code}, "weatherCodes": ["100"] * 7}]}]},
+    ]
+
+
+def run(label, server, cache, codes):
+    before = dict(server.counts)
+    t0 = time.perf_counter()
+    changed = 0
+    for code, forecast, error in fetch_forecasts(codes, server.base_url + "/{}.json", cache=cache, min_interval=0):
+        assert error is None, error
+        if forecast is not NOT_MODIFIED:
+            changed += 1
+    elapsed = time.perf_counter() - t0
+    got_200 = server.counts["200"] - before["200"]
+    got_304 = server.counts["304"] - before["304"]
+    print(f"{label:12s} {elapsed * 1000:8.1f} ms  changed={changed:3d}  200={got_200:3d}  304={got_304:3d}")
+    return changed
+
+
+if __name__ == "__main__":
+    codes = [f"{n:06d}" for n in range(OFFICES)]
+    routes = {f"/{code}.json": synthetic_forecast(code) for code in codes}
+
+    with tempfile.TemporaryDirectory() as tmp, StubServer(routes) as server:
+        # TTL=0 にして毎回サーバーに問い合わせる
+        cache = HttpCache(cache_dir=tmp, ttl=0)
+        assert run("cold", server, cache, codes) == OFFICES
+        assert run("revalidate", server, cache, codes) == 0
+
+        server.set(f"/{codes[0]}.json", synthetic_forecast(codes[0], version=1))
+        assert run("one update", server, cache, codes) == 1
+
+        # TTL内ならサーバーに問い合わせもしない
+        fresh = HttpCache(cache_dir=tmp, ttl=600)
+        assert run("within ttl", server, fresh, codes) == 0
+
+    # サイズ上限を超えたら古いものから消える
+    with tempfile.TemporaryDirectory() as tmp, StubServer(routes) as server:
+        small = HttpCache(cache_dir=tmp, ttl=0, max_bytes=2000)
+        run("small cache", server, small, codes)
+        kept = len([n for n in os.listdir(tmp) if n.endswith(".body")])
+        print(f"entries kept with max_bytes=2000: {kept}")
+        assert kept < OFFICES
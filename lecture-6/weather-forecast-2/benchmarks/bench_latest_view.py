@@ -0,0 +1,70 @@
+# 「今日から7日分」の読み出しを、forecasts から毎回組み立てる場合と
+# 取り込み時に作っておいた forecast_latest の1行を読む場合で、履歴の長さを変えて比べるベンチマーク
+#
+# 実行方法: python benchmarks/bench_latest_view.py
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import connect, create_tables, forecast_rows, save_forecast_rows
+from latest_view import format_day, read_latest
+
+OFFICES = 57
+REPEAT = 20
+
+
+def build_db(db_name, history_days):
+    conn = connect(db_name)
+    create_tables(conn)
+    start = date.today() - timedelta(days=history_days)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(history_days + 7)]
+    rows = []
+    for n in range(OFFICES):
+        codes = [100 + (n + i) % 4 * 100 for i in range(len(dates))]
+        rows.extend(forecast_rows(f"{n:06d}", dates, codes, [i % 30 for i in range(len(dates))], [i % 30 + 8 for i in range(len(dates))]))
+    save_forecast_rows(conn, rows)
+    conn.close()
+
+
+# 変更前の読み出し（forecasts から7行を探して整形する）
+def from_forecasts(conn, code, day):
+    rows = conn.execute(
+        """
+        SELECT f.forecast_day, COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max
+        FROM forecasts f
+        LEFT JOIN weather_code_master m ON m.code = f.weather_code
+        WHERE f.area_code = ? AND f.forecast_day >= ?
+        ORDER BY f.forecast_day
+        LIMIT 7
+        """,
+        (code, day)
+    ).fetchall()
+    return [format_day(*row) for row in rows]
+
+
+def bench(func, conn, day):
+    codes = [f"{n:06d}" for n in range(OFFICES)]
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        for code in codes:
+            func(conn, code, day)
+    return (time.perf_counter() - t0) / (REPEAT * OFFICES) * 1e6
+
+
+if __name__ == "__main__":
+    today = date.today().toordinal()
+    for history_days in (30, 365, 1825):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = os.path.join(tmp, "weather.db")
+            build_db(db_name, history_days)
+            conn = sqlite3.connect(db_name)
+            assert all(read_latest(conn, f"{n:06d}", today) == from_forecasts(conn, f"{n:06d}", today) for n in range(OFFICES))
+            old = bench(from_forecasts, conn, today)
+            new = bench(read_latest, conn, today)
+            conn.close()
+            print(f"history {history_days:5d} days  forecasts {old:6.1f} us  latest {new:6.1f} us  x{old / new:.1f}")
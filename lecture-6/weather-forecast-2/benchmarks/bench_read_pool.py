@@ -0,0 +1,106 @@
+# 表示用の読み出し（get_*）を、呼び出しのたびに接続する場合と接続プール（db_pool.py）を使う場合で比べるベンチマーク
+# 表示用キャッシュは無効にして、毎回DBに問い合わせる
+#
+# 実行方法: python benchmarks/bench_read_pool.py
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from db import connect, create_tables, forecast_rows, save_forecast_rows, to_day
+from db_pool import close_pools
+from queries import get_7days_forecast_from_db, get_available_dates, get_forecast_by_date
+from query_cache import FORECAST_CACHE
+
+OFFICES = 57
+DAYS = 30
+QUERIES = 10000
+
+
+# 変更前の読み出し（呼び出しのたびに接続を開いて閉じる）
+def legacy_available_dates(area_code, db_name):
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    cur.execute('SELECT forecast_day FROM forecasts WHERE area_code = ? ORDER BY forecast_day DESC', (area_code,))
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def legacy_forecast_by_date(area_code, day, db_name):
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max FROM forecasts f "
+        "LEFT JOIN weather_code_master m ON m.code = f.weather_code WHERE f.area_code = ? AND f.forecast_day = ?",
+        (area_code, to_day(day))
+    )
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+
+def legacy_7days(area_code, day, db_name):
+    conn = sqlite3.connect(db_name)
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT f.forecast_day, COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max FROM forecasts f "
+        "LEFT JOIN weather_code_master m ON m.code = f.weather_code WHERE f.area_code = ? AND f.forecast_day >= ? "
+        "ORDER BY f.forecast_day LIMIT 7",
+        (area_code, to_day(day))
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def build_db(db_name):
+    conn = connect(db_name)
+    create_tables(conn)
+    start = date.today() - timedelta(days=DAYS - 7)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(DAYS)]
+    rows = []
+    for n in range(OFFICES):
+        codes = [100 + (n + i) % 4 * 100 for i in range(DAYS)]
+        rows.extend(forecast_rows(f"{n:06d}", dates, codes, list(range(DAYS)), list(range(10, 10 + DAYS))))
+    save_forecast_rows(conn, rows)
+    conn.close()
+    return dates
+
+
+# 7日分・日付一覧・1日分を混ぜた問い合わせの列を作る
+def workload(dates):
+    rng = random.Random(0)
+    return [(i % 3, f"{rng.randrange(OFFICES):06d}", rng.choice(dates)) for i in range(QUERIES)]
+
+
+def run(name, funcs, jobs, db_name):
+    t0 = time.perf_counter()
+    for kind, code, day in jobs:
+        if kind == 0:
+            funcs[0](code, day, db_name)
+        elif kind == 1:
+            funcs[1](code, db_name)
+        else:
+            funcs[2](code, day, db_name)
+    elapsed = time.perf_counter() - t0
+    print(f"{name:8s} {elapsed * 1000:8.1f} ms  {elapsed / len(jobs) * 1e6:6.1f} us/query")
+    return elapsed
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "weather.db")
+        jobs = workload(build_db(db_name))
+        # キャッシュに入らないようにして、毎回DBに問い合わせる
+        FORECAST_CACHE.max_bytes = 0
+
+        legacy = run("connect", (legacy_7days, legacy_available_dates, legacy_forecast_by_date), jobs, db_name)
+        pooled = run("pool", (get_7days_forecast_from_db, get_available_dates, get_forecast_by_date), jobs, db_name)
+        print(f"speedup  x{legacy / pooled:.1f}")
+        close_pools()
@@ -0,0 +1,117 @@
+# 記録した気象庁の応答を再生して、取り込み全体の時間・DBへの書き込み速度・読み出しの待ち時間を
+# 地域数 1倍 / 10倍 / 100倍 で計測するベンチマーク（ネットワークには出ない）
+#
+# 実行方法: python benchmarks/bench_replay.py [--bundle jma.json.gz] [--latency 0.05] [--error-rate 0.1]
+#   --bundle を省略すると、weather.db の地域データからダミーの記録を作って使う
+#   記録は python src/ingest_cli.py --record jma.json.gz で作れる
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from http_cache import HttpCache
+from jma_samples import synthetic_bundle
+from pipeline import AREA_URL, FORECAST_URL, load_area_json_from_db, run_pipeline
+from queries import get_7days_forecast_from_db, get_available_dates, get_forecast_by_date
+from query_cache import FORECAST_CACHE
+from replay import FixtureBundle, replay_session
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "weather.db")
+QUERIES = 2000
+
+
+# 地域を factor 倍に増やした記録を作る関数（増やした地域には元の地域と同じ予報を返す）
+def scaled_bundle(bundle, factor):
+    area_json = json.loads(bundle.get(AREA_URL)["body"])
+    scaled = FixtureBundle(dict(bundle.responses))
+    offices = dict(area_json["offices"])
+    centers = {code: dict(center, children=list(center.get("children", []))) for code, center in area_json["centers"].items()}
+    parents = {child: code for code, center in centers.items() for child in center["children"]}
+    for code, office in area_json["offices"].items():
+        if bundle.get(FORECAST_URL.format(code)) is None:
+            continue
+        for k in range(1, factor):
+            clone = f"{code}{k:03d}"
+            offices[clone] = dict(office, name=f"{office['name']}{k}")
+            if code in parents:
+                centers[parents[code]]["children"].append(clone)
+            scaled.alias(FORECAST_URL.format(clone), FORECAST_URL.format(code))
+    scaled.add(AREA_URL, 200, {"Content-Type": "application/json"},
+               json.dumps({"centers": centers, "offices": offices}, ensure_ascii=False).encode("utf-8"))
+    return scaled, list(offices)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+# 表示用の読み出しを QUERIES 回（7日分・日付一覧・1日分を混ぜて）実行する関数
+def bench_queries(db_name, codes):
+    rng = random.Random(0)
+    today = date.today().isoformat()
+    FORECAST_CACHE.clear()
+    FORECAST_CACHE.hits = FORECAST_CACHE.misses = 0
+    times = []
+    for i in range(QUERIES):
+        code = rng.choice(codes)
+        t0 = time.perf_counter()
+        if i % 3 == 0:
+            get_7days_forecast_from_db(code, today, db_name)
+        elif i % 3 == 1:
+            get_available_dates(code, db_name)
+        else:
+            get_forecast_by_date(code, today, db_name)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def run(bundle, factor, args):
+    scaled, codes = scaled_bundle(bundle, factor)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "weather.db")
+        session = replay_session(scaled, args.latency, args.error_rate)
+        cache = HttpCache(cache_dir=os.path.join(tmp, "http_cache"), max_bytes=1 << 30)
+        t0 = time.perf_counter()
+        summary = run_pipeline(db_name, log=lambda *values: None, session=session, cache=cache, min_interval=0)
+        elapsed = time.perf_counter() - t0
+        session.close()
+
+        # 同じ内容をもう一度取り込む（HTTPキャッシュは空にして、本文のハッシュで飛ばせるかを見る）
+        session = replay_session(scaled, args.latency, args.error_rate)
+        cache = HttpCache(cache_dir=os.path.join(tmp, "http_cache_2"), max_bytes=1 << 30)
+        t0 = time.perf_counter()
+        again = run_pipeline(db_name, log=lambda *values: None, session=session, cache=cache, min_interval=0)
+        refresh = time.perf_counter() - t0
+        session.close()
+
+        save = summary["timings"].get("save", 0) or float("nan")
+        times = bench_queries(db_name, codes)
+        hit_rate = FORECAST_CACHE.hits / QUERIES
+        print(f"{factor:4d}x {summary['offices']:6d} offices  ingest {elapsed:7.2f} s  "
+              f"write {summary['rows'] / save:9.0f} rows/s  "
+              f"query p50 {percentile(times, 0.5) * 1e6:7.1f} us  p99 {percentile(times, 0.99) * 1e6:7.1f} us  hit {hit_rate:4.0%}  "
+              f"errors {len(summary['errors'])}  "
+              f"refresh {refresh:6.2f} s ({again['written']} rows written)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bundle", help="ingest_cli.py --record で作った記録")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--scales", default="1,10,100")
+    args = parser.parse_args()
+
+    if args.bundle:
+        bundle = FixtureBundle.load(args.bundle)
+    else:
+        bundle = synthetic_bundle(load_area_json_from_db(DB_PATH))
+    for factor in [int(s) for s in args.scales.split(",")]:
+        run(bundle, factor, args)
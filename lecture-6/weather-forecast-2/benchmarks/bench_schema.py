@@ -0,0 +1,101 @@
+# スキーマ移行（migrate.py）前後のDBサイズと7日間クエリの速度を比較するベンチマーク
+#
+# 実行方法: python benchmarks/bench_schema.py
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from migrate import migrate
+from weather_codes import weatherDescription
+
+OFFICES = 60
+DAYS = 365
+QUERIES = 5000
+
+# 変更前の forecasts テーブル
+LEGACY_SCHEMA = 'CREATE TABLE forecasts (id INTEGER PRIMARY KEY AUTOINCREMENT, area_code TEXT, forecast_date TEXT, weather TEXT, weather_code TEXT, temp_min INTEGER, temp_max INTEGER, fetched_at TEXT, UNIQUE(area_code, forecast_date));'
+
+LEGACY_QUERY = '''
+SELECT forecast_date, weather, weather_code, temp_min, temp_max
+FROM forecasts
+WHERE area_code = ? AND forecast_date >= ?
+ORDER BY forecast_date
+LIMIT 7
+'''
+
+NEW_QUERY = '''
+SELECT f.forecast_day, COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max
+FROM forecasts f
+LEFT JOIN weather_code_master m ON m.code = f.weather_code
+WHERE f.area_code = ? AND f.forecast_day >= ?
+ORDER BY f.forecast_day
+LIMIT 7
+'''
+
+START = date(2025, 1, 1)
+
+
+# 1年分の履歴が入った旧スキーマのDBを作る関数
+def build_legacy(db_name):
+    rnd = random.Random(0)
+    codes = list(weatherDescription.items())
+    conn = sqlite3.connect(db_name)
+    conn.execute(LEGACY_SCHEMA)
+    rows = []
+    for n in range(OFFICES):
+        for i in range(DAYS):
+            code, text = rnd.choice(codes)
+            rows.append((f"{n:06d}", (START + timedelta(days=i)).isoformat(), text, code,
+                         rnd.randint(-10, 20), rnd.randint(0, 35), "2025-01-01T00:00:00"))
+    with conn:
+        conn.executemany(
+            'INSERT INTO forecasts (area_code, forecast_date, weather, weather_code, temp_min, temp_max, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+    conn.execute('VACUUM;')
+    conn.close()
+
+
+def bench_queries(db_name, sql, to_param):
+    rnd = random.Random(1)
+    params = [(f"{rnd.randrange(OFFICES):06d}", to_param(START + timedelta(days=rnd.randrange(DAYS))))
+              for _ in range(QUERIES)]
+    conn = sqlite3.connect(db_name)
+    t0 = time.perf_counter()
+    for p in params:
+        conn.execute(sql, p).fetchall()
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return elapsed / QUERIES * 1e6
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        new_db = os.path.join(tmp, "new.db")
+        build_legacy(legacy_db)
+        shutil.copy(legacy_db, new_db)
+
+        conn = sqlite3.connect(new_db)
+        t0 = time.perf_counter()
+        # 履歴テーブル（バージョン2）は含めず、forecasts の形式だけを比べる
+        migrate(conn, vacuum=True, target=1)
+        migrate_ms = (time.perf_counter() - t0) * 1000
+        conn.close()
+
+        legacy_size = os.path.getsize(legacy_db)
+        new_size = os.path.getsize(new_db)
+        legacy_us = bench_queries(legacy_db, LEGACY_QUERY, lambda d: d.isoformat())
+        new_us = bench_queries(new_db, NEW_QUERY, lambda d: d.toordinal())
+
+        print(f"rows: {OFFICES * DAYS}  migrate: {migrate_ms:.1f} ms")
+        print(f"{'':8s} {'size':>10s} {'7days query':>14s}")
+        print(f"{'legacy':8s} {legacy_size / 1024:8.0f}KB {legacy_us:11.1f} us")
+        print(f"{'v1':8s} {new_size / 1024:8.0f}KB {new_us:11.1f} us")
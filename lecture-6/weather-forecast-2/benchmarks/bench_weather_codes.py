@@ -0,0 +1,56 @@
+# weather_icons（毎回キーワードを検索）と、起動時に作った表（weather_codes.py）の速度を比較するベンチマーク
+#
+# 実行方法: python benchmarks/bench_weather_codes.py
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from weather_codes import match_icons, weather_info, weatherDescription
+
+NUMBER = 200
+
+
+# 変更前のアイコン抽出処理
+def legacy_weather_icons(text):
+    patterns = [
+        ("晴", "☀️"),
+        ("曇", "☁️"),
+        ("雨", "🌧"),
+        ("雪", "❄️"),
+        ("雷", "🌩"),
+        ("霧", "🌫"),
+        ("みぞれ", "🌨"),
+    ]
+    icons = []
+    index_list = []
+    for key, icon in patterns:
+        idx = text.find(key)
+        if idx != -1:
+            index_list.append((idx, icon))
+    index_list.sort(key=lambda x: x[0])
+    for _, icon in index_list:
+        if icon not in icons:
+            icons.append(icon)
+    if not icons:
+        icons.append("✖️")
+    return icons
+
+
+if __name__ == "__main__":
+    items = list(weatherDescription.items())
+
+    # 全コードで結果が変わらないことを確認
+    for code, text in items:
+        assert list(weather_info(code).icons) == legacy_weather_icons(text), code
+        assert list(match_icons(text)) == legacy_weather_icons(text), code
+
+    calls = NUMBER * len(items)
+    legacy = timeit.timeit(lambda: [legacy_weather_icons(t) for _, t in items], number=NUMBER)
+    table = timeit.timeit(lambda: [weather_info(c).icons for c, _ in items], number=NUMBER)
+    single = timeit.timeit(lambda: [match_icons(t) for _, t in items], number=NUMBER)
+
+    print(f"{'legacy weather_icons':22s} {legacy / calls * 1e9:8.0f} ns/call")
+    print(f"{'weather_info (table)':22s} {table / calls * 1e9:8.0f} ns/call  x{legacy / table:.1f}")
+    print(f"{'match_icons (text)':22s} {single / calls * 1e9:8.0f} ns/call  x{legacy / single:.1f}")
@@ -0,0 +1,143 @@
+# ベンチマーク用の、気象庁の forecast/{code}.json と同じ形のダミーデータ
+# 天気の文章・風・波・降水確率・信頼度・平年値まで入れて、本物と同じくらいの大きさにする
+import json
+import random
+from datetime import date, datetime, timedelta
+
+WEATHERS = {
+    "100": "晴れ", "101": "晴れ　時々　くもり", "110": "晴れ　後　時々　くもり",
+    "200": "くもり", "201": "くもり　時々　晴れ", "203": "くもり　時々　雨",
+    "212": "くもり　後　一時　雨", "300": "雨", "313": "雨　後　くもり",
+    "400": "雪", "402": "雪　時々　止む", "413": "雪　後　くもり",
+}
+WINDS = ["北の風", "北の風　やや強く", "南西の風　後　北の風", "東の風　海上　では　東の風　やや強く"]
+WAVES = ["０．５メートル", "１メートル　後　１．５メートル", "２メートル　うねり　を伴う"]
+
+
+def _times(start, count, hours):
+    return [(start + timedelta(hours=h)).isoformat() + "+09:00" for h in hours[:count]]
+
+
+# 地域コードから予報データを1つ作る関数（同じコードなら毎回同じ内容になる）
+def realistic_forecast(code, seed=None, subareas=None, stations=None, start=date(2025, 1, 1)):
+    rng = random.Random(seed if seed is not None else code)
+    subareas = subareas or rng.randint(1, 4)
+    stations = stations or rng.randint(1, 4)
+    base = rng.randint(-5, 20)
+    day0 = datetime(start.year, start.month, start.day, 5)
+    codes = list(WEATHERS)
+
+    # 一次細分区域は 130010, 130020, …、観測地点は5桁のコードにする（本物と同じ）
+    def area(n, prefix):
+        if prefix == "観測所":
+            return {"name": f"{prefix}{n}", "code": f"{code[:2]}{n + 1:03d}"}
+        return {"name": f"{prefix}{n}", "code": f"{code[:4]}{n + 1}0"}
+
+    short = [
+        {
+            "timeDefines": _times(day0, 3, [0, 19, 43]),
+            "areas": [
+                {
+                    "area": area(n, "地方"),
+                    "weatherCodes": [rng.choice(codes) for _ in range(3)],
+                    "weathers": [WEATHERS[rng.choice(codes)] for _ in range(3)],
+                    "winds": [rng.choice(WINDS) for _ in range(3)],
+                    "waves": [rng.choice(WAVES) for _ in range(3)],
+                }
+                for n in range(subareas)
+            ],
+        },
+        {
+            "timeDefines": _times(day0, 7, [1, 7, 13, 19, 25, 31, 37]),
+            "areas": [{"area": area(n, "地方"), "pops": [str(rng.randrange(0, 101, 10)) for _ in range(7)]} for n in range(subareas)],
+        },
+        {
+            "timeDefines": _times(day0, 4, [4, 13, 28, 37]),
+            "areas": [
+                {"area": area(n, "観測所"), "temps": [str(base + rng.randint(-3, 3)), str(base + rng.randint(5, 10)), str(base + rng.randint(-3, 3)), str(base + rng.randint(5, 10))]}
+                for n in range(stations)
+            ],
+        },
+    ]
+    week_days = _times(day0, 7, [19 + 24 * i for i in range(7)])
+
+    def week_temps():
+        values = [str(base + rng.randint(-3, 10)) for _ in range(7)]
+        values[0] = ""
+        return values
+
+    week = [
+        {
+            "timeDefines": week_days,
+            "areas": [
+                {
+                    "area": area(n, "地方"),
+                    "weatherCodes": [rng.choice(codes) for _ in range(7)],
+                    "pops": [""] + [str(rng.randrange(0, 101, 10)) for _ in range(6)],
+                    "reliabilities": ["", ""] + [rng.choice("ABC") for _ in range(5)],
+                }
+                for n in range(min(subareas, 2))
+            ],
+        },
+        {
+            "timeDefines": week_days,
+            "areas": [
+                {
+                    "area": area(n, "観測所"),
+                    "tempsMin": week_temps(), "tempsMinUpper": week_temps(), "tempsMinLower": week_temps(),
+                    "tempsMax": week_temps(), "tempsMaxUpper": week_temps(), "tempsMaxLower": week_temps(),
+                }
+                for n in range(min(stations, 2))
+            ],
+        },
+    ]
+    report = day0.isoformat() + "+09:00"
+    return [
+        {"publishingOffice": "気象台", "reportDatetime": report, "timeSeries": short},
+        {
+            "publishingOffice": "気象台", "reportDatetime": report, "timeSeries": week,
+            "tempAverage": {"areas": [{"area": area(n, "観測所"), "min": f"{base}.0", "max": f"{base + 8}.5"} for n in range(stations)]},
+            "precipAverage": {"areas": [{"area": area(n, "地方"), "min": "5.0", "max": "18.0"} for n in range(subareas)]},
+        },
+    ]
+
+
+# area.json に一次細分区域から市町村等までの階層（class10s / class15s / class20s）をダミーで足す関数
+# 府県予報区ごとに 4 × 2 × 4 地域（本物の area.json とほぼ同じ数）にする
+def add_sub_areas(area_json):
+    area_json = dict(area_json)
+    class10s, class15s, class20s = {}, {}, {}
+    offices = {}
+    for code, data in area_json["offices"].items():
+        children = [f"{code[:4]}{n + 1}0" for n in range(4)]
+        offices[code] = dict(data, children=children)
+        for n, class10 in enumerate(children):
+            class10s[class10] = {"name": f"{data['name']}地方{n}", "parent": code, "children": []}
+            for m in range(2):
+                class15 = f"{class10[:5]}{m + 1}"
+                class10s[class10]["children"].append(class15)
+                class15s[class15] = {"name": f"{data['name']}地域{n}{m}", "parent": class10, "children": []}
+                for k in range(4):
+                    class20 = f"{class15}{k}"
+                    class15s[class15]["children"].append(class20)
+                    class20s[class20] = {"name": f"{data['name']}市町村{n}{m}{k}", "parent": class15}
+    area_json.update(offices=offices, class10s=class10s, class15s=class15s, class20s=class20s)
+    return area_json
+
+
+# area.json と全地域の予報をダミーで用意した記録（replay.FixtureBundle）を作る関数
+# area_json は pipeline.load_area_json_from_db と同じ形（class10s がなければダミーの階層を足す）
+def synthetic_bundle(area_json, start=None):
+    from pipeline import AREA_URL, FORECAST_URL
+    from replay import FixtureBundle
+
+    if not area_json.get("class10s"):
+        area_json = add_sub_areas(area_json)
+    start = start or date.today()
+    headers = {"Content-Type": "application/json"}
+    bundle = FixtureBundle()
+    bundle.add(AREA_URL, 200, headers, json.dumps(area_json, ensure_ascii=False).encode("utf-8"))
+    for code in area_json["offices"]:
+        body = json.dumps(realistic_forecast(code, start=start), ensure_ascii=False, separators=(",", ":"))
+        bundle.add(FORECAST_URL.format(code), 200, dict(headers, ETag=f'"{code}-{start.isoformat()}"'), body.encode("utf-8"))
+    return bundle
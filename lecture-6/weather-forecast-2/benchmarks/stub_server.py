@@ -0,0 +1,87 @@
+# 気象庁APIの代わりにローカルでJSONを返すサーバー
+# ETag / Last-Modified を付けて返し、条件付きGETには 304 を返す
+import hashlib
+import json
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    def __init__(self, routes=None, host="127.0.0.1", port=0):
+        # パス -> JSONデータ
+        self.routes = {}
+        self.counts = {"200": 0, "304": 0, "404": 0}
+        self.lock = threading.Lock()
+        for path, data in (routes or {}).items():
+            self.set(path, data)
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-Alive を有効にする
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # レスポンスを登録・差し替える（差し替えると ETag と Last-Modified も変わる）
+    def set(self, path, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        with self.lock:
+            self.routes[path] = (body, etag, formatdate(usegmt=True))
+
+    def _count(self, status):
+        with self.lock:
+            self.counts[str(status)] = self.counts.get(str(status), 0) + 1
+
+    def _handle(self, req):
+        path = req.path.split("?")[0]
+        with self.lock:
+            entry = self.routes.get(path)
+        if entry is None:
+            self._count(404)
+            req.send_response(404)
+            req.send_header("Content-Length", "0")
+            req.end_headers()
+            return
+
+        body, etag, last_modified = entry
+        if req.headers.get("If-None-Match") == etag or (
+            req.headers.get("If-None-Match") is None and req.headers.get("If-Modified-Since") == last_modified
+        ):
+            self._count(304)
+            req.send_response(304)
+            req.send_header("ETag", etag)
+            req.end_headers()
+            return
+
+        self._count(200)
+        req.send_response(200)
+        req.send_header("Content-Type", "application/json")
+        req.send_header("Content-Length", str(len(body)))
+        req.send_header("ETag", etag)
+        req.send_header("Last-Modified", last_modified)
+        req.end_headers()
+        req.wfile.write(body)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
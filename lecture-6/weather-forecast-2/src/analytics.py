@@ -0,0 +1,201 @@
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from archive import list_partitions
+from db import DB_NAME, db_signature
+from db_pool import get_pool
+
+# 予報の履歴全体にわたる統計（地域ごとの気温の範囲・移動平均・予報の変わりやすさ）
+#
+# get_forecast_by_date を日付ごとに呼ぶ代わりに、テーブルを1回の問い合わせで列ごとの NumPy 配列に読み込み、
+# 地域ごとの集計は配列の演算（reduceat / bincount / cumsum）で行う。
+# 読み込んだ配列は DB ファイルの更新時刻とサイズをキーに覚えておき、取り込みで DB が変わるまで使い回す。
+#
+#   columns = load_forecasts(db_name)
+#   stats = temperature_ranges(columns)      地域ごとの最低・最高・平均
+#   means = rolling_means(columns, 7)        地域ごとの7日移動平均（行と同じ並び）
+
+# 一度に読み込む行数（fetchmany の大きさ）
+CHUNK_ROWS = 50_000
+# 天気コードがないときの値
+NO_CODE = -1
+
+# 列ごとの配列
+#   areas: 地域コード（重複なし・昇順）
+#   area_index: 行ごとの areas の添字（行は地域 → 日付 → 取得時刻の順に並んでいる）
+#   starts: 地域ごとの先頭の行番号（len(areas) 個。reduceat に使う）
+#   day: 日番号 / weather_code: 天気コード（ないときは NO_CODE）/ temp_min, temp_max: 気温（ないときは NaN）
+ForecastColumns = namedtuple("ForecastColumns", ["areas", "area_index", "starts", "day", "weather_code", "temp_min", "temp_max"])
+
+# DBファイル -> (キー, 種類 -> 列)
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+# (地域コード, 日番号, 天気コード, 最低気温, 最高気温) の行を列の配列にする関数
+# 行は地域コードの順に並んでいること
+def _to_columns(cursor):
+    codes, values = [], []
+    while True:
+        chunk = cursor.fetchmany(CHUNK_ROWS)
+        if not chunk:
+            break
+        codes.append(np.array([row[0] for row in chunk]))
+        # None は float にすると NaN になる
+        values.append(np.array([row[1:] for row in chunk], dtype=np.float64))
+
+    if not codes:
+        empty = np.empty(0)
+        return ForecastColumns(np.empty(0, dtype=str), empty.astype(np.int32), empty.astype(np.int64),
+                               empty.astype(np.int32), empty.astype(np.int16), empty.astype(np.float32), empty.astype(np.float32))
+
+    areas, area_index = np.unique(np.concatenate(codes), return_inverse=True)
+    values = np.concatenate(values)
+    weather_code = values[:, 1]
+    return ForecastColumns(
+        areas=areas,
+        area_index=area_index.astype(np.int32),
+        starts=np.searchsorted(area_index, np.arange(len(areas))),
+        day=values[:, 0].astype(np.int32),
+        weather_code=np.where(np.isnan(weather_code), NO_CODE, weather_code).astype(np.int16),
+        temp_min=values[:, 2].astype(np.float32),
+        temp_max=values[:, 3].astype(np.float32),
+    )
+
+
+def _cached(db_name, kind, load):
+    key = os.path.abspath(db_name)
+    signature = db_signature(db_name)
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] == signature and kind in entry[1]:
+            return entry[1][kind]
+
+    with get_pool(db_name).connection() as conn:
+        columns = load(conn)
+
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None or entry[0] != signature:
+            entry = _CACHE[key] = (signature, {})
+        entry[1][kind] = columns
+    return columns
+
+
+# forecasts（地域・日ごとの最新の予報）を列の配列で返す関数
+def load_forecasts(db_name=DB_NAME):
+    return _cached(db_name, "forecasts", lambda conn: _to_columns(conn.execute(
+        'SELECT area_code, forecast_day, weather_code, temp_min, temp_max FROM forecasts ORDER BY area_code, forecast_day'
+    )))
+
+
+# 月別の履歴テーブル（archive.py）をまとめて、発表ごとの予報を列の配列で返す関数
+# 同じ地域・同じ日の行は取得時刻の順に並ぶ
+def load_revisions(db_name=DB_NAME):
+    def load(conn):
+        names = [name for _, _, name in list_partitions(conn)]
+        if not names:
+            return _to_columns(conn.execute('SELECT NULL, NULL, NULL, NULL, NULL WHERE 0'))
+        union = " UNION ALL ".join(
+            f'SELECT area_code, forecast_day, fetched_at, weather_code, temp_min, temp_max FROM {name}' for name in names
+        )
+        return _to_columns(conn.execute(
+            f'SELECT area_code, forecast_day, weather_code, temp_min, temp_max FROM ({union}) ORDER BY area_code, forecast_day, fetched_at'
+        ))
+    return _cached(db_name, "revisions", load)
+
+
+# 読み込んだ配列を捨てる関数（テストや DB を置き換えたときに使う）
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+# 地域ごとの気温の統計を返す関数
+# {"areas", "days", "min", "max", "mean_min", "mean_max"} の配列（どれも areas と同じ並び。値がなければ NaN）
+def temperature_ranges(columns):
+    n = len(columns.areas)
+    if n == 0:
+        return {"areas": columns.areas, "days": np.zeros(0, dtype=np.int64), "min": np.empty(0), "max": np.empty(0),
+                "mean_min": np.empty(0), "mean_max": np.empty(0)}
+
+    result = {"areas": columns.areas, "days": np.bincount(columns.area_index, minlength=n)}
+    # fmin / fmax は NaN を無視する（地域の値がすべて NaN のときだけ NaN になる）
+    result["min"] = np.fmin.reduceat(columns.temp_min, columns.starts).astype(np.float64)
+    result["max"] = np.fmax.reduceat(columns.temp_max, columns.starts).astype(np.float64)
+    for name, values in (("mean_min", columns.temp_min), ("mean_max", columns.temp_max)):
+        valid = ~np.isnan(values)
+        total = np.bincount(columns.area_index, weights=np.where(valid, values, 0), minlength=n)
+        count = np.bincount(columns.area_index, weights=valid, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[name] = np.where(count > 0, total / count, np.nan)
+    return result
+
+
+# 地域ごとに、直前 window 行（その行を含む）の平均を返す関数（行と同じ並びの配列）
+# 地域の境目はまたがない。NaN は除いて平均し、値が1つもなければ NaN
+def rolling_means(columns, window=7, field="temp_max"):
+    values = getattr(columns, field).astype(np.float64)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    rows = np.arange(len(values))
+    # 窓の先頭は、window 行前とその地域の先頭行の遅いほう
+    begin = np.maximum(rows - window + 1, columns.starts[columns.area_index])
+    total = sums[rows + 1] - sums[begin]
+    count = counts[rows + 1] - counts[begin]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+# 地域ごとに、同じ日の予報の天気コードが発表のあいだで変わった割合を返す関数
+# {"areas", "revisions", "changes", "rate"}（rate は変わった回数 / 比べた回数。比べられなければ NaN）
+# 履歴には値（天気コード・気温）が変わった発表だけが残るので（archive.py）、rate は
+# 「予報の値が変わった発表のうち、天気コードも変わった割合」になる（値が同じままの発表は数えない）
+def code_change_rates(revisions):
+    n = len(revisions.areas)
+    same_forecast = (revisions.area_index[1:] == revisions.area_index[:-1]) & (revisions.day[1:] == revisions.day[:-1])
+    changed = same_forecast & (revisions.weather_code[1:] != revisions.weather_code[:-1])
+    # 比べた組は、後ろの行の地域に数える
+    owner = revisions.area_index[1:]
+    compared = np.bincount(owner, weights=same_forecast, minlength=n).astype(np.int64)
+    changes = np.bincount(owner, weights=changed, minlength=n).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = np.where(compared > 0, changes / np.maximum(compared, 1), np.nan)
+    return {"areas": revisions.areas, "revisions": compared, "changes": changes, "rate": rate}
+
+
+# 画面に表示するための、地域ごとの統計を返す関数
+# area_codes を指定するとその地域だけを、その順で返す（予報のない地域は含めない）
+def office_stats(area_codes=None, db_name=DB_NAME):
+    temps = temperature_ranges(load_forecasts(db_name))
+    changes = code_change_rates(load_revisions(db_name))
+    change_by_code = {code: (int(c), float(r)) for code, c, r in zip(changes["areas"], changes["changes"], changes["rate"])}
+
+    positions = {code: i for i, code in enumerate(temps["areas"])}
+    codes = list(area_codes) if area_codes is not None else list(temps["areas"])
+
+    def value(x):
+        return None if np.isnan(x) else round(float(x), 1)
+
+    stats = []
+    for code in codes:
+        i = positions.get(code)
+        if i is None:
+            continue
+        change_count, rate = change_by_code.get(code, (0, float("nan")))
+        stats.append({
+            "area_code": str(code),
+            "days": int(temps["days"][i]),
+            "min": value(temps["min"][i]),
+            "max": value(temps["max"][i]),
+            "mean_min": value(temps["mean_min"][i]),
+            "mean_max": value(temps["mean_max"][i]),
+            "code_changes": change_count,
+            "change_rate": value(rate * 100),
+        })
+    return stats
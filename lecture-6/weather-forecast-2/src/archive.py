@@ -0,0 +1,164 @@
+import re
+from datetime import date, datetime
+
+# 予報の履歴（過去の発表分）を残しておく月数。これより古い月のテーブルは削除する
+KEEP_MONTHS = 12
+
+# 予報対象日の月ごとに分けた履歴テーブル（例: forecast_revisions_202501）
+# 取得時刻まで含めた主キーなので、同じ日の予報でも発表ごとに別の行になる
+# 取り込み（pipeline.py）は値（天気コード・気温）が変わった行だけを保存するので、履歴に残るのは
+# 予報の値が変わった発表だけになる（compact で圧縮した月と同じ形）。「時刻Tの時点の予報」は、
+# すべての発表を残した場合と同じ結果になる
+PARTITION_PREFIX = 'forecast_revisions_'
+PARTITION_SQL = '''
+CREATE TABLE IF NOT EXISTS {name} (
+    area_code TEXT NOT NULL,
+    forecast_day INTEGER NOT NULL,
+    fetched_at TEXT NOT NULL,
+    weather_code INTEGER,
+    temp_min INTEGER,
+    temp_max INTEGER,
+    PRIMARY KEY (area_code, forecast_day, fetched_at)
+) WITHOUT ROWID;
+'''
+PARTITION_RE = re.compile(r'^' + PARTITION_PREFIX + r'(\d{4})(\d{2})$')
+
+# 圧縮を終えた月のテーブル名（終わった月は1回だけ圧縮する）
+COMPACTED_SQL = 'CREATE TABLE IF NOT EXISTS archive_compacted (name TEXT PRIMARY KEY) WITHOUT ROWID;'
+
+
+# 日番号からその月の履歴テーブル名を求める関数
+def partition_name(day):
+    d = date.fromordinal(day)
+    return f'{PARTITION_PREFIX}{d.year}{d.month:02d}'
+
+
+# 履歴テーブルの一覧を (年, 月, テーブル名) の古い順で返す関数
+def list_partitions(conn):
+    names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", (PARTITION_PREFIX + '%',))]
+    partitions = []
+    for name in names:
+        m = PARTITION_RE.match(name)
+        if m:
+            partitions.append((int(m.group(1)), int(m.group(2)), name))
+    return sorted(partitions)
+
+
+# 履歴を追加する関数（呼び出し側のトランザクションの中で実行する）
+# rows は db.forecast_rows と同じ (area_code, forecast_day, weather_code, temp_min, temp_max, fetched_at)
+def append_revisions(conn, rows):
+    by_partition = {}
+    for area_code, day, code, tmin, tmax, fetched_at in rows:
+        by_partition.setdefault(partition_name(day), []).append((area_code, day, fetched_at, code, tmin, tmax))
+
+    current = partition_name(date.today().toordinal())
+    for name, part_rows in by_partition.items():
+        conn.execute(PARTITION_SQL.format(name=name))
+        conn.executemany(
+            f'INSERT OR IGNORE INTO {name} (area_code, forecast_day, fetched_at, weather_code, temp_min, temp_max) VALUES (?, ?, ?, ?, ?, ?)',
+            part_rows
+        )
+        # 終わった月に行が増えたとき（古い記録の再生など）は、次の後片付けでもう一度圧縮する
+        if name < current:
+            conn.execute(COMPACTED_SQL)
+            conn.execute('DELETE FROM archive_compacted WHERE name = ?', (name,))
+
+
+def _as_text(as_of):
+    return as_of.isoformat() if isinstance(as_of, datetime) else as_of
+
+
+# 「時刻 as_of の時点で見えていた、ある日の予報」を返す関数
+def forecast_as_of(conn, area_code, day, as_of):
+    name = partition_name(day)
+    if not any(p[2] == name for p in list_partitions(conn)):
+        return None
+
+    row = conn.execute(
+        f'''
+        SELECT fetched_at, weather_code, temp_min, temp_max
+        FROM {name}
+        WHERE area_code = ? AND forecast_day = ? AND fetched_at <= ?
+        ORDER BY fetched_at DESC
+        LIMIT 1
+        ''',
+        (area_code, day, _as_text(as_of))
+    ).fetchone()
+    if row is None:
+        return None
+
+    fetched_at, code, tmin, tmax = row
+    return {"fetched_at": fetched_at, "weather_code": code, "min": tmin, "max": tmax}
+
+
+# ある日の予報の発表履歴をすべて返す関数（古い順）
+def list_revisions(conn, area_code, day):
+    name = partition_name(day)
+    if not any(p[2] == name for p in list_partitions(conn)):
+        return []
+
+    return [
+        {"fetched_at": fetched_at, "weather_code": code, "min": tmin, "max": tmax}
+        for fetched_at, code, tmin, tmax in conn.execute(
+            f'SELECT fetched_at, weather_code, temp_min, temp_max FROM {name} WHERE area_code = ? AND forecast_day = ? ORDER BY fetched_at',
+            (area_code, day)
+        )
+    ]
+
+
+# 保存期間を過ぎた月のテーブルを削除する関数
+def roll_off(conn, keep_months=KEEP_MONTHS, today=None):
+    today = today or date.today()
+    current = today.year * 12 + today.month - 1
+    dropped = []
+    for year, month, name in list_partitions(conn):
+        if current - (year * 12 + month - 1) >= keep_months:
+            conn.execute(f'DROP TABLE {name};')
+            dropped.append(name)
+    if dropped:
+        conn.execute(COMPACTED_SQL)
+        conn.executemany('DELETE FROM archive_compacted WHERE name = ?', [(name,) for name in dropped])
+    return dropped
+
+
+# 終わった月のテーブルから、直前の発表と内容が同じ行を削除する関数
+# （予報が変わった時点の行だけが残るので、「時刻Tの時点の予報」の結果は変わらない）
+# 圧縮した月は archive_compacted に記録し、次からは読み直さない（取り込みのたびに全部の月を調べない）
+def compact(conn, today=None):
+    today = today or date.today()
+    conn.execute(COMPACTED_SQL)
+    done = {name for (name,) in conn.execute('SELECT name FROM archive_compacted')}
+    removed = 0
+    for year, month, name in list_partitions(conn):
+        if (year, month) >= (today.year, today.month) or name in done:
+            continue
+        cur = conn.execute(
+            f'''
+            DELETE FROM {name}
+            WHERE (area_code, forecast_day, fetched_at) IN (
+                SELECT area_code, forecast_day, fetched_at
+                FROM (
+                    SELECT
+                        area_code, forecast_day, fetched_at,
+                        LAG(fetched_at) OVER w IS NOT NULL
+                            AND weather_code IS LAG(weather_code) OVER w
+                            AND temp_min IS LAG(temp_min) OVER w
+                            AND temp_max IS LAG(temp_max) OVER w AS same
+                    FROM {name}
+                    WINDOW w AS (PARTITION BY area_code, forecast_day ORDER BY fetched_at)
+                )
+                WHERE same
+            )
+            '''
+        )
+        removed += cur.rowcount
+        conn.execute('INSERT INTO archive_compacted (name) VALUES (?)', (name,))
+    return removed
+
+
+# 取り込みのあとに実行する後片付け（古い月の削除と圧縮）
+def maintain(conn, keep_months=KEEP_MONTHS, today=None):
+    with conn:
+        dropped = roll_off(conn, keep_months, today)
+        removed = compact(conn, today)
+    return dropped, removed
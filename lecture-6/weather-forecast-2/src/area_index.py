@@ -0,0 +1,95 @@
+# 地域の階層（地方 → 府県予報区 → 一次細分区域 → 市町村等をまとめた地域 → 市町村等）をメモリ上に持つ索引
+#
+# area.json（または load_area_json_from_db の結果）から起動時に1回だけ作る（地域データを更新したら load し直す）。
+# 親 → 子、子 → 親、コード → 根からの経路を辞書で持つので、どれも1回の辞書引きで済む。
+#
+#   index = AreaIndex(area_json)
+#   index.children("130000", "class10")   東京都の一次細分区域
+#   index.path("1310100")                 ("010300", "130000", "130010", "130011", "1310100")
+
+# area.json のキーと、area_master に保存する種類（上の階層から順に）
+LEVELS = (
+    ("centers", "center"),
+    ("offices", "office"),
+    ("class10s", "class10"),
+    ("class15s", "class15"),
+    ("class20s", "class20"),
+)
+
+
+class AreaIndex:
+    def __init__(self, area_json=None):
+        self.load(area_json or {})
+
+    def load(self, area_json):
+        self.names = {}
+        self.types = {}
+        self.parents = {}
+        self.children_of = {}
+        for key, area_type in LEVELS:
+            for code, data in area_json.get(key, {}).items():
+                # 府県予報区と一次細分区域が同じコードのこともある（奄美地方など）ので、上の階層を優先する
+                if code in self.types:
+                    continue
+                self.names[code] = data["name"]
+                self.types[code] = area_type
+                for child in data.get("children", []):
+                    if child != code and child not in self.parents:
+                        self.parents[child] = code
+                        self.children_of.setdefault(code, []).append(child)
+        self.paths = self._build_paths()
+
+    # 根（親のない地域）から順にたどって、すべての地域の経路を作る
+    def _build_paths(self):
+        paths = {}
+        stack = [(code, (code,)) for code in self.types if code not in self.parents]
+        while stack:
+            code, path = stack.pop()
+            paths[code] = path
+            for child in self.children_of.get(code, ()):
+                stack.append((child, path + (child,)))
+        return paths
+
+    def __contains__(self, code):
+        return code in self.types
+
+    def __len__(self):
+        return len(self.types)
+
+    def name(self, code):
+        return self.names.get(code)
+
+    def area_type(self, code):
+        return self.types.get(code)
+
+    def parent(self, code):
+        return self.parents.get(code)
+
+    # 子の地域コードのリスト（area_type を指定すると、その種類の子だけ）
+    def children(self, code, area_type=None):
+        children = self.children_of.get(code, [])
+        if area_type is None:
+            return list(children)
+        return [child for child in children if self.types.get(child) == area_type]
+
+    # 根からその地域までのコードのタプル（索引にない地域は空のタプル）
+    def path(self, code):
+        return self.paths.get(code, ())
+
+    # 子孫の地域コードのリスト（area_type を指定すると、その種類の子孫だけ）
+    def descendants(self, code, area_type=None):
+        found = []
+        stack = list(reversed(self.children_of.get(code, [])))
+        while stack:
+            child = stack.pop()
+            if area_type is None or self.types.get(child) == area_type:
+                found.append(child)
+            stack.extend(reversed(self.children_of.get(child, [])))
+        return found
+
+    # その地域を含む府県予報区のコード（なければ None）
+    def office_of(self, code):
+        for ancestor in self.path(code):
+            if self.types[ancestor] == "office":
+                return ancestor
+        return None
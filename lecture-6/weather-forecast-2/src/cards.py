@@ -0,0 +1,287 @@
+import flet as ft
+
+from weather_codes import weather_info
+
+# カードの見た目（大：直近の日、小：それ以降の日）
+BIG_STYLE = {
+    "width": 260, "height": 280, "padding": 25, "border_radius": 30, "spacing": 15,
+    "blur": 15, "opacity": 0.2, "offset": 6,
+    "date_size": 20, "date_color": None, "icon_size": 56, "temp_size": 18, "temp_spacing": 5,
+    "weather": {"size": 20, "weight": ft.FontWeight.W_500},
+    "unit": "℃",
+}
+SMALL_STYLE = {
+    "width": 135, "height": 135, "padding": 12, "border_radius": 22, "spacing": 5,
+    "blur": 10, "opacity": 0.15, "offset": 4,
+    "date_size": 11, "date_color": ft.Colors.GREY_600, "icon_size": 24, "temp_size": 12, "temp_spacing": 4,
+    "weather": {"size": 11, "text_align": "center", "max_lines": 1},
+    "unit": "°",
+}
+
+
+# 値が変わったときだけ書き換えて、書き換えたコントロールを changed に記録する関数
+def patch(control, name, value, changed):
+    if getattr(control, name) != value:
+        setattr(control, name, value)
+        changed[id(control)] = control
+
+
+# 1日分のカード
+# コントロールは最初に1回だけ作り、表示する日が変わったら文字・アイコン・表示/非表示だけを書き換える
+class DayCard:
+    def __init__(self, style):
+        self.style = style
+        self.date = ft.Text("", size=style["date_size"], color=style["date_color"], weight="bold")
+        self.icon_row = ft.Row([], alignment=ft.MainAxisAlignment.CENTER)
+        self.weather = ft.Text("", **style["weather"])
+        self.temp_min = ft.Text("", size=style["temp_size"], weight="bold", color=ft.Colors.BLUE)
+        self.temp_max = ft.Text("", size=style["temp_size"], weight="bold", color=ft.Colors.RED)
+        self.container = ft.Container(
+            width=style["width"], height=style["height"], padding=style["padding"], border_radius=style["border_radius"],
+            bgcolor=ft.Colors.WHITE, visible=False,
+            shadow=ft.BoxShadow(blur_radius=style["blur"], color=ft.Colors.with_opacity(style["opacity"], ft.Colors.BLACK), offset=ft.Offset(0, style["offset"])),
+            content=ft.Column(
+                alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=style["spacing"],
+                controls=[
+                    self.date,
+                    self.icon_row,
+                    self.weather,
+                    # 気温：Rowを使って色分け
+                    ft.Row(
+                        alignment=ft.MainAxisAlignment.CENTER,
+                        spacing=style["temp_spacing"],
+                        controls=[self.temp_min, ft.Text("/", size=style["temp_size"], weight="bold"), self.temp_max],
+                    ),
+                ],
+            ),
+        )
+
+    # カードの中身を data に合わせる
+    def set(self, data, changed):
+        unit = self.style["unit"]
+        patch(self.container, "visible", True, changed)
+        patch(self.date, "value", data["date"], changed)
+        patch(self.weather, "value", data["weather"], changed)
+        patch(self.temp_min, "value", f"{data['min']}{unit}", changed)
+        patch(self.temp_max, "value", f"{data['max']}{unit}", changed)
+
+        # アイコンの数が足りなければ増やし、余った分は隠す
+        icons = data["icons"]
+        if len(self.icon_row.controls) < len(icons):
+            while len(self.icon_row.controls) < len(icons):
+                self.icon_row.controls.append(ft.Text("", size=self.style["icon_size"], visible=False))
+            changed[id(self.icon_row)] = self.icon_row
+        for i, icon_text in enumerate(self.icon_row.controls):
+            if i < len(icons):
+                patch(icon_text, "value", icons[i], changed)
+                patch(icon_text, "visible", True, changed)
+            else:
+                patch(icon_text, "visible", False, changed)
+
+    def hide(self, changed):
+        patch(self.container, "visible", False, changed)
+
+
+# 7日分のカードをまとめた表示
+# 地域や日付を切り替えても作り直さないので、更新で送られるのは変わったプロパティだけになる
+class ForecastView:
+    def __init__(self):
+        self.title = ft.Text("", size=22, weight="bold", visible=False)
+        self.message = ft.Text("", color=ft.Colors.RED, visible=False)
+        self.today = DayCard(BIG_STYLE)
+        self.small = [DayCard(SMALL_STYLE) for _ in range(6)]
+        self.layout = ft.Row(
+            spacing=20,
+            vertical_alignment=ft.CrossAxisAlignment.START,
+            visible=False,
+            controls=[
+                self.today.container,
+                ft.Column(
+                    spacing=10,
+                    controls=[
+                        ft.Row(spacing=15, controls=[card.container for card in self.small[:3]]),
+                        ft.Row(spacing=15, controls=[card.container for card in self.small[3:]]),
+                    ],
+                ),
+            ],
+        )
+        self.control = ft.Column(spacing=20, controls=[self.title, self.message, self.layout])
+
+    def _set_title(self, title, changed):
+        patch(self.title, "value", title, changed)
+        patch(self.title, "visible", True, changed)
+
+    # 7日分を表示する（変わったコントロールのリストを返す）
+    def show_days(self, title, days):
+        changed = {}
+        self._set_title(title, changed)
+        patch(self.message, "visible", False, changed)
+        patch(self.layout, "visible", True, changed)
+        self.today.set(days[0], changed)
+        for i, card in enumerate(self.small, start=1):
+            if i < len(days):
+                card.set(days[i], changed)
+            else:
+                card.hide(changed)
+        return list(changed.values())
+
+    # 1日分だけを表示する
+    def show_day(self, title, data):
+        return self.show_days(title, [data])
+
+    # カードの代わりにメッセージを表示する
+    def show_message(self, title, message):
+        changed = {}
+        self._set_title(title, changed)
+        patch(self.message, "value", message, changed)
+        patch(self.message, "visible", True, changed)
+        patch(self.layout, "visible", False, changed)
+        return list(changed.values())
+
+    # 何も表示しない
+    def clear(self):
+        changed = {}
+        for control in (self.title, self.message, self.layout):
+            patch(control, "visible", False, changed)
+        return list(changed.values())
+
+
+# 地方の一覧の1日分のマス（日付・アイコン・最低/最高気温）
+CELL_WIDTH = 64
+# 一覧の1行の高さ（ListView の item_extent に使う）
+ROW_HEIGHT = 92
+
+
+class DayCell:
+    def __init__(self):
+        self.date = ft.Text("", size=10, color=ft.Colors.GREY_700)
+        self.icon = ft.Text("", size=18)
+        self.temps = ft.Text("", size=11, weight="bold")
+        self.container = ft.Container(
+            width=CELL_WIDTH, padding=4, border_radius=10, bgcolor=ft.Colors.WHITE,
+            content=ft.Column(spacing=2, horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                              controls=[self.date, self.icon, self.temps]),
+        )
+
+    def set(self, data, changed):
+        patch(self.container, "visible", True, changed)
+        patch(self.container, "bgcolor", weather_info(data["weather_code"]).bgcolor, changed)
+        patch(self.container, "tooltip", data["weather"], changed)
+        # "YYYY/MM/DD" の月日だけを出す
+        patch(self.date, "value", data["date"][5:], changed)
+        patch(self.icon, "value", data["icons"][0], changed)
+        patch(self.temps, "value", f"{data['min']}/{data['max']}", changed)
+
+    def hide(self, changed):
+        patch(self.container, "visible", False, changed)
+
+
+# 地方の一覧の1行（地域名と7日分のマス）
+class RegionRow:
+    def __init__(self, on_select):
+        self.office_code = None
+        self.name = ft.Text("", size=14, weight="bold", width=110)
+        self.message = ft.Text("予報なし", size=12, color=ft.Colors.GREY_600, visible=False)
+        self.cells = [DayCell() for _ in range(7)]
+        self.container = ft.Container(
+            height=ROW_HEIGHT, padding=ft.padding.symmetric(horizontal=10, vertical=6), border_radius=14,
+            bgcolor=ft.Colors.GREY_50, ink=on_select is not None,
+            on_click=(lambda e: on_select(self.office_code)) if on_select is not None else None,
+            content=ft.Row(spacing=6, controls=[self.name, self.message] + [cell.container for cell in self.cells]),
+        )
+
+    def set(self, office_code, name, days, changed):
+        self.office_code = office_code
+        patch(self.name, "value", name, changed)
+        patch(self.message, "visible", not days, changed)
+        for i, cell in enumerate(self.cells):
+            if i < len(days):
+                cell.set(days[i], changed)
+            else:
+                cell.hide(changed)
+
+
+# 地方に属する都道府県（または都道府県に属する一次細分区域）の7日間をまとめて表示する一覧
+# on_select を渡すと、行を押したときにその地域コードで呼ばれる
+# ListView は見えている行だけを描くので、行が多くてもスクロールは重くならない
+# 行のコントロールは使い回し、切り替え時は変わったプロパティだけを送る
+class RegionView:
+    def __init__(self, on_select=None, height=420):
+        self.on_select = on_select
+        self.title = ft.Text("", size=22, weight="bold")
+        self.rows = []
+        self.list = ft.ListView(spacing=8, item_extent=ROW_HEIGHT + 8, height=height, build_controls_on_demand=True)
+        self.control = ft.Column(spacing=10, visible=False, controls=[self.title, self.list])
+
+    # 一覧を表示する（region は [(地域コード, 地域名, 7日分), ...]。変わったコントロールのリストを返す）
+    def show(self, title, region):
+        changed = {}
+        patch(self.control, "visible", True, changed)
+        patch(self.title, "value", title, changed)
+        while len(self.rows) < len(region):
+            self.rows.append(RegionRow(self.on_select))
+        for row, (office_code, name, days) in zip(self.rows, region):
+            row.set(office_code, name, days, changed)
+        # 行数が変わったときだけ ListView の中身を差し替える
+        controls = [row.container for row in self.rows[:len(region)]]
+        if self.list.controls != controls:
+            self.list.controls = controls
+            changed[id(self.list)] = self.list
+        return list(changed.values())
+
+    def hide(self):
+        changed = {}
+        patch(self.control, "visible", False, changed)
+        return list(changed.values())
+
+
+# 地域ごとの統計（analytics.office_stats の結果）を表で表示する
+STATS_COLUMNS = (
+    ("地域", None),
+    ("日数", "days"),
+    ("最低", "min"),
+    ("最高", "max"),
+    ("平均最低", "mean_min"),
+    ("平均最高", "mean_max"),
+    ("予報の変化率", "change_rate"),
+)
+
+
+class StatsView:
+    def __init__(self):
+        self.title = ft.Text("", size=18, weight="bold")
+        self.rows = []
+        self.table = ft.DataTable(
+            column_spacing=24, heading_row_height=36, data_row_min_height=32, data_row_max_height=32,
+            columns=[ft.DataColumn(ft.Text(label), numeric=key is not None) for label, key in STATS_COLUMNS],
+        )
+        self.control = ft.Column(spacing=10, visible=False, controls=[self.title, self.table])
+
+    # stats は [(地域名, office_stats の1行), ...]（変わったコントロールのリストを返す）
+    def show(self, title, stats):
+        changed = {}
+        patch(self.control, "visible", bool(stats), changed)
+        patch(self.title, "value", title, changed)
+        while len(self.rows) < len(stats):
+            self.rows.append(ft.DataRow(cells=[ft.DataCell(ft.Text("")) for _ in STATS_COLUMNS]))
+        for row, (name, values) in zip(self.rows, stats):
+            for cell, (_, key) in zip(row.cells, STATS_COLUMNS):
+                if key is None:
+                    text = name
+                elif values[key] is None:
+                    text = "-"
+                elif key == "change_rate":
+                    text = f"{values[key]}%"
+                else:
+                    text = str(values[key])
+                patch(cell.content, "value", text, changed)
+        rows = self.rows[:len(stats)]
+        if self.table.rows != rows:
+            self.table.rows = rows
+            changed[id(self.table)] = self.table
+        return list(changed.values())
+
+    def hide(self):
+        changed = {}
+        patch(self.control, "visible", False, changed)
+        return list(changed.values())
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from archive import append_revisions
+from latest_view import rebuild_latest
+from metrics import METRICS
+from migrate import migrate
+from query_cache import FORECAST_CACHE
+
+# SQLite3の設定
+DB_NAME = 'weather.db'
+
+
+# 書き込み用の接続を作る関数
+# WALにすると読み込みと書き込みが互いにブロックしなくなり、
+# synchronous=NORMAL ならコミットごとのfsyncも不要になる
+def connect(db_name=DB_NAME):
+    conn = sqlite3.connect(db_name)
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute('PRAGMA synchronous=NORMAL;')
+    return conn
+
+
+# DB の内容が変わったかを見分けるキー（別のプロセスが書き込んでも変わる）
+# WAL モードでは書き込みがまず -wal ファイルに入るので、そちらの更新時刻とサイズも含める
+def db_signature(db_name=DB_NAME):
+    signature = []
+    for path in (db_name, f"{db_name}-wal"):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        # 空の -wal ファイルは読み込みの接続が作るだけなので、ないのと同じに扱う
+        signature.append((st.st_mtime_ns, st.st_size) if st.st_size else None)
+    return tuple(signature)
+
+
+# 接続しているDBファイルのパス
+def db_path(conn):
+    return conn.execute('PRAGMA database_list;').fetchone()[2]
+
+
+# このプロセスでの書き込みを囲む。書き込んだあとの DB を FORECAST_CACHE に伝え、
+# 自分の書き込みでほかの地域のキャッシュまで捨てないようにする（別のプロセスの書き込みなら、読むときにすべて捨てる）
+@contextmanager
+def tracked_write(conn):
+    path = db_path(conn)
+    before = db_signature(path)
+    try:
+        yield
+    finally:
+        FORECAST_CACHE.wrote(path, before, db_signature(path))
+
+
+# テーブルを作成する関数
+def create_tables(conn):
+    cur = conn.cursor()
+    # エリアを保存するテーブルの作成
+    cur.execute('CREATE TABLE IF NOT EXISTS area_master (area_code TEXT PRIMARY KEY,area_name TEXT,area_type TEXT);')
+    cur.execute('CREATE TABLE IF NOT EXISTS area_relation (parent_code TEXT,child_code TEXT,PRIMARY KEY (parent_code, child_code),FOREIGN KEY (parent_code) REFERENCES area_master(area_code),FOREIGN KEY (child_code) REFERENCES area_master(area_code));')
+    conn.commit()
+    # 気象データを保存するテーブルは migrate.py で作成・移行する
+    migrate(conn)
+
+
+# 日付文字列 "YYYY-MM-DD..." を整数の日番号に変換する関数
+def to_day(date_text):
+    return datetime.fromisoformat(date_text).date().toordinal()
+
+
+# 日番号を日付文字列 "YYYY-MM-DD" に戻す関数
+def from_day(day):
+    return date.fromordinal(day).isoformat()
+
+
+# 1地域分の予報を forecasts テーブルの行（タプル）に変換する関数
+def forecast_rows(office_code, dates, codes, temps_min, temps_max, fetched_at=None):
+    if fetched_at is None:
+        fetched_at = datetime.now().isoformat()
+
+    rows = []
+    for i in range(len(dates)):
+        tmin = temps_min[i] if i < len(temps_min) and isinstance(temps_min[i], int) else None
+        tmax = temps_max[i] if i < len(temps_max) and isinstance(temps_max[i], int) else None
+
+        rows.append((
+            office_code,
+            to_day(dates[i]),
+            int(codes[i]),
+            tmin,
+            tmax,
+            fetched_at
+        ))
+    return rows
+
+
+# 行を書き込む関数（呼び出し側のトランザクションの中で実行する。コミットしたあとに forecasts_saved を呼ぶこと）
+# forecasts には最新の予報だけを上書きで残し、発表ごとの履歴は archive.py の月別テーブルに追記する
+# 書き換えた地域の表示用の行（latest_view.py）も作り直す
+def write_forecast_rows(conn, rows):
+    conn.executemany(
+        '''
+        INSERT OR REPLACE INTO forecasts (
+            area_code,
+            forecast_day,
+            weather_code,
+            temp_min,
+            temp_max,
+            fetched_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        rows
+    )
+    append_revisions(conn, rows)
+    # 表示用の最新7日分も同じトランザクションで作り直す
+    rebuild_latest(conn, {row[0] for row in rows})
+
+
+# 保存をコミットしたあとの後始末（書き換えた地域の表示用キャッシュだけを捨てて、件数を記録する）
+def forecasts_saved(rows):
+    FORECAST_CACHE.invalidate({row[0] for row in rows})
+    METRICS.inc("rows_saved", n=len(rows))
+
+
+# 複数地域分の行を1トランザクションでまとめて保存する関数
+def save_forecast_rows(conn, rows):
+    with METRICS.timer("save"), tracked_write(conn), conn:
+        write_forecast_rows(conn, rows)
+    forecasts_saved(rows)
+    return len(rows)
+
+
+# 保存済みの値（天気コード・最低気温・最高気温）と違う行だけを返す関数
+def changed_rows(conn, rows):
+    codes = sorted({row[0] for row in rows})
+    current = {}
+    # SQLite の変数の上限を超えないよう、地域コードを分けて問い合わせる
+    for i in range(0, len(codes), 500):
+        chunk = codes[i:i + 500]
+        current.update(
+            ((area_code, day), values)
+            for area_code, day, *values in conn.execute(
+                f'SELECT area_code, forecast_day, weather_code, temp_min, temp_max FROM forecasts WHERE area_code IN ({",".join("?" * len(chunk))})',
+                chunk
+            )
+        )
+    return [row for row in rows if current.get((row[0], row[1])) != list(row[2:5])]
+
+
+# 保存済みの値と違う行だけを保存する関数（保存した行数を返す）
+# 同じ予報が続くあいだは、forecasts・履歴・表示用キャッシュのどれにも触れない
+# （履歴に残るのも値が変わった行だけになる。archive.py を参照）
+# write_also(conn) を渡すと、同じトランザクションの中で続けて実行する（取り込み状態の保存など）
+def save_changed_rows(conn, rows, write_also=None):
+    with METRICS.timer("save"), tracked_write(conn), conn:
+        # 比べてから書き込むまでのあいだに、別のプロセスに書き換えられないようにする
+        conn.execute('BEGIN IMMEDIATE;')
+        changed = changed_rows(conn, rows)
+        if changed:
+            write_forecast_rows(conn, changed)
+        if write_also is not None:
+            write_also(conn)
+    if changed:
+        forecasts_saved(changed)
+    return len(changed)
+
+
+# 天気情報をDBに保存する関数（1地域分）
+def save_forecast_to_db(office_code, dates, codes, temps_min, temps_max, conn=None, db_name=DB_NAME):
+    rows = forecast_rows(office_code, dates, codes, temps_min, temps_max)
+    if conn is not None:
+        return save_forecast_rows(conn, rows)
+
+    conn = connect(db_name)
+    try:
+        return save_forecast_rows(conn, rows)
+    finally:
+        conn.close()
@@ -0,0 +1,131 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from db import DB_NAME
+
+# 表示用の読み出しで使う、読み込み専用の接続プール
+#
+# 呼び出しのたびに sqlite3.connect すると、ファイルを開く・スキーマを読む・SQLを準備する、を毎回やり直す。
+# プールの接続は使い回すので、同じSQLなら準備済みの文（cached_statements）がそのまま使われる。
+#
+#   with get_pool(db_name).connection() as conn:
+#       conn.execute(...)
+
+POOL_SIZE = 4
+# 接続ごとに覚えておく準備済みのSQLの数（sqlite3 の既定は 128）
+CACHED_STATEMENTS = 256
+# メモリマップで読む大きさ（バイト）
+MMAP_SIZE = 64 * 1024 * 1024
+# 空きがないときに待つ秒数
+CHECKOUT_TIMEOUT = 5
+
+
+class ReadPool:
+    def __init__(self, db_name=DB_NAME, size=POOL_SIZE, cached_statements=CACHED_STATEMENTS, mmap_size=MMAP_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.closed = False
+
+    # 読み込み専用の接続を開く（書き込みはSQLiteが拒否する）
+    def _open(self):
+        uri = f"file:{os.path.abspath(self.db_name)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute('PRAGMA query_only = ON;')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)};')
+        return conn
+
+    # 接続を借りて、ブロックを抜けたら返す
+    @contextmanager
+    def connection(self):
+        conn = self._checkout()
+        returned = False
+        try:
+            yield conn
+            # 読み出しの途中で抜けても、次に借りる人に読みかけのトランザクションを残さない
+            if conn.in_transaction:
+                conn.rollback()
+            returned = True
+            self._checkin(conn)
+        finally:
+            if not returned:
+                # 例外で抜けたときは（DBのエラーでもそれ以外でも）、状態のわからない接続を返さずに閉じる
+                self._discard(conn)
+
+    def _checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.closed:
+                raise sqlite3.ProgrammingError("pool is closed")
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except BaseException:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        try:
+            return self.idle.get(timeout=CHECKOUT_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f"no free connection for {self.db_name}") from None
+
+    def _checkin(self, conn):
+        with self.lock:
+            closed = self.closed
+        if closed:
+            self._discard(conn)
+        else:
+            self.idle.put(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        finally:
+            with self.lock:
+                self.opened -= 1
+
+    # 使っていない接続をすべて閉じる（貸し出し中の接続は返されたときに閉じる）
+    def close(self):
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+# DBファイルごとのプール
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(db_name=DB_NAME):
+    key = os.path.abspath(db_name)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = ReadPool(db_name)
+        return pool
+
+
+# すべてのプールを閉じる関数（DBファイルを置き換える前などに使う）
+def close_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
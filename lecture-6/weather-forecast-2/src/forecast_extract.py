@@ -0,0 +1,126 @@
+import re
+
+# 予報JSONから必要な値（日付・天気コード・気温）を地域ごとに取り出す処理
+#
+# 本文は取り込み（pipeline.py）で json.loads してから渡す。
+# 発表時刻（reportDatetime）だけは、前回と同じ本文かを見分けるために bytes のまま正規表現で読む。
+
+REPORT_DATETIME_RE = re.compile(rb'"reportDatetime"\s*:\s*"([^"]*)"')
+
+
+def _to_int(values):
+    return [int(t) if t not in ("", None) else None for t in values]
+
+
+# 今日の気温（最小・最大）を天気予報データから探す関数
+def find_today_temps(forecast):
+    for ts in forecast[0]["timeSeries"]:
+        for area in ts.get("areas", []):
+            if "temps" in area:
+                temps = [int(t) for t in area["temps"] if t not in ("", None)]
+                if temps:
+                    return min(temps), max(temps)
+    return None, None
+
+
+# 本文（bytes）の中で一番新しい発表時刻（reportDatetime）を返す関数（なければ None）
+def report_datetime(payload):
+    values = REPORT_DATETIME_RE.findall(payload)
+    return max(values).decode("ascii") if values else None
+
+
+# 日付ごとに (日付, 天気コード, 最低気温, 最高気温) のリストに整理する関数
+# 当日は実測の気温、翌日以降は予報の気温を使う
+def merge_fields(fields):
+    if fields is None:
+        return None
+    dates, codes, temps_min, temps_max, today_min, today_max = fields
+
+    save_mins = []
+    save_maxs = []
+    for i in range(len(dates)):
+        if i == 0:
+            # 当日
+            save_mins.append(today_min)
+            save_maxs.append(today_max)
+        else:
+            # 翌日以降
+            save_mins.append(temps_min[i] if i < len(temps_min) else None)
+            save_maxs.append(temps_max[i] if i < len(temps_max) else None)
+
+    return dates, codes[:len(dates)], save_mins, save_maxs
+
+
+# --- 一次細分区域（class10）ごとの予報 ---
+#
+# 週間予報の地域は、同じ並びの観測地点の気温と組にする（数が合わないときは先頭の地域だけ）。
+# 週間予報にない地域は、今日〜明後日の予報の天気コードだけを使う（気温はなし）。
+# 先頭の地域の値は、これまでの事務所単位の予報（週間予報の最初の地域と観測地点）と同じになる。
+
+
+# 今日の気温の配列から (最低気温, 最高気温) を求める関数（値がなければ None）
+def _today_range(values):
+    temps = [int(t) for t in values if t not in ("", None)]
+    return (min(temps), max(temps)) if temps else None
+
+
+# 地域ごとの値を組み立てる関数
+#   weekly: 週間予報の timeSeries（読み込み済み）
+#   short_dates, short_codes: 今日〜明後日の日付と、地域コード -> 天気コード
+#   today: 観測地点コード -> 今日の (最低気温, 最高気温)
+#   office_today: 先頭の地域に使う今日の (最低気温, 最高気温)
+def _area_fields(weekly, short_dates, short_codes, today, office_today):
+    weather_ts = weekly[0]
+    temp_ts = None
+    for ts in weekly:
+        if any("tempsMin" in area and "tempsMax" in area for area in ts.get("areas", [])):
+            temp_ts = ts
+            break
+
+    areas = weather_ts["areas"]
+    stations = temp_ts["areas"] if temp_ts else []
+    result = []
+    for i, area in enumerate(areas):
+        station = stations[i] if i < len(stations) and (i == 0 or len(stations) == len(areas)) else None
+        temps_min = _to_int(station.get("tempsMin", [])) if station else []
+        temps_max = _to_int(station.get("tempsMax", [])) if station else []
+        if i == 0:
+            today_min, today_max = office_today
+        else:
+            today_min, today_max = today.get(station["area"]["code"], (None, None)) if station else (None, None)
+        result.append((area["area"]["code"], (weather_ts["timeDefines"], area["weatherCodes"], temps_min, temps_max, today_min, today_max)))
+
+    seen = {code for code, _ in result}
+    for code, codes in short_codes.items():
+        if code not in seen:
+            result.append((code, (short_dates, codes, [], [], None, None)))
+    return result
+
+
+# 読み込み済みの予報JSONから、地域ごとに
+# [(地域コード, (日付, 天気コード, 最低気温, 最高気温, 今日の最低気温, 今日の最高気温)), ...] を取り出す関数
+# 予報が提供されていない地域は None を返す
+def area_fields(forecast):
+    if not forecast or "timeSeries" not in forecast[0]:
+        return None
+
+    short_dates, short_codes, today = [], {}, {}
+    for ts in forecast[0]["timeSeries"]:
+        for area in ts.get("areas", []):
+            if "weatherCodes" in area:
+                short_dates = ts["timeDefines"]
+                short_codes.setdefault(area["area"]["code"], area["weatherCodes"])
+            if "temps" in area:
+                temps = _today_range(area["temps"])
+                if temps:
+                    today.setdefault(area["area"]["code"], temps)
+    return _area_fields(forecast[1]["timeSeries"], short_dates, short_codes, today, find_today_temps(forecast))
+
+
+# 読み込み済みの予報JSONから、地域ごとに [(地域コード, (日付, 天気コード, 最低気温, 最高気温)), ...] を取り出す関数
+# 予報が提供されていない地域は None を返す
+def parse_areas(forecast):
+    areas = area_fields(forecast)
+    if areas is None:
+        return None
+    return [(code, merge_fields(fields)) for code, fields in areas]
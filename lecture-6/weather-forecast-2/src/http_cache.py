@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+# このファイルは lecture-5/weather-forecast/src と lecture-6/weather-forecast-2/src に同じ内容で置いてある
+# （Flet のアプリはそれぞれ自分の src/ だけをまとめて配布するので、アプリの外のモジュールは import できない）
+# 片方を直したら、もう片方も同じに直すこと（2つのファイルは1バイトも違わないようにしておく）
+
+# キャッシュの保存先（アプリの storage/ の下。Fletの storage/ は .gitignore 済み）
+# カレントディレクトリではなく、このファイルのあるアプリのディレクトリを基準にする
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "http_cache")
+# この秒数以内に取得したものはサーバーに問い合わせずにそのまま使う
+TTL = 600
+# キャッシュ全体の上限サイズ（バイト）。超えたら古く使われたものから消す
+MAX_BYTES = 20 * 1024 * 1024
+TIMEOUT = 10
+
+# 304（更新なし）やTTL内だったことを表す目印
+NOT_MODIFIED = object()
+
+
+# ETag / Last-Modified 付きでレスポンス本体をディスクに保存するクラス
+class HttpCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TTL, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # キャッシュ全体の大きさ（最初の保存のときにディレクトリを数えて求める）
+        self.total = None
+        # ディレクトリは最初に保存するときに作る（作るだけでディスクに触れないように）
+        self.created = False
+
+    # URLから保存ファイルのパス（本体, メタ情報）を求める
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".body", base + ".meta"
+
+    # メタ情報を読み込む（なければ None）
+    def lookup(self, url):
+        body_path, meta_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            # メタ情報ファイルの更新時刻を最後に取得・再検証した時刻として使う
+            meta["stored_at"] = os.path.getmtime(meta_path)
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta):
+        return meta is not None and time.time() - meta["stored_at"] < self.ttl
+
+    # 条件付きGET用のヘッダーを作る
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta is None:
+            return headers
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load_body(self, url):
+        body_path, _ = self._paths(url)
+        with open(body_path, "rb") as f:
+            return f.read()
+
+    def load_json(self, url):
+        return json.loads(self.load_body(url))
+
+    # 200 のレスポンスを保存する
+    def store(self, url, response):
+        body = response.content
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(body),
+        }
+        body_path, meta_path = self._paths(url)
+        with self.lock:
+            if not self.created:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.created = True
+            try:
+                old_size = os.path.getsize(body_path)
+            except OSError:
+                old_size = 0
+            self._write(body_path, body)
+            self._write(meta_path, json.dumps(meta).encode("utf-8"))
+            # 保存のたびにディレクトリを数え直すと件数の2乗に比例して遅くなるので、
+            # 上限を超えそうなときだけ数え直して削除する
+            if self.total is None or self.total + len(body) - old_size > self.max_bytes:
+                self._evict()
+            else:
+                self.total += len(body) - old_size
+
+    # 304 のときは本体はそのままで、メタ情報ファイルの更新時刻だけ進める
+    def refresh(self, url):
+        _, meta_path = self._paths(url)
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+    # 保存したものを捨てる（304 なのに本体かメタ情報が読めないときなど）
+    def discard(self, url):
+        with self.lock:
+            for path in self._paths(url):
+                try:
+                    size = os.path.getsize(path) if path.endswith(".body") else 0
+                    os.remove(path)
+                except OSError:
+                    continue
+                if self.total is not None:
+                    self.total -= size
+
+    # 書きかけのファイルを読まれないように、一時ファイルに書いてから置き換える
+    def _write(self, path, data):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # 上限サイズを超えた分を、最後に保存・更新した時刻が古いものから削除する
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".meta"):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            body_path = meta_path[:-len(".meta")] + ".body"
+            try:
+                size = os.path.getsize(body_path)
+                used = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            entries.append((used, body_path, meta_path, size))
+            total += size
+
+        entries.sort()
+        for _, body_path, meta_path, size in entries:
+            if total <= self.max_bytes:
+                break
+            for path in (body_path, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self.total = total
+
+
+# キャッシュを使って本文（bytes）を取得する関数（更新がなくても中身を返す）
+def get_body(url, cache, session=None, timeout=TIMEOUT):
+    meta = cache.lookup(url)
+    if cache.is_fresh(meta):
+        return cache.load_body(url)
+
+    getter = session.get if session is not None else requests.get
+    try:
+        res = getter(url, headers=cache.conditional_headers(meta), timeout=timeout)
+    except requests.RequestException:
+        # 通信できないときは古くてもキャッシュを使う
+        if meta is None:
+            raise
+        return cache.load_body(url)
+
+    if res.status_code == 304:
+        try:
+            if meta is not None:
+                body = cache.load_body(url)
+                cache.refresh(url)
+                return body
+        except OSError:
+            pass
+        # 条件を付けていないのに 304 が返ったときや、本体が消えていたときは、キャッシュにないものとして取り直す
+        cache.discard(url)
+        res = getter(url, timeout=timeout)
+        if res.status_code == 304:
+            raise requests.HTTPError(f"304 Not Modified for an unconditional request: {url}", response=res)
+
+    res.raise_for_status()
+    cache.store(url, res)
+    return res.content
+
+
+# キャッシュを使ってJSONを取得する関数（更新がなくても中身を返す）
+def get_json(url, cache, session=None, timeout=TIMEOUT):
+    return json.loads(get_body(url, cache, session, timeout))
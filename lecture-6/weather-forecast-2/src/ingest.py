@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import NOT_MODIFIED
+from metrics import METRICS
+
+# 同時に実行するリクエスト数の上限
+MAX_WORKERS = 8
+# 同一ホストへのリクエスト間隔（秒）
+MIN_INTERVAL = 0.05
+# リトライ回数と待ち時間の基準値（秒）
+RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 10
+
+
+# ホストごとにリクエスト間隔を空けるためのクラス
+class HostRateLimiter:
+    def __init__(self, min_interval=MIN_INTERVAL):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_time = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time.get(host, now))
+            # 次のリクエストが出せる時刻を予約してからロックを外す
+            self.next_time[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# Keep-Aliveで使い回すセッションを作る関数
+def make_session(max_workers=MAX_WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# リトライ付きでJSONを取得する関数
+# cache を渡すと条件付きGETになり、更新がなければ NOT_MODIFIED を返す
+# raw=True なら JSON として読み込まずに本文（bytes）をそのまま返す
+def fetch_json(session, url, limiter, cache=None, retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT, raw=False):
+    meta = cache.lookup(url) if cache is not None else None
+    if cache is not None and cache.is_fresh(meta):
+        return NOT_MODIFIED
+    headers = cache.conditional_headers(meta) if cache is not None else None
+
+    for attempt in range(retries + 1):
+        limiter.wait(url)
+        try:
+            res = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if res.status_code == 304:
+                if meta is not None:
+                    cache.refresh(url)
+                    return NOT_MODIFIED
+                # 条件を付けていないのに 304 が返ったときは、キャッシュにないものとして捨て、条件なしで取り直す
+                if cache is not None:
+                    cache.discard(url)
+                headers = None
+                if attempt == retries:
+                    raise requests.HTTPError(f"304 Not Modified for an unconditional request: {url}", response=res)
+                continue
+            # 5xx と 429 は一時的なエラーとみなしてリトライする
+            if res.status_code < 500 and res.status_code != 429:
+                res.raise_for_status()
+                if cache is not None:
+                    cache.store(url, res)
+                return res.content if raw else res.json()
+            if attempt == retries:
+                res.raise_for_status()
+        # 待ち時間を倍々に伸ばす
+        METRICS.inc("retries", "fetch")
+        time.sleep(backoff * (2 ** attempt))
+
+
+# 複数の地域コードの予報を並列に取得する関数
+# 取得できたものから順に (コード, 予報JSON または NOT_MODIFIED, 例外) を返す
+def fetch_forecasts(codes, url_format, on_progress=None, max_workers=MAX_WORKERS, session=None, cache=None,
+                    min_interval=MIN_INTERVAL, raw=False):
+    codes = list(codes)
+    total = len(codes)
+    limiter = HostRateLimiter(min_interval)
+    own_session = session is None
+    if own_session:
+        session = make_session(max_workers)
+
+    # 1地域分の取得（待ち時間とリトライを含めた時間を地域ごとに記録する）
+    def fetch_one(code):
+        with METRICS.timer("fetch", code):
+            return fetch_json(session, url_format.format(code), limiter, cache, raw=raw)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_one, code): code for code in codes}
+            for done, future in enumerate(as_completed(futures), start=1):
+                code = futures[future]
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                    METRICS.inc("errors", "fetch")
+                if on_progress:
+                    on_progress(done, total, code, error is None)
+                yield code, result, error
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db import DB_NAME
+from http_cache import HttpCache
+from ingest import MAX_WORKERS, MIN_INTERVAL
+from metrics import METRICS
+from pipeline import run_pipeline
+from replay import FixtureBundle, recording_session, replay_session
+
+# GUIを起動せずに取り込みだけを実行するコマンド（cronなどから定期実行する）
+#
+# 使い方:
+#   python ingest_cli.py                          すべての地域を取り込む
+#   python ingest_cli.py --offices 130000,270000  指定した地域だけ
+#   python ingest_cli.py --since 3h               3時間以内に取得済みの地域は飛ばす
+#   python ingest_cli.py --dry-run                取得と解析だけ（DBに書き込まない）
+#   python ingest_cli.py --record jma.json.gz      取得した応答をすべてファイルに記録する
+#   python ingest_cli.py --replay jma.json.gz      記録から取り込む（ネットワークに出ない）
+#   python ingest_cli.py --replay jma.json.gz --latency 0.2 --error-rate 0.1
+#                                                 遅延とエラーを混ぜて再生する
+#   python ingest_cli.py --metrics-json m.json     段階ごと・地域ごとの所要時間と回数を書き出す
+#                        --metrics-prom m.prom     （Prometheus のテキスト形式）
+#
+# 終了コード: 0 = すべて成功、1 = 一部の地域で失敗、2 = 全体が失敗
+
+DURATION_RE = re.compile(r'^(\d+)([mhd])$')
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+# --since の値（"30m" / "6h" / "1d" または ISO形式の日時）を日時に変換する関数
+def parse_since(text):
+    m = DURATION_RE.match(text)
+    if m:
+        return datetime.now() - timedelta(**{DURATION_UNITS[m.group(2)]: int(m.group(1))})
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid --since value: {text!r}")
+
+
+def parse_offices(text):
+    return [code.strip() for code in text.split(",") if code.strip()]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="気象庁の天気予報を weather.db に取り込む")
+    parser.add_argument("--db", default=DB_NAME, help="DBファイルのパス")
+    parser.add_argument("--offices", type=parse_offices, default=None, help="取り込む地域コード（カンマ区切り）")
+    parser.add_argument("--concurrency", type=int, default=MAX_WORKERS, help="同時に実行するリクエスト数")
+    parser.add_argument("--since", type=parse_since, default=None, help="この時刻以降に取得済みの地域は飛ばす（例: 3h, 2025-01-01T06:00）")
+    parser.add_argument("--dry-run", action="store_true", help="取得と解析だけを行い、DBには書き込まない")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="BUNDLE", help="取得した応答を記録するファイル（gzip圧縮）")
+    mode.add_argument("--replay", metavar="BUNDLE", help="記録した応答から取り込む")
+    parser.add_argument("--latency", type=float, default=0.0, help="再生時に1回の応答にかける秒数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="再生時にエラーにする割合（0〜1）")
+    parser.add_argument("--seed", type=int, default=0, help="再生時のエラーの乱数の種")
+    parser.add_argument("--metrics-json", metavar="PATH", help="所要時間と回数の集計を JSON で書き出すファイル")
+    parser.add_argument("--metrics-prom", metavar="PATH", help="所要時間と回数の集計を Prometheus のテキスト形式で書き出すファイル")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.concurrency < 1:
+        build_parser().error("--concurrency must be 1 or more")
+    if not 0.0 <= args.error_rate <= 1.0:
+        build_parser().error("--error-rate must be between 0 and 1")
+
+    # 途中経過は標準エラーに、まとめのJSONだけを標準出力に出す
+    def log(*values):
+        print(*values, file=sys.stderr)
+
+    # 記録・再生のときは、ふだんのHTTPキャッシュを使わない（記録では全件の本文を受け取るため）
+    session = cache = bundle = None
+    min_interval = MIN_INTERVAL
+    tmp = tempfile.TemporaryDirectory() if args.record or args.replay else None
+    if args.record:
+        bundle = FixtureBundle()
+        session = recording_session(bundle, args.concurrency)
+    elif args.replay:
+        session = replay_session(FixtureBundle.load(args.replay), args.latency, args.error_rate, args.seed)
+        # 再生のときは相手に負荷をかけないので間隔を空けない
+        min_interval = 0
+    if tmp is not None:
+        cache = HttpCache(cache_dir=tmp.name)
+
+    METRICS.enabled = bool(args.metrics_json or args.metrics_prom)
+
+    t0 = time.perf_counter()
+    try:
+        summary = run_pipeline(args.db, args.offices, args.concurrency, args.since, args.dry_run, log,
+                               session=session, cache=cache, min_interval=min_interval)
+        if bundle is not None:
+            bundle.save(args.record)
+            log(f"recorded: {len(bundle)} responses -> {args.record}")
+    except Exception as e:
+        summary = {"error": str(e)}
+        exit_code = 2
+    else:
+        failed = len(summary["errors"])
+        if failed == 0:
+            exit_code = 0
+        elif failed < summary["offices"]:
+            exit_code = 1
+        else:
+            exit_code = 2
+    if "timings" in summary:
+        summary["timings"] = {stage: round(sec, 4) for stage, sec in summary["timings"].items()}
+    summary["total_seconds"] = round(time.perf_counter() - t0, 4)
+    summary["exit_code"] = exit_code
+    if tmp is not None:
+        session.close()
+        tmp.cleanup()
+    if args.metrics_json:
+        METRICS.write_json(args.metrics_json)
+    if args.metrics_prom:
+        METRICS.write_prometheus(args.metrics_prom)
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
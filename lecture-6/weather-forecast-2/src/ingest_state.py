@@ -0,0 +1,49 @@
+import hashlib
+
+from db import DB_NAME
+from db_pool import get_pool
+
+# 取り込み状態（地域ごとに最後に取り込んだ発表時刻と本文のハッシュ）を読み書きする関数
+# 本文が前回と同じ地域や、前回より古い発表が返ってきた地域は、解析も保存もしない
+
+
+# 本文のハッシュを求める関数
+def content_hash(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+# 地域コード -> (発表時刻, ハッシュ) を読み込む関数
+def load_ingestion_state(db_name=DB_NAME):
+    with get_pool(db_name).connection() as conn:
+        return {code: (report, digest) for code, report, digest in conn.execute('SELECT area_code, report_datetime, content_hash FROM ingestion_state')}
+
+
+# 前回から変わっていないかを判定する関数
+def is_unchanged(previous, report_datetime, digest):
+    if previous is None:
+        return False
+    prev_report, prev_digest = previous
+    if prev_digest == digest:
+        return True
+    # 前回より古い発表（キャッシュの古い応答など）で新しい予報を上書きしない
+    return bool(report_datetime and prev_report and report_datetime < prev_report)
+
+
+# 取り込み状態を書き込む関数（呼び出し側のトランザクションの中で実行する）
+#   states: 新しく取り込んだ地域の (地域コード, 発表時刻, ハッシュ) のリスト
+#   checked: 変わっていなかった地域コードのリスト（確認した時刻だけを進める）
+def write_ingestion_state(conn, states, checked, checked_at):
+    conn.executemany(
+        'INSERT OR REPLACE INTO ingestion_state (area_code, report_datetime, content_hash, checked_at) VALUES (?, ?, ?, ?)',
+        [(code, report, digest, checked_at) for code, report, digest in states]
+    )
+    conn.executemany(
+        'UPDATE ingestion_state SET checked_at = ? WHERE area_code = ?',
+        [(checked_at, code) for code in checked]
+    )
+
+
+# 取り込み状態を保存する関数
+def save_ingestion_state(conn, states, checked, checked_at):
+    with conn:
+        write_ingestion_state(conn, states, checked, checked_at)
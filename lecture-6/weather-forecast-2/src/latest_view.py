@@ -0,0 +1,90 @@
+import json
+from datetime import date
+
+from weather_codes import weather_info
+
+# 地域ごとの「最新の予報」を表示用に整形済みの形で持っておくテーブル
+#
+# 取り込みのトランザクションの中で、書き換えた地域の行だけを作り直す（rebuild_latest）。
+# 画面は地域を選ぶたびに1行読むだけでよく、forecasts の履歴がどれだけ増えても速さは変わらない。
+# payload は [日番号, 表示用の1日分] のリストを JSON にしたもの（start_day 以降の日をすべて含む）
+
+LATEST_SQL = '''
+CREATE TABLE IF NOT EXISTS forecast_latest (
+    area_code TEXT PRIMARY KEY,
+    start_day INTEGER NOT NULL,
+    payload TEXT NOT NULL
+) WITHOUT ROWID;
+'''
+
+DAYS = 7
+
+
+# forecasts の行 (日番号, 天気の説明, 天気コード, 最低気温, 最高気温) を表示用の1日分にする関数
+def format_day(day, weather, code, tmin, tmax):
+    return {
+        "date": date.fromordinal(day).strftime("%Y/%m/%d"),
+        "weather": weather,
+        "weather_code": str(code),
+        "icons": weather_info(code, weather).icons,
+        "min": tmin if tmin is not None else "-",
+        "max": tmax if tmax is not None else "-",
+    }
+
+
+# 指定された地域の行を作り直す関数（呼び出し側のトランザクションの中で実行する）
+def rebuild_latest(conn, area_codes, today=None):
+    start_day = (today or date.today()).toordinal()
+    area_codes = sorted(set(area_codes))
+    payloads = {code: [] for code in area_codes}
+    # SQLite の変数の上限を超えないよう、地域コードを分けて問い合わせる
+    for i in range(0, len(area_codes), 500):
+        chunk = area_codes[i:i + 500]
+        rows = conn.execute(
+            f'''
+            SELECT f.area_code, f.forecast_day, COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max
+            FROM forecasts f
+            LEFT JOIN weather_code_master m ON m.code = f.weather_code
+            WHERE f.area_code IN ({",".join("?" * len(chunk))})
+              AND f.forecast_day >= ?
+            ORDER BY f.area_code, f.forecast_day
+            ''',
+            chunk + [start_day]
+        )
+        for code, day, *values in rows:
+            payloads[code].append([day, format_day(day, *values)])
+
+    conn.executemany(
+        'INSERT OR REPLACE INTO forecast_latest (area_code, start_day, payload) VALUES (?, ?, ?)',
+        [(code, start_day, json.dumps(days, ensure_ascii=False)) for code, days in payloads.items()]
+    )
+
+
+# 保存済みの全地域の行を作り直す関数
+def rebuild_all(conn, today=None):
+    codes = [row[0] for row in conn.execute('SELECT DISTINCT area_code FROM forecasts')]
+    rebuild_latest(conn, codes, today)
+
+
+# 指定された日以降の7日分を返す関数
+# 作り直した日より前の日を指定されたとき（この表では答えられないとき）は None を返す
+def read_latest(conn, area_code, day):
+    row = conn.execute('SELECT start_day, payload FROM forecast_latest WHERE area_code = ?', (area_code,)).fetchone()
+    if row is None:
+        return None
+    return days_from_payload(row[0], row[1], day)
+
+
+# forecast_latest の1行（start_day, payload）から指定された日以降の7日分を取り出す関数
+# 他のテーブルと JOIN して読んだ行にも使う（答えられないときは None）
+def days_from_payload(start_day, payload, day):
+    if start_day is None or day < start_day:
+        return None
+    days = []
+    for forecast_day, data in json.loads(payload):
+        if forecast_day >= day:
+            data["icons"] = tuple(data["icons"])
+            days.append(data)
+            if len(days) == DAYS:
+                break
+    return days
@@ -0,0 +1,209 @@
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 取り込みと読み出しの所要時間・件数を集計する仕組み
+#
+#   with METRICS.timer("fetch", office_code):   段階ごと・地域ごとの所要時間（ヒストグラム）
+#       ...
+#   METRICS.inc("retries")                       回数（カウンター）
+#
+# 無効のとき（既定）は timer が何もしない共通のオブジェクトを返すだけなので、ほとんど負担にならない。
+# 結果は Prometheus のテキスト形式（serve で /metrics に公開）か JSON ファイル（write_json）で取り出す。
+
+PREFIX = "weather"
+# ヒストグラムの区切り（秒）
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 環境変数で有効にする（GUIから使うとき）
+ENV_PORT = "WEATHER_METRICS_PORT"
+ENV_JSON = "WEATHER_METRICS_JSON"
+
+
+# (名前, ラベル) の組を、ラベルなし（None）を含めて並べるためのキー
+def _label_order(item):
+    name, label = item[0]
+    return name, label or ""
+
+
+# 無効のときに timer が返す、何もしないコンテキストマネージャー
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, stage, office):
+        self.metrics = metrics
+        self.stage = stage
+        self.office = office
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.office)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        # (段階, 地域コード) -> [区切りごとの件数..., 合計秒, 件数]
+        self.histograms = {}
+        # (名前, 段階) -> 回数
+        self.counters = {}
+
+    def timer(self, stage, office=None):
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, stage, office)
+
+    def observe(self, stage, seconds, office=None):
+        if not self.enabled:
+            return
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            hist = self.histograms.get((stage, office))
+            if hist is None:
+                hist = self.histograms[(stage, office)] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            hist[index] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+
+    def inc(self, name, stage=None, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(name, stage)] = self.counters.get((name, stage), 0) + n
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    # 集計結果を JSON にできる形で返す
+    def snapshot(self):
+        with self.lock:
+            histograms = {key: list(hist) for key, hist in self.histograms.items()}
+            counters = dict(self.counters)
+
+        stages = {}
+        for (stage, office), hist in sorted(histograms.items(), key=_label_order):
+            entry = stages.setdefault(stage, {"count": 0, "sum": 0.0, "offices": {}})
+            entry["count"] += hist[-1]
+            entry["sum"] += hist[-2]
+            if office is not None:
+                entry["offices"][office] = {"count": hist[-1], "sum": hist[-2], "buckets": hist[:-2]}
+        return {
+            "buckets": list(self.buckets),
+            "stages": stages,
+            "counters": {f"{name}:{stage}" if stage else name: value for (name, stage), value in sorted(counters.items(), key=_label_order)},
+        }
+
+    # Prometheus のテキスト形式で返す
+    def to_prometheus(self):
+        with self.lock:
+            histograms = sorted(((key, list(hist)) for key, hist in self.histograms.items()), key=_label_order)
+            counters = sorted(self.counters.items(), key=_label_order)
+
+        name = f"{PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each pipeline stage.", f"# TYPE {name} histogram"]
+        for (stage, office), hist in histograms:
+            labels = f'stage="{stage}"' + (f',office="{office}"' if office is not None else "")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), hist[:-2]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {hist[-2]}")
+            lines.append(f"{name}_count{{{labels}}} {hist[-1]}")
+
+        seen = set()
+        for (counter, stage), value in counters:
+            metric = f"{PREFIX}_{counter}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            labels = f'{{stage="{stage}"}}' if stage else ""
+            lines.append(f"{metric}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        self._write(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=2))
+
+    # node_exporter の textfile collector から読めるように、テキスト形式をファイルに書き出す
+    def write_prometheus(self, path):
+        self._write(path, self.to_prometheus())
+
+    def _write(self, path, text):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    # /metrics を返すHTTPサーバーを別スレッドで起動する（止めるときは shutdown）
+    def serve(self, port, host="127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# アプリ全体で使う集計（既定では無効）
+METRICS = Metrics()
+
+
+# 関数の所要時間を、第1引数（地域コード）ごとに集計するデコレーター
+def timed(stage, metrics=METRICS):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(area_code, *args, **kwargs):
+            if not metrics.enabled:
+                return func(area_code, *args, **kwargs)
+            with metrics.timer(stage, area_code):
+                return func(area_code, *args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# 環境変数 WEATHER_METRICS_PORT / WEATHER_METRICS_JSON が設定されていれば集計を有効にする関数
+# JSON ファイルへの書き出しは呼び出し側が write_json で行う
+def enable_from_env(metrics=METRICS):
+    port = os.environ.get(ENV_PORT)
+    json_path = os.environ.get(ENV_JSON)
+    if not port and not json_path:
+        return None
+    metrics.enabled = True
+    if port:
+        return metrics.serve(int(port))
+    return None
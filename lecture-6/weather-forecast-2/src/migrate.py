@@ -0,0 +1,175 @@
+import sqlite3
+import sys
+
+from archive import append_revisions
+from latest_view import LATEST_SQL, rebuild_all
+from weather_codes import weatherDescription
+
+# 現在のスキーマのバージョン（PRAGMA user_version に保存する）
+#   0: 初期の forecasts テーブル（天気の説明文とコードを文字列で毎行保存）
+#   1: 天気コードを整数にして weather_code_master を参照、日付を整数の日番号にした WITHOUT ROWID テーブル
+#   2: 発表ごとの履歴を残す月別テーブル（archive.py）を追加
+#   3: 地域ごとに最後に取り込んだ発表時刻と本文のハッシュを残す ingestion_state を追加
+#   4: 地域ごとの最新の予報を表示用に整形して持つ forecast_latest を追加（latest_view.py）
+SCHEMA_VERSION = 4
+
+# 天気コードのマスターテーブル
+WEATHER_CODE_MASTER_SQL = 'CREATE TABLE IF NOT EXISTS weather_code_master (code INTEGER PRIMARY KEY, description TEXT NOT NULL);'
+
+# 予報テーブル（バージョン1）
+# 主キー (area_code, forecast_day) の B-tree に全列が入るので、
+# 「ある地域の○日以降7日分」は主キーの範囲スキャン1回で済む（カバリングインデックスと同じ）
+FORECASTS_SQL = '''
+CREATE TABLE IF NOT EXISTS {name} (
+    area_code TEXT NOT NULL,
+    forecast_day INTEGER NOT NULL,
+    weather_code INTEGER,
+    temp_min INTEGER,
+    temp_max INTEGER,
+    fetched_at TEXT,
+    PRIMARY KEY (area_code, forecast_day),
+    FOREIGN KEY (area_code) REFERENCES area_master(area_code),
+    FOREIGN KEY (weather_code) REFERENCES weather_code_master(code)
+) WITHOUT ROWID;
+'''
+
+# 取り込み状態のテーブル（バージョン3）
+# 本文のハッシュが前回と同じ地域は、解析も保存もしない（ingest_state.py）
+INGESTION_STATE_SQL = '''
+CREATE TABLE IF NOT EXISTS ingestion_state (
+    area_code TEXT PRIMARY KEY,
+    report_datetime TEXT,
+    content_hash TEXT NOT NULL,
+    checked_at TEXT NOT NULL
+) WITHOUT ROWID;
+'''
+
+
+def get_version(conn):
+    return conn.execute('PRAGMA user_version;').fetchone()[0]
+
+
+def table_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+# weather_code_master に天気コードを登録する関数（何度実行してもよい）
+def seed_weather_codes(conn):
+    conn.execute(WEATHER_CODE_MASTER_SQL)
+    conn.executemany(
+        'INSERT OR REPLACE INTO weather_code_master (code, description) VALUES (?, ?)',
+        [(int(code), text) for code, text in weatherDescription.items()]
+    )
+
+
+# バージョン0 → 1
+# 旧テーブルの行を変換して新テーブルに移し、旧テーブルを置き換える
+def migrate_0_to_1(conn):
+    seed_weather_codes(conn)
+
+    if not table_exists(conn, 'forecasts'):
+        conn.execute(FORECASTS_SQL.format(name='forecasts'))
+        return
+
+    conn.execute(FORECASTS_SQL.format(name='forecasts_v1'))
+    # 日付は date.toordinal() と同じ日番号（0001-01-01 が 1）にする
+    conn.execute(
+        '''
+        INSERT OR REPLACE INTO forecasts_v1 (area_code, forecast_day, weather_code, temp_min, temp_max, fetched_at)
+        SELECT
+            area_code,
+            CAST(julianday(forecast_date) - 1721424.5 AS INTEGER),
+            CAST(weather_code AS INTEGER),
+            temp_min,
+            temp_max,
+            fetched_at
+        FROM forecasts
+        WHERE forecast_date IS NOT NULL
+        ORDER BY id
+        '''
+    )
+    # 旧テーブルにしかないコードも説明文ごと引き継ぐ
+    conn.execute(
+        '''
+        INSERT OR IGNORE INTO weather_code_master (code, description)
+        SELECT CAST(weather_code AS INTEGER), MAX(weather)
+        FROM forecasts
+        WHERE weather_code IS NOT NULL
+        GROUP BY CAST(weather_code AS INTEGER)
+        '''
+    )
+    conn.execute('DROP TABLE forecasts;')
+    conn.execute('ALTER TABLE forecasts_v1 RENAME TO forecasts;')
+
+
+# バージョン1 → 2
+# 保存済みの最新予報を、履歴の最初の1件として月別テーブルに入れる
+def migrate_1_to_2(conn):
+    rows = conn.execute('SELECT area_code, forecast_day, weather_code, temp_min, temp_max, fetched_at FROM forecasts WHERE fetched_at IS NOT NULL').fetchall()
+    append_revisions(conn, rows)
+
+
+# バージョン2 → 3
+# 状態は空のまま始める（最初の取り込みで全地域が記録される）
+def migrate_2_to_3(conn):
+    conn.execute(INGESTION_STATE_SQL)
+
+
+# バージョン3 → 4
+# 保存済みの予報から全地域分を作っておく
+def migrate_3_to_4(conn):
+    conn.execute(LATEST_SQL)
+    rebuild_all(conn)
+
+
+MIGRATIONS = {
+    0: migrate_0_to_1,
+    1: migrate_1_to_2,
+    2: migrate_2_to_3,
+    3: migrate_3_to_4,
+}
+
+
+# DBを最新のスキーマに上げる関数
+# 実行済みのバージョンは飛ばすので、何度呼んでも結果は同じ
+def migrate(conn, vacuum=False, target=SCHEMA_VERSION):
+    version = get_version(conn)
+    if version >= target:
+        return False
+
+    # executescript などで暗黙のコミットが起きないよう、自分でトランザクションを管理する
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE;')
+        # 別の接続が先に移行を終えていたら何もしない
+        version = get_version(conn)
+        while version < target:
+            MIGRATIONS[version](conn)
+            version += 1
+            conn.execute(f'PRAGMA user_version = {version};')
+        conn.execute('COMMIT;')
+    except BaseException:
+        conn.execute('ROLLBACK;')
+        raise
+    finally:
+        conn.isolation_level = isolation_level
+
+    # 旧テーブルの分の空き領域を解放する
+    if vacuum:
+        conn.execute('VACUUM;')
+    return True
+
+
+if __name__ == "__main__":
+    # 使い方: python migrate.py [weather.db]
+    db_name = sys.argv[1] if len(sys.argv) > 1 else 'weather.db'
+    conn = sqlite3.connect(db_name)
+    try:
+        before = get_version(conn)
+        changed = migrate(conn, vacuum=True)
+        after = get_version(conn)
+    finally:
+        conn.close()
+    print(f"{db_name}: version {before} -> {after}" + ("" if changed else "（移行済み）"))
@@ -0,0 +1,344 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import requests
+
+from archive import maintain as maintain_archive
+from area_index import LEVELS, AreaIndex
+from db import DB_NAME, connect, create_tables, forecast_rows, save_changed_rows, tracked_write
+from db_pool import get_pool
+from forecast_extract import parse_areas, report_datetime
+from http_cache import NOT_MODIFIED, HttpCache
+from ingest import MAX_WORKERS, MIN_INTERVAL, HostRateLimiter, fetch_forecasts, fetch_json, make_session
+from ingest_state import content_hash, is_unchanged, load_ingestion_state, write_ingestion_state
+from metrics import METRICS
+from migrate import SCHEMA_VERSION, get_version
+
+# 取り込み処理（GUIの main.py と、コマンドラインの ingest_cli.py の両方から使う）
+# flet を import しないこと
+
+# エンドポイントURL
+AREA_URL = "https://www.jma.go.jp/bosai/common/const/area.json"
+FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/{}.json"
+
+# HTTPキャッシュ（更新がなければダウンロードしない）
+# 保存先はアプリの storage/ の下で、ディレクトリは最初に保存するときに作る（import しただけでは何も作らない）
+HTTP_CACHE = HttpCache()
+
+
+# DBのテーブルを作成（必要なら移行）する関数
+def init_db(db_name=DB_NAME):
+    conn = None
+    try:
+        # DB接続オブジェクトの作成（テーブル作成）
+        conn = connect(db_name)
+        create_tables(conn)
+
+    except sqlite3.Error as e:
+        print('エラーが発生しました：', e)
+
+    finally:
+        # DBへの接続を閉じる
+        if conn is not None:
+            conn.close()
+
+
+# dry_run で使う、DBをそのまま読めるかを確かめる関数（読めれば None、読めなければ理由を返す）
+# DBファイルを作ったり移行したりしないよう、読み込み専用で開く
+def check_db(db_name=DB_NAME):
+    if not os.path.exists(db_name):
+        return f"{db_name} does not exist"
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_name)}?mode=ro", uri=True)
+    try:
+        version = get_version(conn)
+    finally:
+        conn.close()
+    if version < SCHEMA_VERSION:
+        return f"schema version {version} of {db_name} needs migration to {SCHEMA_VERSION}"
+    return None
+
+
+# 取り込み結果のまとめ（件数と段階ごとの所要時間）
+def new_summary():
+    return {
+        "offices": 0,
+        "fetched": 0,
+        "not_modified": 0,
+        "unchanged": 0,
+        "fresh": 0,
+        "skipped": 0,
+        "errors": [],
+        "rows": 0,
+        "written": 0,
+        "dry_run": False,
+        # dry_run のとき、保存済みのデータと比べられなかった理由（DBがない・移行が必要など。比べられたら None）
+        "db_problem": None,
+        "timings": {},
+    }
+
+
+# すべての地域の天気予報を取得してDBに保存する関数
+# 取得は並列に行い、全地域分の行を集めてから1トランザクションで保存する
+# 本文が前回と同じ地域は解析せず、値が変わった行だけを書き込む（ingest_state.py）
+#   offices: 対象の地域コード（None ならすべて）
+#   since: この時刻以降に取得済みの地域は取得しない
+#   dry_run: 取得と解析だけを行い、DBには書き込まない
+#   session / cache: 取得に使うセッションとHTTPキャッシュ（記録・再生のときに差し替える）
+#   min_interval: 同一ホストへのリクエスト間隔（再生のときは 0 でよい）
+def fetch_and_save_all_forecasts(area_json, on_progress=None, offices=None, max_workers=MAX_WORKERS,
+                                 since=None, dry_run=False, db_name=DB_NAME, log=print, summary=None,
+                                 session=None, cache=None, min_interval=MIN_INTERVAL):
+    summary = summary if summary is not None else new_summary()
+    cache = cache if cache is not None else HTTP_CACHE
+    summary["dry_run"] = dry_run
+    timings = summary["timings"]
+
+    all_offices = area_json["offices"]
+    # 一次細分区域の予報は、area.json でその府県予報区の子になっている地域だけを保存する
+    index = AreaIndex(area_json)
+    targets = [code for code in (offices or all_offices) if code in all_offices]
+    summary["db_problem"] = check_db(db_name) if dry_run else None
+    if summary["db_problem"] is None:
+        stored = get_stored_offices(db_name)
+        state = load_ingestion_state(db_name)
+    else:
+        # DBを作らず移行もしないので、保存済みのデータがないものとして取得と解析だけを行う
+        log(f"dry run: {summary['db_problem']} (not compared with stored forecasts)")
+        stored, state = {}, {}
+    if since is not None:
+        since_text = since.isoformat() if isinstance(since, datetime) else since
+        fresh = [code for code in targets if stored.get(code) and stored[code] >= since_text]
+        summary["fresh"] = len(fresh)
+        targets = [code for code in targets if code not in fresh]
+    summary["offices"] = len(targets)
+
+    rows = []
+    # 新しく取り込んだ地域の (コード, 発表時刻, ハッシュ) と、変わっていなかった地域のコード
+    new_states = []
+    checked = []
+    fetched_at = datetime.now().isoformat()
+    parse_time = 0.0
+    t0 = time.perf_counter()
+    # 本文は bytes のまま受け取り、前回と同じ本文なら読み込まない（ハッシュと発表時刻は bytes から求める）
+    for office_code, body, error in fetch_forecasts(targets, FORECAST_URL, on_progress,
+                                                    max_workers=max_workers, session=session, cache=cache,
+                                                    min_interval=min_interval, raw=True):
+        office_data = all_offices[office_code]
+        if error is not None:
+            log(f"error: {office_code}", error)
+            summary["errors"].append({"office": office_code, "error": str(error)})
+            continue
+
+        if body is NOT_MODIFIED:
+            # 更新がなく、DBにも保存済みなら解析も保存もしない
+            if office_code in stored:
+                log(f"not modified: {office_data['name']}")
+                summary["not_modified"] += 1
+                METRICS.inc("not_modified", "fetch")
+                checked.append(office_code)
+                continue
+            body = cache.load_body(FORECAST_URL.format(office_code))
+        summary["fetched"] += 1
+
+        # 本文が前回取り込んだものと同じなら解析しない
+        digest = content_hash(body)
+        report = report_datetime(body)
+        if is_unchanged(state.get(office_code), report, digest):
+            summary["unchanged"] += 1
+            METRICS.inc("unchanged", "fetch")
+            checked.append(office_code)
+            continue
+
+        p0 = time.perf_counter()
+        try:
+            with METRICS.timer("parse", office_code):
+                areas = parse_areas(json.loads(body))
+            if areas is None:
+                log(f"skip: {office_data['name']}")
+                summary["skipped"] += 1
+                METRICS.inc("skips", "parse")
+                new_states.append((office_code, report, digest))
+                continue
+
+            # 先頭は府県予報区としての予報、残りは一次細分区域ごとの予報（保存は全地域まとめて1回）
+            rows.extend(forecast_rows(office_code, *areas[0][1], fetched_at))
+            for area_code, (dates, codes, temps_min, temps_max) in areas:
+                if area_code != office_code and index.parent(area_code) == office_code:
+                    rows.extend(forecast_rows(area_code, dates, codes, temps_min, temps_max, fetched_at))
+            new_states.append((office_code, report, digest))
+            log(f"parsed: {office_data['name']}")
+
+        except Exception as e:
+            log(f"error: {office_code}", e)
+            summary["errors"].append({"office": office_code, "error": str(e)})
+            METRICS.inc("errors", "parse")
+
+        finally:
+            parse_time += time.perf_counter() - p0
+
+    timings["parse"] = parse_time
+    timings["fetch"] = time.perf_counter() - t0 - parse_time
+    summary["rows"] = len(rows)
+
+    if dry_run or not (rows or new_states or checked):
+        return summary
+
+    conn = connect(db_name)
+    try:
+        t0 = time.perf_counter()
+        # 予報の行と取り込み状態は1つのトランザクションで書く（途中で止まっても、片方だけが保存されないように）
+        saved = save_changed_rows(conn, rows, lambda c: write_ingestion_state(c, new_states, checked, fetched_at))
+        timings["save"] = time.perf_counter() - t0
+        summary["written"] = saved
+        log(f"saved: {saved} of {len(rows)} rows changed")
+
+        if saved:
+            t0 = time.perf_counter()
+            with METRICS.timer("archive"), tracked_write(conn):
+                dropped, removed = maintain_archive(conn)
+            timings["archive"] = time.perf_counter() - t0
+            if dropped or removed:
+                log(f"archive: dropped {len(dropped)} partitions, compacted {removed} rows")
+    finally:
+        conn.close()
+    return summary
+
+
+# 予報が保存済みの地域コードと、最後に取得（または変わっていないことを確認）した時刻を取得する関数
+def get_stored_offices(db_name=DB_NAME):
+    with get_pool(db_name).connection() as conn:
+        cur = conn.execute(
+            '''
+            SELECT area_code, MAX(at)
+            FROM (
+                SELECT area_code, MAX(fetched_at) AS at FROM forecasts GROUP BY area_code
+                UNION ALL
+                SELECT area_code, checked_at FROM ingestion_state
+            )
+            GROUP BY area_code
+            '''
+        )
+        return {code: fetched_at for code, fetched_at in cur.fetchall()}
+
+
+# 地域マスターデータをDBに挿入する関数
+# 地方・府県予報区に加えて、一次細分区域（class10s）から市町村等（class20s）までをまとめて1回で書き込む
+def insert_area_master(area_json, db_name=DB_NAME):
+    conn = connect(db_name)
+    with tracked_write(conn), conn:
+        conn.executemany(
+            '''
+            INSERT OR IGNORE INTO area_master
+            (area_code, area_name, area_type)
+            VALUES (?, ?, ?)
+            ''',
+            [
+                (code, data["name"], area_type)
+                for key, area_type in LEVELS
+                for code, data in area_json.get(key, {}).items()
+            ]
+        )
+    conn.close()
+
+
+# 地域の親子関係をDBに挿入する関数
+# 地方 → 府県予報区 → 一次細分区域 → … の順に、索引（AreaIndex）と同じ親子だけを保存する
+def insert_area_relation(area_json, db_name=DB_NAME):
+    index = AreaIndex(area_json)
+    conn = connect(db_name)
+    with tracked_write(conn), conn:
+        conn.executemany(
+            '''
+            INSERT OR IGNORE INTO area_relation
+            (parent_code, child_code)
+            VALUES (?, ?)
+            ''',
+            [
+                (code, child_code)
+                for key, _ in LEVELS
+                for code in area_json.get(key, {})
+                for child_code in index.children(code)
+                # 地方の子は、予報のある府県予報区だけにする（これまでと同じ）
+                if key != "centers" or child_code in area_json["offices"]
+            ]
+        )
+    conn.close()
+
+
+# DBに保存済みの地域データを area.json と同じ形で読み込む関数
+# （class10s / class15s / class20s も、保存されていれば name と children を持つ）
+def load_area_json_from_db(db_name=DB_NAME):
+    keys = {area_type: key for key, area_type in LEVELS}
+    area_json = {key: {} for key, _ in LEVELS}
+    entries = {}
+    with get_pool(db_name).connection() as conn:
+        for code, name, area_type in conn.execute('SELECT area_code, area_name, area_type FROM area_master ORDER BY rowid'):
+            if area_type in keys:
+                entries[code] = area_json[keys[area_type]][code] = {"name": name, "children": []}
+
+        for parent_code, child_code in conn.execute('SELECT parent_code, child_code FROM area_relation ORDER BY rowid'):
+            if parent_code in entries:
+                entries[parent_code]["children"].append(child_code)
+
+    return area_json
+
+
+# area.json を取得する関数（予報と同じく、間隔を空けてリトライする。更新がなければキャッシュの中身を返す）
+def fetch_area_json(session, cache, limiter):
+    body = fetch_json(session, AREA_URL, limiter, cache, raw=True)
+    if body is NOT_MODIFIED:
+        try:
+            body = cache.load_body(AREA_URL)
+        except OSError:
+            # 本体が消えていたときは、キャッシュにないものとして取り直す
+            cache.discard(AREA_URL)
+            body = fetch_json(session, AREA_URL, limiter, cache, raw=True)
+    return json.loads(body)
+
+
+# 地域データを取得してDBに保存する関数（取得した area.json を返す）
+# リトライしても取得できなければ、DBに保存済みの地域データを返す（保存済みのものもなければ例外を投げる）
+def refresh_areas(db_name=DB_NAME, dry_run=False, session=None, cache=None, min_interval=MIN_INTERVAL, log=print):
+    cache = cache if cache is not None else HTTP_CACHE
+    own_session = session is None
+    if own_session:
+        session = make_session(1)
+    try:
+        area_json = fetch_area_json(session, cache, HostRateLimiter(min_interval))
+    except (requests.RequestException, ValueError) as e:
+        try:
+            area_json = load_area_json_from_db(db_name)
+        except sqlite3.Error:
+            area_json = {"offices": {}}
+        if not area_json["offices"]:
+            raise
+        log(f"error: area.json ({e}), using the areas saved in {db_name}")
+        return area_json
+    finally:
+        if own_session:
+            session.close()
+
+    if not dry_run:
+        insert_area_master(area_json, db_name)
+        insert_area_relation(area_json, db_name)
+    return area_json
+
+
+# 地域データの更新から予報の保存までをまとめて実行する関数
+def run_pipeline(db_name=DB_NAME, offices=None, max_workers=MAX_WORKERS, since=None, dry_run=False,
+                 log=print, on_progress=None, session=None, cache=None, min_interval=MIN_INTERVAL):
+    summary = new_summary()
+    # dry_run ではDBを作らず、移行もしない（fetch_and_save_all_forecasts で読めるかを確かめる）
+    if not dry_run:
+        init_db(db_name)
+
+    t0 = time.perf_counter()
+    area_json = refresh_areas(db_name, dry_run, session, cache, min_interval, log)
+    summary["timings"]["area"] = time.perf_counter() - t0
+
+    fetch_and_save_all_forecasts(area_json, on_progress, offices, max_workers, since, dry_run, db_name, log, summary,
+                                 session, cache, min_interval)
+    return summary
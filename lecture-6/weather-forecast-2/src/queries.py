@@ -0,0 +1,167 @@
+from datetime import datetime
+
+from db import DB_NAME, db_signature, from_day, to_day
+from db_pool import get_pool
+from latest_view import days_from_payload, format_day, read_latest
+from metrics import METRICS, timed
+from query_cache import FORECAST_CACHE
+from weather_codes import weather_info
+
+# 画面に表示するための読み出し処理（flet を import しないこと）
+# 結果は FORECAST_CACHE に入れ、取り込みで地域の予報が変わったときだけ捨てる
+# 別のプロセス（ingest_cli.py）が DB に書き込んだときは、DB ファイルの更新時刻とサイズが変わるので、すべて捨てる
+# 所要時間は metrics に地域ごとに記録する（集計が無効なら何もしない）
+# DBへは db_pool の読み込み専用の接続を借りて問い合わせる（呼び出しのたびに接続を開かない）
+
+# 指定された地域コードの利用可能な予報日を取得する関数
+@timed("query_dates")
+def get_available_dates(area_code, db_name=DB_NAME):
+    FORECAST_CACHE.check(db_name, db_signature(db_name))
+    cached = FORECAST_CACHE.get(area_code, "dates")
+    if cached is not None:
+        METRICS.inc("cache_hits", "query_dates")
+        return cached
+
+    with get_pool(db_name).connection() as conn:
+        cur = conn.execute(
+            '''
+            SELECT forecast_day
+            FROM forecasts
+            WHERE area_code = ?
+            ORDER BY forecast_day DESC
+            ''',
+            (area_code,)
+        )
+        dates = [from_day(row[0]) for row in cur.fetchall()]
+
+    FORECAST_CACHE.put(area_code, "dates", dates)
+    return dates
+
+# 指定された地域コードと日付の天気予報を取得する関数（表示用に整形済み）
+@timed("query_day")
+def get_forecast_by_date(area_code, date, db_name=DB_NAME):
+    FORECAST_CACHE.check(db_name, db_signature(db_name))
+    cached = FORECAST_CACHE.get(area_code, ("day", date))
+    if cached is not None:
+        METRICS.inc("cache_hits", "query_day")
+        return cached
+
+    with get_pool(db_name).connection() as conn:
+        row = conn.execute(
+            """
+            SELECT COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max
+            FROM forecasts f
+            LEFT JOIN weather_code_master m ON m.code = f.weather_code
+            WHERE f.area_code = ? AND f.forecast_day = ?
+            """,
+            (area_code, to_day(date))
+        ).fetchone()
+
+    if not row:
+        return None
+
+    weather, code, tmin, tmax = row
+    data = {
+        "date": datetime.fromisoformat(date).strftime("%Y/%m/%d"),
+        "weather": weather,
+        "weather_code": str(code),
+        "icons": weather_info(code, weather).icons,
+        "min": tmin if tmin is not None else "-",
+        "max": tmax if tmax is not None else "-",
+    }
+
+    FORECAST_CACHE.put(area_code, ("day", date), data)
+    return data
+
+# 指定された地域コードと日付以降の7日間の天気予報を取得する関数
+# 同じ地域・日付の2回目以降はキャッシュから返す（DBには問い合わせない）
+@timed("query_7days")
+def get_7days_forecast_from_db(area_code, forecast_date, db_name=DB_NAME):
+    FORECAST_CACHE.check(db_name, db_signature(db_name))
+    cached = FORECAST_CACHE.get(area_code, ("7days", forecast_date))
+    if cached is not None:
+        METRICS.inc("cache_hits", "query_7days")
+        return cached
+
+    day = to_day(forecast_date)
+    with get_pool(db_name).connection() as conn:
+        # 取り込み時に作っておいた表示用の1行を読む
+        days = read_latest(conn, area_code, day)
+        if days is None:
+            # 作り直した日より前の日付を指定されたときは forecasts から組み立てる
+            rows = conn.execute(
+                """
+                SELECT
+                    f.forecast_day,
+                    COALESCE(m.description, '不明'),
+                    f.weather_code,
+                    f.temp_min,
+                    f.temp_max
+                FROM forecasts f
+                LEFT JOIN weather_code_master m ON m.code = f.weather_code
+                WHERE f.area_code = ?
+                  AND f.forecast_day >= ?
+                ORDER BY f.forecast_day
+                LIMIT 7
+                """,
+                (area_code, day)
+            ).fetchall()
+            days = [format_day(*row) for row in rows]
+
+    FORECAST_CACHE.put(area_code, ("7days", forecast_date), days)
+    return days
+
+# 指定された地方（center）に属するすべての都道府県について、日付以降の7日間の天気予報を取得する関数
+# area_relation から forecast_latest を JOIN して、地方全体を1回の問い合わせで読む
+# 都道府県のコードを渡すと、その一次細分区域（class10）の予報を同じように返す
+# [(地域コード, 地域名, 7日分のリスト), ...] を area_relation の登録順で返す
+@timed("query_region")
+def get_region_forecasts(center_code, forecast_date, db_name=DB_NAME):
+    FORECAST_CACHE.check(db_name, db_signature(db_name))
+    day = to_day(forecast_date)
+    with get_pool(db_name).connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT r.child_code, COALESCE(a.area_name, r.child_code), l.start_day, l.payload
+            FROM area_relation r
+            LEFT JOIN area_master a ON a.area_code = r.child_code
+            LEFT JOIN forecast_latest l ON l.area_code = r.child_code
+            WHERE r.parent_code = ?
+            ORDER BY r.rowid
+            """,
+            (center_code,)
+        ).fetchall()
+
+        region = []
+        missing = []
+        for code, name, start_day, payload in rows:
+            days = days_from_payload(start_day, payload, day)
+            if days is None:
+                missing.append(code)
+                days = []
+            region.append((code, name, days))
+
+        # forecast_latest で答えられない地域（過去の日付など）は forecasts からまとめて組み立てる
+        if missing:
+            by_code = {code: days for code, _, days in region}
+            for code, *values in conn.execute(
+                f"""
+                SELECT f.area_code, f.forecast_day, COALESCE(m.description, '不明'), f.weather_code, f.temp_min, f.temp_max
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY area_code ORDER BY forecast_day) AS n
+                    FROM forecasts
+                    WHERE area_code IN ({",".join("?" * len(missing))})
+                      AND forecast_day >= ?
+                ) f
+                LEFT JOIN weather_code_master m ON m.code = f.weather_code
+                WHERE f.n <= 7
+                ORDER BY f.area_code, f.forecast_day
+                """,
+                missing + [day]
+            ):
+                by_code[code].append(format_day(*values))
+
+    # 1地域ずつ選んだときにDBへ問い合わせなくて済むように、地域ごとのキャッシュにも入れておく
+    for code, _, days in region:
+        FORECAST_CACHE.put(code, ("7days", forecast_date), days)
+    return region
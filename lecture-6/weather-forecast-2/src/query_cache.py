@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# キャッシュ全体のメモリ上限（バイト、おおよその値）
+MAX_BYTES = 2 * 1024 * 1024
+
+
+# dict / list などを含めたおおよそのメモリ使用量を求める関数
+def estimate_size(obj):
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(estimate_size(v) for v in obj)
+    return size
+
+
+# DBから読み込んだ表示用データを (地域コード, キー) ごとに保持するLRUキャッシュ
+class QueryCache:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # (地域コード, キー) -> (値, サイズ)
+        self.entries = OrderedDict()
+        # 地域コード -> その地域のキーの集合（地域ごとに消すため）
+        self.by_area = {}
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        # 今のデータを読んだ DB の (パス, db.db_signature の値)
+        self.source = None
+
+    # 読む DB が変わったときや、DB が書き換えられていたとき（別のプロセスの ingest_cli.py など）は、すべて捨てる
+    # 自分のプロセスで保存したときは、その地域だけを invalidate で捨て、wrote で書き込んだあとの DB を覚えている
+    def check(self, db_name, signature):
+        source = (os.path.abspath(db_name), signature)
+        with self.lock:
+            if source != self.source:
+                self._clear()
+                self.source = source
+
+    # 自分のプロセスで DB に書き込んだあとに呼ぶ（before / after は書き込む前とあとの db.db_signature の値）
+    # 書き込む前の DB から読んだデータなら、書き込んだあとの DB を今のデータとして覚え、次の check で捨てないようにする
+    # （書き換えた地域は invalidate で捨ててある。別のプロセスも書き込んでいたら before が違うので、check ですべて捨てる）
+    def wrote(self, db_name, before, after):
+        path = os.path.abspath(db_name)
+        with self.lock:
+            if self.source == (path, before):
+                self.source = (path, after)
+
+    def get(self, area_code, key):
+        with self.lock:
+            entry = self.entries.get((area_code, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((area_code, key))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, area_code, key, value):
+        size = estimate_size(value)
+        with self.lock:
+            self._remove((area_code, key))
+            if size > self.max_bytes:
+                return
+            self.entries[(area_code, key)] = (value, size)
+            self.by_area.setdefault(area_code, set()).add(key)
+            self.total += size
+            # 上限を超えたら最近使われていないものから消す
+            while self.total > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+
+    # 指定された地域のデータだけを消す
+    def invalidate(self, area_codes):
+        with self.lock:
+            for area_code in area_codes:
+                for key in list(self.by_area.get(area_code, ())):
+                    self._remove((area_code, key))
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+            self.source = None
+
+    def _clear(self):
+        self.entries.clear()
+        self.by_area.clear()
+        self.total = 0
+
+    def _remove(self, full_key):
+        entry = self.entries.pop(full_key, None)
+        if entry is None:
+            return
+        area_code, key = full_key
+        self.total -= entry[1]
+        keys = self.by_area.get(area_code)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_area[area_code]
+
+
+# アプリ全体で共有するキャッシュ（保存時に db.py から、DB が書き換えられていれば queries.py の check で無効化される）
+FORECAST_CACHE = QueryCache()
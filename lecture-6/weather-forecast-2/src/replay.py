@@ -0,0 +1,160 @@
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http import HTTPStatus
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ingest import MAX_WORKERS, make_session
+
+# 気象庁APIの応答を記録・再生するための仕組み
+#
+# 記録: RecordingAdapter を付けたセッションで取り込むと、200 の応答がすべて FixtureBundle に入る
+#       （save で gzip 圧縮した1つのファイルに書き出す）
+# 再生: ReplayAdapter を付けたセッションは、ネットワークに出ずに記録から応答を返す
+#       遅延とエラー（接続エラー・503）を指定した割合で混ぜられる
+
+# 記録の対象にするURLの先頭
+JMA_PREFIX = "https://www.jma.go.jp/"
+# 記録しておくレスポンスヘッダー
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+BUNDLE_VERSION = 1
+
+
+# URL -> 応答（ステータス・ヘッダー・本文）をまとめたもの
+class FixtureBundle:
+    def __init__(self, responses=None, recorded_at=None):
+        self.responses = responses if responses is not None else {}
+        self.recorded_at = recorded_at
+        self.lock = threading.Lock()
+
+    def add(self, url, status, headers, body):
+        with self.lock:
+            self.responses[url] = {
+                "status": status,
+                "headers": {k: headers[k] for k in KEEP_HEADERS if headers.get(k)},
+                "body": body.decode("utf-8"),
+            }
+
+    def get(self, url):
+        return self.responses.get(url)
+
+    # 別のURLに同じ応答を登録する（ベンチマークで地域数を水増しするときに使う）
+    def alias(self, url, source_url):
+        self.responses[url] = self.responses[source_url]
+
+    def __len__(self):
+        return len(self.responses)
+
+    def save(self, path):
+        data = {
+            "version": BUNDLE_VERSION,
+            "recorded_at": self.recorded_at or datetime.now().isoformat(),
+            "responses": self.responses,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"unsupported fixture bundle version: {data.get('version')}")
+        return cls(data["responses"], data.get("recorded_at"))
+
+
+# 本物のAPIに問い合わせつつ、200 の応答を記録するアダプター
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, bundle, **kwargs):
+        super().__init__(**kwargs)
+        self.bundle = bundle
+
+    def send(self, request, **kwargs):
+        # 記録漏れがないように、条件付きGETのヘッダーは外して必ず本文を受け取る
+        request.headers.pop("If-None-Match", None)
+        request.headers.pop("If-Modified-Since", None)
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            self.bundle.add(request.url, response.status_code, response.headers, response.content)
+        return response
+
+
+# 記録から応答を返すアダプター（ネットワークには出ない）
+#   latency: 1回の応答にかける秒数
+#   error_rate: 接続エラーまたは 503 にする割合（0〜1）
+#   seed: エラーを起こす順番を毎回同じにするための乱数の種
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, bundle, latency=0.0, error_rate=0.0, seed=0):
+        super().__init__()
+        self.bundle = bundle
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"200": 0, "304": 0, "404": 0, "503": 0, "error": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def send(self, request, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.error_rate / 2:
+            self._count("error")
+            raise requests.ConnectionError(f"injected connection error: {request.url}", request=request)
+        if roll < self.error_rate:
+            self._count("503")
+            return self._response(request, 503, {}, b"")
+
+        entry = self.bundle.get(request.url)
+        if entry is None:
+            self._count("404")
+            return self._response(request, 404, {}, b"")
+
+        headers = entry["headers"]
+        etag = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            self._count("304")
+            return self._response(request, 304, headers, b"")
+
+        self._count("200")
+        return self._response(request, entry["status"], headers, entry["body"].encode("utf-8"))
+
+    def _response(self, request, status, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = HTTPStatus(status).phrase
+        return response
+
+    def close(self):
+        pass
+
+
+# 応答を記録するセッションを作る関数
+def recording_session(bundle, max_workers=MAX_WORKERS):
+    session = make_session(max_workers)
+    session.mount(JMA_PREFIX, RecordingAdapter(bundle, pool_connections=max_workers, pool_maxsize=max_workers))
+    return session
+
+
+# 記録から応答を返すセッションを作る関数（どのURLもネットワークには出ない）
+def replay_session(bundle, latency=0.0, error_rate=0.0, seed=0):
+    session = requests.Session()
+    adapter = ReplayAdapter(bundle, latency, error_rate, seed)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,78 @@
+import math
+from datetime import date
+
+import numpy as np
+import pytest
+
+from analytics import clear_cache, code_change_rates, load_forecasts, load_revisions, rolling_means, temperature_ranges
+from archive import append_revisions
+from db import connect
+from pipeline import init_db
+from query_cache import FORECAST_CACHE
+
+START = date(2025, 1, 1).toordinal()
+# 地域ごとの最高気温（None は値なし）
+TEMPS = {
+    "130000": [10, 12, None, 8, 9, 15, 11, 7, 10, 13],
+    "270000": [None, None, 20, 21],
+}
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    name = str(tmp_path / "weather.db")
+    init_db(name)
+    conn = connect(name)
+    with conn:
+        conn.executemany(
+            'INSERT INTO forecasts (area_code, forecast_day, weather_code, temp_min, temp_max, fetched_at) VALUES (?, ?, ?, ?, ?, ?)',
+            [(code, START + n, 100, None if t is None else t - 5, t, "2025-01-01T11:00:00")
+             for code, temps in TEMPS.items() for n, t in enumerate(temps)]
+        )
+        append_revisions(conn, [
+            # 130000 の1日目は 100 → 200 → 200（気温だけ変わる）、2日目は 100 のまま
+            ("130000", START, 100, 1, 10, "2025-01-01T05:00:00"),
+            ("130000", START, 200, 1, 10, "2025-01-01T11:00:00"),
+            ("130000", START, 200, 2, 10, "2025-01-01T17:00:00"),
+            ("130000", START + 1, 100, 1, 10, "2025-01-01T05:00:00"),
+            # 270000 は発表が1回だけ（比べられない）
+            ("270000", START, 300, 1, 10, "2025-01-01T05:00:00"),
+        ])
+    conn.close()
+    clear_cache()
+    yield name
+    clear_cache()
+    FORECAST_CACHE.clear()
+
+
+# 地域ごとに直前 window 日の平均を1行ずつ求める（比べる相手）
+def naive_rolling(temps, window):
+    means = []
+    for i in range(len(temps)):
+        values = [t for t in temps[max(0, i - window + 1):i + 1] if t is not None]
+        means.append(sum(values) / len(values) if values else math.nan)
+    return means
+
+
+@pytest.mark.parametrize("window", [1, 3, 7])
+def test_rolling_means_matches_naive_loop(db_name, window):
+    columns = load_forecasts(db_name)
+    expected = naive_rolling(TEMPS["130000"], window) + naive_rolling(TEMPS["270000"], window)
+    np.testing.assert_allclose(rolling_means(columns, window), expected)
+
+
+def test_temperature_ranges(db_name):
+    stats = temperature_ranges(load_forecasts(db_name))
+    assert list(stats["areas"]) == ["130000", "270000"]
+    assert list(stats["days"]) == [10, 4]
+    assert list(stats["max"]) == [15, 21]
+    assert stats["mean_max"][1] == pytest.approx(20.5)
+
+
+def test_code_change_rates(db_name):
+    rates = code_change_rates(load_revisions(db_name))
+    assert list(rates["areas"]) == ["130000", "270000"]
+    assert list(rates["revisions"]) == [2, 0]
+    assert list(rates["changes"]) == [1, 0]
+    assert rates["rate"][0] == pytest.approx(0.5)
+    assert math.isnan(rates["rate"][1])
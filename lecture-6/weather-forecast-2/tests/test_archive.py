@@ -0,0 +1,63 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from archive import append_revisions, compact, forecast_as_of, list_partitions, list_revisions, roll_off
+
+JAN = date(2025, 1, 10).toordinal()
+FEB = date(2025, 2, 10).toordinal()
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    yield conn
+    conn.close()
+
+
+def names(conn):
+    return [name for _, _, name in list_partitions(conn)]
+
+
+def test_forecast_as_of_returns_latest_revision_before_time(conn):
+    append_revisions(conn, [
+        ("130000", JAN, 100, 1, 10, "2025-01-08T11:00:00"),
+        ("130000", JAN, 200, 2, 11, "2025-01-09T11:00:00"),
+    ])
+
+    assert forecast_as_of(conn, "130000", JAN, "2025-01-08T12:00:00") == \
+        {"fetched_at": "2025-01-08T11:00:00", "weather_code": 100, "min": 1, "max": 10}
+    assert forecast_as_of(conn, "130000", JAN, "2025-01-10T00:00:00")["weather_code"] == 200
+    # 最初の発表より前と、履歴テーブルがない月
+    assert forecast_as_of(conn, "130000", JAN, "2025-01-01T00:00:00") is None
+    assert forecast_as_of(conn, "130000", FEB, "2025-03-01T00:00:00") is None
+
+
+def test_compact_keeps_only_changes_in_finished_months(conn):
+    rows = [
+        ("130000", day, code, 1, 10, fetched_at)
+        for day in (JAN, FEB)
+        for code, fetched_at in ((100, "2025-01-07T11:00:00"), (100, "2025-01-08T11:00:00"), (200, "2025-01-09T11:00:00"))
+    ]
+    append_revisions(conn, rows)
+    before = forecast_as_of(conn, "130000", JAN, "2025-01-08T12:00:00")
+
+    # 2月はまだ終わっていないので圧縮しない
+    assert compact(conn, today=date(2025, 2, 15)) == 1
+    assert [r["fetched_at"] for r in list_revisions(conn, "130000", JAN)] == ["2025-01-07T11:00:00", "2025-01-09T11:00:00"]
+    assert len(list_revisions(conn, "130000", FEB)) == 3
+    # 結果は圧縮する前と変わらない（値は同じで、発表時刻が最初に出た時刻になる）
+    after = forecast_as_of(conn, "130000", JAN, "2025-01-08T12:00:00")
+    assert (after["weather_code"], after["min"], after["max"]) == (before["weather_code"], before["min"], before["max"])
+
+    # 圧縮済みの月は読み直さない
+    assert compact(conn, today=date(2025, 2, 15)) == 0
+
+
+def test_roll_off_drops_old_months(conn):
+    append_revisions(conn, [("130000", day, 100, 1, 10, "2025-01-01T11:00:00") for day in (JAN, FEB)])
+
+    assert roll_off(conn, keep_months=12, today=date(2025, 12, 1)) == []
+    assert roll_off(conn, keep_months=12, today=date(2026, 1, 1)) == ["forecast_revisions_202501"]
+    assert names(conn) == ["forecast_revisions_202502"]
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from db_pool import ReadPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    name = str(tmp_path / "weather.db")
+    conn = sqlite3.connect(name)
+    with conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+    pool = ReadPool(name, size=2)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    with pool.connection() as conn:
+        assert conn.execute("SELECT x FROM t").fetchone() == (1,)
+    with pool.connection() as again:
+        assert again is conn
+    assert pool.opened == 1
+
+
+def test_connections_are_not_lost_on_errors(pool):
+    for error in (KeyError, ValueError, KeyError, sqlite3.OperationalError):
+        with pytest.raises(error):
+            with pool.connection() as conn:
+                conn.execute("SELECT x FROM t")
+                raise error("boom")
+    # 例外で抜けた接続は閉じられて、数え直されている
+    assert pool.opened == 0
+    with pool.connection() as first, pool.connection() as second:
+        assert first is not second
+
+
+def test_read_only(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+    assert pool.opened == 0
@@ -0,0 +1,72 @@
+import json
+
+from forecast_extract import area_fields, merge_fields, parse_areas, report_datetime
+
+# 気象庁の forecast/{code}.json と同じ形の小さな予報（使わない項目は省いてある）
+FORECAST = [
+    {
+        "reportDatetime": "2025-01-01T11:00:00+09:00",
+        "timeSeries": [
+            {
+                "timeDefines": ["2025-01-01T11:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [
+                    {"area": {"name": "東部", "code": "130010"}, "weatherCodes": ["100", "200", "300"]},
+                    {"area": {"name": "伊豆諸島北部", "code": "130020"}, "weatherCodes": ["101", "201", "301"]},
+                ],
+            },
+            {
+                "timeDefines": ["2025-01-01T09:00:00+09:00", "2025-01-02T00:00:00+09:00"],
+                "areas": [
+                    {"area": {"name": "東京", "code": "44132"}, "temps": ["", "3"]},
+                    {"area": {"name": "大島", "code": "44172"}, "temps": ["5", "9"]},
+                ],
+            },
+        ],
+    },
+    {
+        "reportDatetime": "2025-01-01T11:00:00+09:00",
+        "timeSeries": [
+            {
+                "timeDefines": ["2025-01-01T00:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [{"area": {"name": "東京地方", "code": "130010"}, "weatherCodes": ["100", "201", "300"]}],
+            },
+            {
+                "timeDefines": ["2025-01-01T00:00:00+09:00", "2025-01-02T00:00:00+09:00", "2025-01-03T00:00:00+09:00"],
+                "areas": [{"area": {"name": "東京", "code": "44132"}, "tempsMin": ["", "1", "2"], "tempsMax": ["", "10", ""]}],
+            },
+        ],
+    },
+]
+BODY = json.dumps(FORECAST, ensure_ascii=False).encode("utf-8")
+
+
+def test_parse_areas_pairs_each_area_with_its_values():
+    areas = parse_areas(json.loads(BODY))
+    assert [code for code, _ in areas] == ["130010", "130020"]
+
+    dates, codes, mins, maxs = areas[0][1]
+    assert codes == ["100", "201", "300"]
+    assert len(dates) == 3
+    # 当日は今日〜明後日の予報の気温、翌日以降は週間予報の気温（空文字は None）
+    assert mins == [3, 1, 2]
+    assert maxs == [3, 10, None]
+
+    # 週間予報にない地域は、今日〜明後日の天気コードだけ
+    dates, codes, mins, maxs = areas[1][1]
+    assert codes == ["101", "201", "301"]
+    assert mins == [None, None, None]
+
+
+def test_parse_areas_is_area_fields_merged():
+    forecast = json.loads(BODY)
+    expected = [(code, merge_fields(fields)) for code, fields in area_fields(forecast)]
+    assert parse_areas(forecast) == expected
+
+
+def test_no_forecast_for_the_area():
+    assert parse_areas([{"publishingOffice": "気象庁"}]) is None
+
+
+def test_report_datetime_reads_the_raw_body():
+    assert report_datetime(BODY) == "2025-01-01T11:00:00+09:00"
+    assert report_datetime(b"[]") is None
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+import requests
+
+from http_cache import NOT_MODIFIED, HttpCache
+from ingest import HostRateLimiter, fetch_json
+
+URL = "https://example.com/forecast/130000.json"
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+
+# 決まったレスポンスを順に返し、受け取ったヘッダーを記録するセッション
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+def fetch(session, cache, retries=3):
+    return fetch_json(session, URL, HostRateLimiter(0), cache, retries=retries, backoff=0)
+
+
+def test_not_modified_with_cached_entry(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=0)
+    fetch(FakeSession(FakeResponse(200, b'{"a": 1}', {"ETag": '"v1"'})), cache)
+
+    session = FakeSession(FakeResponse(304))
+    assert fetch(session, cache) is NOT_MODIFIED
+    assert session.headers == [{"If-None-Match": '"v1"'}]
+
+
+def test_not_modified_without_meta_refetches_unconditionally(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=0)
+    # 本体だけ残ってメタ情報がないエントリ（304 が返っても使えない）
+    body_path, meta_path = cache._paths(URL)
+    with open(body_path, "wb") as f:
+        f.write(b'{"stale": true}')
+
+    session = FakeSession(FakeResponse(304), FakeResponse(200, b'{"a": 2}', {"ETag": '"v2"'}))
+    assert fetch(session, cache) == {"a": 2}
+    assert session.headers == [{}, None]
+    assert cache.load_json(URL) == {"a": 2}
+    assert cache.lookup(URL)["etag"] == '"v2"'
+
+
+def test_not_modified_without_cache_object():
+    session = FakeSession(FakeResponse(304), FakeResponse(200, b'[1]'))
+    assert fetch(session, None) == [1]
+
+
+def test_repeated_not_modified_without_meta_raises(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=0)
+    session = FakeSession(*[FakeResponse(304)] * 3)
+    with pytest.raises(requests.HTTPError):
+        fetch(session, cache, retries=2)
+    assert len(session.headers) == 3
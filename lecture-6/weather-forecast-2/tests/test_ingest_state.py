@@ -0,0 +1,51 @@
+import pytest
+
+from db import changed_rows, connect, forecast_rows, save_changed_rows
+from ingest_state import content_hash, is_unchanged
+from pipeline import init_db
+from query_cache import FORECAST_CACHE
+
+DATES = ["2025-01-01", "2025-01-02", "2025-01-03"]
+REPORT = "2025-01-01T11:00:00+09:00"
+
+
+def test_is_unchanged_on_same_body():
+    digest = content_hash(b'{"a": 1}')
+    assert is_unchanged((REPORT, digest), REPORT, digest)
+    assert not is_unchanged((REPORT, digest), "2025-01-01T17:00:00+09:00", content_hash(b'{"a": 2}'))
+    # 取り込んだことのない地域
+    assert not is_unchanged(None, REPORT, digest)
+
+
+def test_is_unchanged_skips_older_report():
+    previous = (REPORT, content_hash(b"new"))
+    assert is_unchanged(previous, "2025-01-01T05:00:00+09:00", content_hash(b"old"))
+    # 発表時刻がわからなければ、本文が違う限り取り込む
+    assert not is_unchanged(previous, None, content_hash(b"old"))
+
+
+@pytest.fixture
+def conn(tmp_path):
+    name = str(tmp_path / "weather.db")
+    init_db(name)
+    conn = connect(name)
+    save_changed_rows(conn, forecast_rows("130000", DATES, ["100", "200", "300"], [1, 2, 3], [10, 11, 12]))
+    yield conn
+    conn.close()
+    FORECAST_CACHE.clear()
+
+
+def test_changed_rows_returns_only_different_values(conn):
+    rows = forecast_rows("130000", DATES, ["100", "201", "300"], [1, 2, None], [10, 11, 12])
+    rows += forecast_rows("270000", DATES[:1], ["100"], [1], [10])
+
+    changed = changed_rows(conn, rows)
+
+    # 天気コードが変わった日・気温がなくなった日・保存されていない地域だけ（取得時刻の違いは見ない）
+    assert [(code, day - rows[0][1]) for code, day, *_ in changed] == [("130000", 1), ("130000", 2), ("270000", 0)]
+
+
+def test_save_changed_rows_writes_nothing_when_unchanged(conn):
+    rows = forecast_rows("130000", DATES, ["100", "200", "300"], [1, 2, 3], [10, 11, 12])
+    assert save_changed_rows(conn, rows) == 0
+    assert save_changed_rows(conn, rows[:1] + forecast_rows("130000", DATES[1:2], ["201"], [2], [11])) == 1
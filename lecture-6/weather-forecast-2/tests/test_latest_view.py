@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import pytest
+
+from db import connect, forecast_rows, save_changed_rows
+from latest_view import rebuild_latest, read_latest
+from pipeline import init_db
+from query_cache import FORECAST_CACHE
+
+START = date(2025, 1, 1)
+DATES = [(START + timedelta(days=n)).isoformat() for n in range(10)]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    name = str(tmp_path / "weather.db")
+    init_db(name)
+    conn = connect(name)
+    codes = [str(100 + n) for n in range(10)]
+    save_changed_rows(conn, forecast_rows("130000", DATES, codes, list(range(10)), [None] * 10))
+    yield conn
+    conn.close()
+    FORECAST_CACHE.clear()
+
+
+def day(n):
+    return (START + timedelta(days=n)).toordinal()
+
+
+def test_read_latest_returns_seven_days_from_given_day(conn):
+    with conn:
+        rebuild_latest(conn, ["130000"], today=START + timedelta(days=1))
+
+    days = read_latest(conn, "130000", day(2))
+    assert [d["date"] for d in days] == [(START + timedelta(days=n)).strftime("%Y/%m/%d") for n in range(2, 9)]
+    assert [d["weather_code"] for d in days] == [str(100 + n) for n in range(2, 9)]
+    assert days[0]["min"] == 2
+    assert days[0]["max"] == "-"
+    assert isinstance(days[0]["icons"], tuple)
+    # 残りが7日に満たないときは、ある分だけ
+    assert len(read_latest(conn, "130000", day(6))) == 4
+
+
+def test_read_latest_cannot_answer_before_rebuild_day(conn):
+    with conn:
+        rebuild_latest(conn, ["130000"], today=START + timedelta(days=1))
+
+    assert read_latest(conn, "130000", day(0)) is None
+    assert read_latest(conn, "270000", day(2)) is None
+
+
+def test_rebuild_latest_reflects_new_rows(conn):
+    save_changed_rows(conn, forecast_rows("130000", DATES[3:4], ["300"], [5], [15]))
+    with conn:
+        rebuild_latest(conn, ["130000", "270000"], today=START)
+
+    days = read_latest(conn, "130000", day(3))
+    assert (days[0]["weather_code"], days[0]["min"], days[0]["max"]) == ("300", 5, 15)
+    # 予報のない地域は空の7日分
+    assert read_latest(conn, "270000", day(0)) == []
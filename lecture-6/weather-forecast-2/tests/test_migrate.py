@@ -0,0 +1,55 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from migrate import SCHEMA_VERSION, get_version, migrate
+
+# リポジトリに入っている、移行前（バージョン0）の weather.db
+BASELINE_DB = os.path.join(os.path.dirname(__file__), "..", "..", "weather.db")
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    path = tmp_path / "weather.db"
+    shutil.copy(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_migrates_baseline_to_latest_version(baseline):
+    assert get_version(baseline) == 0
+    forecasts = count(baseline, "forecasts")
+    areas = count(baseline, "area_master")
+
+    assert migrate(baseline) is True
+    assert get_version(baseline) == SCHEMA_VERSION
+    # 行は1件も失われない（日付のない行もない）
+    assert count(baseline, "forecasts") == forecasts == 392
+    assert count(baseline, "area_master") == areas
+    # 表示用の最新7日分は地域ごとに作られる
+    assert count(baseline, "forecast_latest") == 56
+    assert count(baseline, "ingestion_state") == 0
+
+
+def test_migrated_rows_keep_their_values(baseline):
+    before = baseline.execute(
+        "SELECT area_code, forecast_date, CAST(weather_code AS INTEGER), temp_min, temp_max FROM forecasts"
+    ).fetchall()
+    migrate(baseline)
+    after = baseline.execute(
+        "SELECT area_code, date(forecast_day + 1721424.5), weather_code, temp_min, temp_max FROM forecasts"
+    ).fetchall()
+    assert sorted(after) == sorted((code, day[:10], *values) for code, day, *values in before)
+
+
+def test_migrate_twice_does_nothing(baseline):
+    migrate(baseline)
+    assert migrate(baseline) is False
+    assert get_version(baseline) == SCHEMA_VERSION
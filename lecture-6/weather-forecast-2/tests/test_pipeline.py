@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+import requests
+
+from http_cache import HttpCache
+from migrate import get_version
+from pipeline import AREA_URL, FORECAST_URL, refresh_areas, run_pipeline
+from replay import FixtureBundle, ReplayAdapter, replay_session
+from test_forecast_extract import BODY
+from test_migrate import BASELINE_DB
+
+# 府県予報区が1つだけの area.json
+AREA_JSON = {
+    "centers": {"010300": {"name": "関東甲信地方", "children": ["130000"]}},
+    "offices": {"130000": {"name": "東京都", "parent": "010300", "children": ["130010", "130020"]}},
+    "class10s": {
+        "130010": {"name": "東京地方", "parent": "130000", "children": []},
+        "130020": {"name": "伊豆諸島北部", "parent": "130000", "children": []},
+    },
+}
+HEADERS = {"Content-Type": "application/json"}
+
+
+@pytest.fixture
+def bundle():
+    bundle = FixtureBundle()
+    bundle.add(AREA_URL, 200, HEADERS, json.dumps(AREA_JSON, ensure_ascii=False).encode("utf-8"))
+    bundle.add(FORECAST_URL.format("130000"), 200, HEADERS, BODY)
+    return bundle
+
+
+def run(db_name, bundle, tmp_path, **kwargs):
+    cache = HttpCache(str(tmp_path / "http_cache"), ttl=0)
+    return run_pipeline(db_name, session=replay_session(bundle), cache=cache, min_interval=0,
+                        log=lambda *args: None, **kwargs)
+
+
+def test_dry_run_does_not_migrate(bundle, tmp_path):
+    db_name = str(tmp_path / "weather.db")
+    shutil.copy(BASELINE_DB, db_name)
+
+    summary = run(db_name, bundle, tmp_path, dry_run=True)
+
+    assert summary["fetched"] == 1
+    assert summary["rows"] > 0
+    assert "needs migration" in summary["db_problem"]
+    conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True)
+    assert get_version(conn) == 0
+    conn.close()
+    assert not os.path.exists(db_name + "-wal")
+    assert not os.path.exists(db_name + "-shm")
+
+
+def test_dry_run_does_not_create_db(bundle, tmp_path):
+    db_name = str(tmp_path / "new.db")
+
+    summary = run(db_name, bundle, tmp_path, dry_run=True)
+
+    assert summary["rows"] > 0
+    assert "does not exist" in summary["db_problem"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("new.db")]
+
+
+def test_run_creates_db_and_saves(bundle, tmp_path):
+    db_name = str(tmp_path / "new.db")
+
+    summary = run(db_name, bundle, tmp_path)
+
+    assert summary["db_problem"] is None
+    assert summary["written"] == summary["rows"] > 0
+
+
+# 最初の何回かは area.json に 503 を返すセッション
+class FlakyAreaSession(requests.Session):
+    def __init__(self, bundle, failures):
+        super().__init__()
+        self.mount("https://", ReplayAdapter(bundle))
+        self.failures = failures
+
+    def get(self, url, **kwargs):
+        if url == AREA_URL and self.failures:
+            self.failures -= 1
+            response = requests.Response()
+            response.status_code = 503
+            return response
+        return super().get(url, **kwargs)
+
+
+def test_area_json_is_retried(bundle, tmp_path):
+    session = FlakyAreaSession(bundle, failures=1)
+    cache = HttpCache(str(tmp_path / "http_cache"), ttl=0)
+
+    area_json = refresh_areas(str(tmp_path / "weather.db"), dry_run=True, session=session, cache=cache, min_interval=0)
+
+    assert area_json == AREA_JSON
+    assert session.failures == 0
+
+
+def test_area_json_falls_back_to_saved_areas(bundle, tmp_path):
+    db_name = str(tmp_path / "weather.db")
+    run(db_name, bundle, tmp_path)
+    # area.json だけが取得できない（404 はリトライしない）
+    del bundle.responses[AREA_URL]
+    logged = []
+
+    summary = run_pipeline(db_name, session=replay_session(bundle), cache=HttpCache(str(tmp_path / "empty"), ttl=0),
+                           min_interval=0, log=lambda *args: logged.append(args))
+
+    assert "error: area.json" in logged[0][0]
+    assert summary["errors"] == []
+    assert summary["offices"] == 1
+
+
+def test_area_json_error_without_saved_areas(bundle, tmp_path):
+    del bundle.responses[AREA_URL]
+
+    with pytest.raises(requests.HTTPError):
+        run(str(tmp_path / "new.db"), bundle, tmp_path, dry_run=True)
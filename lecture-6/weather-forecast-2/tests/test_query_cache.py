@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from db import save_forecast_to_db
+from pipeline import init_db
+from queries import get_7days_forecast_from_db
+from query_cache import FORECAST_CACHE
+
+DATES = ["2025-01-01", "2025-01-02", "2025-01-03"]
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    name = str(tmp_path / "weather.db")
+    init_db(name)
+    FORECAST_CACHE.clear()
+    for code in ("130000", "270000"):
+        save_forecast_to_db(code, DATES, ["100", "200", "300"], [1, 2, 3], [10, 11, 12], db_name=name)
+    yield name
+    FORECAST_CACHE.clear()
+
+
+def cached(code):
+    return FORECAST_CACHE.entries.get((code, ("7days", DATES[0])))
+
+
+def test_own_save_drops_only_that_office(db_name):
+    for code in ("130000", "270000"):
+        get_7days_forecast_from_db(code, DATES[0], db_name)
+    other = cached("270000")
+
+    save_forecast_to_db("130000", DATES, ["300", "300", "300"], [1, 2, 3], [10, 11, 12], db_name=db_name)
+
+    assert cached("130000") is None
+    # 別の地域は同じものをキャッシュから返す
+    assert get_7days_forecast_from_db("270000", DATES[0], db_name) is other[0]
+    assert [day["weather_code"] for day in get_7days_forecast_from_db("130000", DATES[0], db_name)] == ["300"] * 3
+
+
+def test_write_by_another_connection_drops_everything(db_name):
+    before = get_7days_forecast_from_db("270000", DATES[0], db_name)
+    # 別のプロセスの ingest_cli.py と同じく、キャッシュを通さずに書き込む
+    conn = sqlite3.connect(db_name)
+    with conn:
+        conn.execute("UPDATE forecasts SET temp_max = 20 WHERE area_code = '130000'")
+    conn.close()
+
+    # どの地域が書き換えられたかはわからないので、ほかの地域も DB から読み直す
+    assert get_7days_forecast_from_db("270000", DATES[0], db_name) is not before